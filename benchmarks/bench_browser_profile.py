@@ -0,0 +1,135 @@
+"""
+Compares the memory and CPU cost of the full and lean browser profiles.
+
+Each profile is started with a throwaway Chrome profile directory and left on
+a page for a while; the proportional set size (PSS) of every Chrome process
+and their CPU time are then summed from /proc. Pointed at an existing
+logged-in profile copy with --user-data-dir, it measures a real WhatsApp Web
+session with its chat list and avatars.
+
+Linux only; needs Chrome and chromedriver.
+
+Usage:
+    python benchmarks/bench_browser_profile.py [--url https://web.whatsapp.com/]
+        [--settle 30] [--user-data-dir PATH] [--headless]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import main as app  # noqa: E402
+from browser_profile import BROWSER_PROFILES, block_media  # noqa: E402
+
+CLOCK_TICKS: int = os.sysconf("SC_CLK_TCK")
+
+
+def descendants(pid: int) -> list[int]:
+    """
+    Returns:
+        list[int]: The process ids of all children of `pid`, recursively.
+    """
+    children: dict[int, list[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", encoding="utf-8") as f:
+                parent: int = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(name))
+
+    found: list[int] = []
+    stack: list[int] = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def usage(pids: list[int]) -> tuple[float, float]:
+    """
+    Returns:
+        tuple[float, float]: The summed PSS in MiB (RSS where PSS is unavailable)
+            and the summed user and system CPU seconds of the processes.
+    """
+    memory_kib: int = 0
+    cpu_ticks: int = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+                fields: list[str] = f.read().rsplit(")", 1)[1].split()
+            cpu_ticks += int(fields[11]) + int(fields[12])
+            try:
+                with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+                    lines = [line for line in f if line.startswith("Pss:")]
+            except OSError:
+                lines = []
+            if not lines:
+                with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+                    lines = [line for line in f if line.startswith("VmRSS:")]
+            memory_kib += int(lines[0].split()[1]) if lines else 0
+        except (OSError, IndexError, ValueError):
+            continue
+    return memory_kib / 1024, cpu_ticks / CLOCK_TICKS
+
+
+def measure(profile: str, url: str, settle: float, user_data_dir: str, headless: bool) -> dict[str, float]:
+    from selenium import webdriver
+
+    options = app.build_chrome_options(user_data_dir, profile, headless)
+    start: float = time.perf_counter()
+    driver = webdriver.Chrome(options=options)
+    try:
+        if profile == "lean":
+            block_media(driver)
+        driver.get(url)
+        loaded: float = time.perf_counter() - start
+        time.sleep(settle)
+        pids: list[int] = descendants(driver.service.process.pid)
+        memory, cpu = usage(pids)
+    finally:
+        driver.quit()
+    return {"processes": len(pids), "pss_mib": memory, "cpu_s": cpu, "load_s": loaded}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="https://web.whatsapp.com/")
+    parser.add_argument("--settle", type=float, default=30.0, help="seconds on the page before measuring")
+    parser.add_argument("--user-data-dir", help="profile to copy for each run (default: a new empty one)")
+    parser.add_argument("--headless", action="store_true")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    for profile in BROWSER_PROFILES:
+        with tempfile.TemporaryDirectory() as workdir:
+            user_data_dir: str = os.path.join(workdir, "profile")
+            if args.user_data_dir:
+                shutil.copytree(args.user_data_dir, user_data_dir, ignore=shutil.ignore_patterns("Singleton*"))
+            results[profile] = measure(profile, args.url, args.settle, user_data_dir, args.headless)
+
+    print(f"{'profile':<8} {'procs':>6} {'PSS MiB':>9} {'CPU s':>7} {'load s':>7}")
+    for profile, result in results.items():
+        print(
+            f"{profile:<8} {result['processes']:>6} {result['pss_mib']:>9.0f} "
+            f"{result['cpu_s']:>7.1f} {result['load_s']:>7.1f}"
+        )
+    full, lean = results["full"], results["lean"]
+    if lean["pss_mib"]:
+        print(
+            f"lean uses {1 - lean['pss_mib'] / full['pss_mib']:.0%} less memory and "
+            f"{1 - lean['cpu_s'] / max(full['cpu_s'], 1e-9):.0%} less CPU; "
+            f"about {full['pss_mib'] / lean['pss_mib']:.1f}x the sessions fit in the same memory"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares the "inject" and "keys" compose strategies on the reminder template,
+counting WebDriver round-trips and wall time against a fake driver.
+
+Usage:
+    python benchmarks/bench_compose.py [--messages 20] [--round-trip 0.005]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from compose import COMPOSE_MODES, compose_message  # noqa: E402
+from fake_webdriver import FakeDriver, FakeElement, Latency  # noqa: E402
+from templates import default_engine  # noqa: E402
+from selenium.webdriver.common.keys import Keys  # noqa: E402
+
+MESSAGE_FIELDS: dict = {
+    "name": "NAHUEL",
+    "vehicle_license": "AE325CB",
+    "model_vehicle": "CRONOS",
+    "expire_date": pd.Timestamp.today(),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--round-trip", type=float, default=0.005)
+    parser.add_argument("--per-key", type=float, default=0.0002)
+    args = parser.parse_args()
+
+    text: str = default_engine().templates["reminder"].text.format(**MESSAGE_FIELDS)
+    print(f"{'mode':>8} {'round-trips/msg':>16} {'ms/msg':>8}")
+    for mode in COMPOSE_MODES:
+        latency = Latency(args.round_trip, args.per_key)
+        driver = FakeDriver(latency)
+        element = FakeElement(latency)
+        start: float = time.perf_counter()
+        for _ in range(args.messages):
+            compose_message(driver, element, text, mode)
+            element.send_keys(Keys.ENTER)
+        elapsed: float = time.perf_counter() - start
+        assert all(" ".join(m.split()) == " ".join(text.split()) for m in element.submitted)
+        print(
+            f"{mode:>8} {latency.commands / args.messages:>16.1f} "
+            f"{elapsed / args.messages * 1e3:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Downloads a synthetic installer from a local HTTP stand-in that drops the
+connection every few megabytes, and compares the resumable downloader with
+the former 1 KB streaming loop.
+
+Usage:
+    python benchmarks/bench_downloader.py [--size-mb 64] [--drop-every-mb 16]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from downloader import Downloader, DownloadError  # noqa: E402
+
+
+def make_server(payload: bytes, drop_every: int) -> ThreadingHTTPServer:
+    """
+    Builds a server for one file with ETag and Range support.
+
+    Each response is cut off after `drop_every` bytes (0 never drops),
+    like a flaky mobile connection.
+    """
+    etag: str = '"' + hashlib.sha256(payload).hexdigest()[:16] + '"'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            start: int = 0
+            requested = self.headers.get("Range")
+            if requested and self.headers.get("If-Range", etag) == etag:
+                start = int(requested.split("=")[1].split("-")[0])
+            if start >= len(payload):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(206 if start else 200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(payload) - start))
+            if start:
+                self.send_header("Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+            self.end_headers()
+
+            end: int = len(payload) if not drop_every else min(len(payload), start + drop_every)
+            self.wfile.write(payload[start:end])
+            if end < len(payload):
+                self.close_connection = True
+                self.connection.shutdown(2)
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+
+def legacy_download(url: str, dest_path: str) -> None:
+    """
+    The former download_file_with_progress loop, without the progress bar.
+    """
+    response = requests.get(url, stream=True)
+    total_size: int = int(response.headers.get("content-length", 0))
+    written: int = 0
+    with open(dest_path, "wb") as file:
+        for data in response.iter_content(1024):
+            written += len(data)
+            file.write(data)
+    if total_size != 0 and written != total_size:
+        raise Exception("Error: Downloading failed.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--drop-every-mb", type=int, default=16)
+    args = parser.parse_args()
+
+    payload: bytes = os.urandom(args.size_mb * 2**20)
+    digest: str = hashlib.sha256(payload).hexdigest()
+
+    for label, drop_every in (("stable", 0), ("flaky", args.drop_every_mb * 2**20)):
+        server = make_server(payload, drop_every)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url: str = f"http://127.0.0.1:{server.server_port}/chrome_installer.exe"
+
+        with tempfile.TemporaryDirectory() as workdir:
+            start: float = time.perf_counter()
+            try:
+                legacy_download(url, os.path.join(workdir, "legacy.exe"))
+                legacy: str = f"{time.perf_counter() - start:.2f}s"
+            except Exception as e:
+                legacy = f"failed ({type(e).__name__})"
+
+            downloader = Downloader(os.path.join(workdir, "cache"), backoff=0.0, progress=False)
+            start = time.perf_counter()
+            try:
+                path: str = downloader.fetch(url, digest)
+                resumable: str = f"{time.perf_counter() - start:.2f}s, {downloader.resumes} resumes"
+            except DownloadError as e:
+                resumable = f"failed ({e})"
+                path = ""
+
+            start = time.perf_counter()
+            hit: bool = bool(path) and downloader.fetch(url, digest) == path
+            cached: str = f"{(time.perf_counter() - start) * 1000:.1f}ms" if hit else "-"
+
+        server.shutdown()
+        print(
+            f"{label:<7} {args.size_mb} MiB: 1 KB loop {legacy:<22} "
+            f"resumable {resumable:<22} cache hit {cached}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Reports load time and peak memory of the recipient loader per input format,
+next to the former `pd.read_excel` path.
+
+Usage:
+    python benchmarks/bench_loader.py [--rows 50000] [--workdir /tmp/bench_loader]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from loader import read_recipients, write_recipients  # noqa: E402
+
+
+def make_table(rows: int) -> pd.DataFrame:
+    """
+    Builds a synthetic recipient table with a mix of date cells and statuses.
+
+    Args:
+        rows (int): The number of rows.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    rng = np.random.default_rng(0)
+    expire = pd.Timestamp.today().normalize() + pd.to_timedelta(rng.integers(-30, 60, rows), unit="D")
+    return pd.DataFrame(
+        {
+            "surname": rng.choice(["Rosas", "Perez", "Gomez", "Diaz"], rows),
+            "name": rng.choice(["Nahuel", "Ana", "Luis", "Sofia"], rows),
+            "whatsapp_number": 3510000000 + np.arange(rows),
+            "expire_date": expire,
+            "vehicle_license": rng.choice(["AE325CB", "AB123CD", "AC987ZX"], rows),
+            "model_vehicle": rng.choice(["cronos", "gol", "208", "corolla"], rows),
+            "status": rng.choice(["", "Correct", "Error"], rows, p=[0.8, 0.15, 0.05]),
+            "timestep": pd.Timestamp.today(),
+        }
+    )
+
+
+def measure(load: Callable[[], pd.DataFrame]) -> tuple[float, float]:
+    """
+    Returns the seconds of one load and the peak traced MiB of a second one.
+
+    Tracing slows allocation-heavy code down a lot, so time and memory are
+    measured in separate runs.
+    """
+    start: float = time.perf_counter()
+    load()
+    elapsed: float = time.perf_counter() - start
+
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--workdir", default="/tmp/bench_loader")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    table = make_table(args.rows)
+    paths: dict[str, str] = {}
+    for ext in (".xlsx", ".csv", ".parquet"):
+        path = os.path.join(args.workdir, f"recipients{ext}")
+        try:
+            write_recipients(table, path)
+            paths[ext] = path
+        except ImportError as e:
+            print(f"skipping {ext}: {e}")
+
+    cases: list[tuple[str, Callable[[], pd.DataFrame]]] = [
+        (
+            "xlsx pd.read_excel (before)",
+            lambda: pd.read_excel(paths[".xlsx"]).assign(
+                status=lambda df: df["status"].astype(str).fillna("")
+            ),
+        ),
+    ]
+    for ext, path in paths.items():
+        cases.append((f"{ext[1:]} read_recipients", lambda path=path: read_recipients(path)))
+        cases.append(
+            (
+                f"{ext[1:]} read_recipients projected",
+                lambda path=path: read_recipients(
+                    path, columns=["whatsapp_number", "expire_date", "status"]
+                ),
+            )
+        )
+
+    print(f"{args.rows} rows")
+    print(f"{'case':<36} {'seconds':>8} {'peak MiB':>9}")
+    for name, load in cases:
+        elapsed, peak = measure(load)
+        print(f"{name:<36} {elapsed:>8.2f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Measures the per-row cost of reading and updating recipients through
+RecipientIndex against the boolean-mask lookups it replaced.
+
+Usage:
+    python benchmarks/bench_recipient_index.py [--sizes 1000 10000 100000 500000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from recipient_index import RecipientIndex  # noqa: E402
+
+FIELDS: list[str] = ["name", "vehicle_license", "model_vehicle", "expire_date"]
+
+
+def make_table(rows: int) -> pd.DataFrame:
+    """
+    Builds a synthetic recipient table.
+
+    Args:
+        rows (int): The number of rows.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    return pd.DataFrame(
+        {
+            "surname": ["Rosas"] * rows,
+            "name": ["Nahuel"] * rows,
+            "whatsapp_number": (3510000000 + np.arange(rows)).astype(str),
+            "expire_date": pd.Timestamp.today() + pd.to_timedelta(np.arange(rows) % 30, unit="D"),
+            "vehicle_license": ["AE325CB"] * rows,
+            "model_vehicle": ["cronos"] * rows,
+            "status": [""] * rows,
+            "timestep": [pd.Timestamp.today()] * rows,
+        }
+    )
+
+
+def per_row_indexed(df: pd.DataFrame, numbers: list[str]) -> float:
+    """
+    Returns the mean seconds per recipient for render and status paths through the index.
+    """
+    index = RecipientIndex(df)
+    # Widen the written columns up front; that one-off pass belongs to the build
+    index.set(numbers[0], "status", "")
+    index.set(numbers[0], "timestep", None)
+
+    start: float = time.perf_counter()
+    for number in numbers:
+        index.get(number, "status")
+        index.fields(number, FIELDS)
+        index.set(number, "status", "Correct")
+        index.set(number, "timestep", datetime.today().date())
+    return (time.perf_counter() - start) / len(numbers)
+
+
+def per_row_masked(df: pd.DataFrame, numbers: list[str]) -> float:
+    """
+    Returns the mean seconds per recipient for the former `df.loc[mask]` lookups.
+    """
+    start: float = time.perf_counter()
+    for number in numbers:
+        df.loc[df["whatsapp_number"] == number, "status"].iloc[0]
+        for field in FIELDS:
+            df.loc[df["whatsapp_number"] == number, field].iloc[0]
+        df.loc[df["whatsapp_number"] == number, "status"] = "Correct"
+        df.loc[df["whatsapp_number"] == number, "timestep"] = datetime.today().date()
+    return (time.perf_counter() - start) / len(numbers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 500_000])
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument(
+        "--masked-limit",
+        type=int,
+        default=100_000,
+        help="skip the mask baseline above this size, it grows linearly",
+    )
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>10} {'build ms':>10} {'index us/row':>14} {'mask us/row':>14}")
+    for rows in args.sizes:
+        df = make_table(rows)
+        numbers: list[str] = df["whatsapp_number"].iloc[
+            rng.integers(0, rows, min(args.samples, rows))
+        ].tolist()
+
+        start: float = time.perf_counter()
+        RecipientIndex(df)
+        build_ms: float = (time.perf_counter() - start) * 1e3
+
+        indexed: float = per_row_indexed(df.copy(), numbers)
+        masked: str = (
+            f"{per_row_masked(df.copy(), numbers[:50]) * 1e6:14.1f}"
+            if rows <= args.masked_limit
+            else f"{'-':>14}"
+        )
+        print(f"{rows:>10} {build_ms:>10.1f} {indexed * 1e6:>14.1f} {masked}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Shows how SenderPool throughput scales with the number of sessions, using a
+stub send with a fixed per-message latency in place of a browser.
+
+Usage:
+    python benchmarks/bench_sender_pool.py [--messages 40] [--latency 0.05]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sender_pool import MAX_SESSIONS, SenderPool  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per stub send")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'msg/s':>8} {'speedup':>8}")
+    baseline: float | None = None
+    for sessions in range(1, MAX_SESSIONS + 1):
+        pool = SenderPool(
+            driver_factory=lambda user_data_dir: object(),
+            send=lambda driver, recipient: time.sleep(args.latency),
+            login_check=lambda driver: True,
+            sessions=sessions,
+            drivers=[object() for _ in range(sessions)],
+        )
+        summary = pool.run(str(n) for n in range(args.messages))
+        rate: float = args.messages / summary["elapsed"]
+        baseline = baseline or rate
+        print(f"{sessions:>8} {rate:>8.1f} {rate / baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmarks the send loop, `preview_whatsapp_message` and
+`display_pending_messages` on synthetic workbooks against a fake WebDriver,
+and compares the results with a baseline file.
+
+For each table size it reports load time, messages per second, the time of
+each send stage, the persistence cost (status records and the final
+workbook rewrite) and peak traced memory. Memory is measured in a separate
+run without simulated latency, because tracing distorts timings.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 1000 10000 100000] [--messages 50]
+        [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import compose  # noqa: E402
+import main as app  # noqa: E402
+import session  # noqa: E402
+from bench_loader import make_table  # noqa: E402
+from fake_webdriver import FakeDriver, Latency  # noqa: E402
+from journal import open_journal  # noqa: E402
+from loader import write_recipients  # noqa: E402
+from planner import SendPlan  # noqa: E402
+from recipient_index import RecipientIndex  # noqa: E402
+
+BASELINE: str = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Metrics where a larger value is better; all others are costs
+HIGHER_IS_BETTER: tuple[str, ...] = ("msgs_per_s",)
+
+# (module, attribute, stage) of the functions timed inside the send loop
+STAGES: list[tuple[Any, str, str]] = [
+    (session, "open_chat", "open_chat"),
+    (session, "wait_for_chat", "wait_for_chat"),
+    (app, "render_message", "render"),
+    (compose, "compose_message", "compose"),
+    (app, "record_status", "persist"),
+]
+
+
+@contextlib.contextmanager
+def stage_timers(totals: dict[str, float]):
+    """
+    Wraps the send stages so their wall time is added to `totals` while active.
+    """
+    originals: list[tuple[Any, str, Callable]] = []
+    for module, attribute, stage in STAGES:
+        function = getattr(module, attribute)
+        originals.append((module, attribute, function))
+
+        def timed(*args, _function=function, _stage=stage, **kwargs):
+            start: float = time.perf_counter()
+            try:
+                return _function(*args, **kwargs)
+            finally:
+                totals[_stage] = totals.get(_stage, 0.0) + time.perf_counter() - start
+
+        setattr(module, attribute, timed)
+    try:
+        yield totals
+    finally:
+        for module, attribute, function in originals:
+            setattr(module, attribute, function)
+
+
+def write_table(path: str, rows: int, due: int) -> None:
+    """
+    Writes a synthetic workbook whose first `due` rows are due today and unsent.
+    """
+    table = make_table(rows)
+    table["whatsapp_number"] = table["whatsapp_number"].astype(str)
+    today = pd.Timestamp.today().normalize()
+    table.loc[: due - 1, "expire_date"] = today + pd.Timedelta(days=2)
+    table.loc[: due - 1, "status"] = ""
+    write_recipients(table, path)
+
+
+def load(path: str) -> pd.DataFrame:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return app.load_excel_data(path)
+
+
+def traced(run: Callable[[], Any]) -> float:
+    """
+    Returns:
+        float: The peak traced MiB of one run.
+    """
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def send_loop(path: str, df: pd.DataFrame, messages: int, latency: Latency) -> dict[str, Any]:
+    """
+    Sends up to `messages` pending reminders through a fake driver.
+
+    The loop ends when every message has its first delivery tick, so the
+    time the background watcher needs after the last submit is included.
+
+    Returns:
+        dict[str, Any]: Messages per second, per-stage milliseconds per message,
+            persistence cost, the wait for the last ticks and the final compaction time.
+    """
+    index = RecipientIndex(df)
+    plan = SendPlan(df)
+    driver = FakeDriver(latency)
+    recipients: list[str] = app.pending_recipients(plan, path)[:messages]
+
+    totals: dict[str, float] = {}
+    with contextlib.redirect_stdout(io.StringIO()), stage_timers(totals):
+        start: float = time.perf_counter()
+        for recipient in recipients:
+            app.send_whatsapp_message(driver, recipient, df, path, index=index, plan=plan)
+        drain_start: float = time.perf_counter()
+        app.wait_for_deliveries([driver])
+        drained: float = time.perf_counter() - drain_start
+        elapsed: float = time.perf_counter() - start
+
+    sent: int = len(driver.compose.submitted)
+    if sent != len(recipients):
+        raise RuntimeError(f"Only {sent} of {len(recipients)} messages reached the fake chat.")
+    unconfirmed: int = int(df["status"].isin(["Sending", "Unconfirmed"]).sum())
+    if unconfirmed:
+        raise RuntimeError(f"{unconfirmed} messages were not confirmed by the delivery watcher.")
+
+    start = time.perf_counter()
+    open_journal(path).compact(df, path)
+    compact: float = time.perf_counter() - start
+    return {
+        "msgs_per_s": sent / elapsed if elapsed else 0.0,
+        "stages_ms": {stage: seconds / max(sent, 1) * 1e3 for stage, seconds in totals.items()},
+        "drain_s": drained,
+        "compact_s": compact,
+    }
+
+
+def run_size(workdir: str, rows: int, messages: int, latency: Latency) -> dict[str, Any]:
+    path: str = os.path.join(workdir, f"data_{rows}.xlsx")
+    due: int = min(messages, rows)
+    results: dict[str, Any] = {}
+
+    write_table(path, rows, due)
+    start: float = time.perf_counter()
+    df = load(path)
+    results["load"] = {"seconds": time.perf_counter() - start, "peak_mib": traced(lambda: load(path))}
+
+    index = RecipientIndex(df)
+    for name, run in (
+        ("display", lambda plan: app.display_pending_messages(df, plan)),
+        ("preview", lambda plan: app.preview_whatsapp_message(df, index, plan)),
+    ):
+        # Each run gets a new plan, so preview starts with a cold render cache
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan = SendPlan(df)
+            start = time.perf_counter()
+            run(plan)
+            elapsed: float = time.perf_counter() - start
+            peak: float = traced(lambda: run(SendPlan(df)))
+        results[name] = {"seconds": elapsed, "peak_mib": peak}
+        if name == "preview":
+            results[name]["msgs_per_s"] = int(plan.due.sum()) / elapsed if elapsed else 0.0
+
+    results["send"] = send_loop(path, df, messages, latency)
+
+    # The memory run sends the same messages again on a fresh copy, without latency
+    write_table(path, rows, due)
+    fresh = load(path)
+    results["send"]["peak_mib"] = traced(
+        lambda: send_loop(path, fresh, messages, Latency(0.0, 0.0, 0.0))
+    )
+    return results
+
+
+def flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for key, value in results.items():
+        name: str = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        else:
+            flat[name] = float(value)
+    return flat
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Returns:
+        list[str]: One line per metric that is more than `tolerance` worse than the baseline.
+    """
+    current, before = flatten(results), flatten(baseline)
+    regressions: list[str] = []
+    for name, value in current.items():
+        if name not in before or before[name] <= 0:
+            continue
+        ratio: float = value / before[name]
+        worse: bool = (
+            ratio < 1 - tolerance if name.rsplit("/", 1)[-1] in HIGHER_IS_BETTER else ratio > 1 + tolerance
+        )
+        if worse:
+            regressions.append(f"{name}: {before[name]:.4g} -> {value:.4g} ({ratio - 1:+.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--round-trip", type=float, default=0.005)
+    parser.add_argument("--chat-open", type=float, default=0.05)
+    parser.add_argument("--workdir", default="/tmp/bench_suite")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    config: dict[str, Any] = {
+        "messages": args.messages,
+        "round_trip": args.round_trip,
+        "chat_open": args.chat_open,
+    }
+    results: dict[str, Any] = {}
+    for rows in args.sizes:
+        latency = Latency(args.round_trip, 0.0002, args.chat_open)
+        results[str(rows)] = size = run_size(args.workdir, rows, args.messages, latency)
+        stages: str = ", ".join(f"{k} {v:.1f}" for k, v in size["send"]["stages_ms"].items())
+        print(f"{rows} rows")
+        print(f"  load     {size['load']['seconds']:7.2f}s  peak {size['load']['peak_mib']:7.1f} MiB")
+        print(f"  display  {size['display']['seconds']:7.3f}s  peak {size['display']['peak_mib']:7.1f} MiB")
+        print(
+            f"  preview  {size['preview']['seconds']:7.3f}s  peak {size['preview']['peak_mib']:7.1f} MiB"
+            f"  {size['preview']['msgs_per_s']:.0f} msgs/s"
+        )
+        print(
+            f"  send     {size['send']['msgs_per_s']:7.1f} msgs/s  peak {size['send']['peak_mib']:7.1f} MiB"
+            f"  compact {size['send']['compact_s']:.2f}s"
+        )
+        print(f"  stages   ms/msg: {stages}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}",
+                    "config": config,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --save-baseline first.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"Baseline was recorded with {baseline.get('config')}; comparing anyway.")
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+In-process stand-ins for the WebDriver objects the sender touches.
+
+Every call sleeps for a configurable round-trip latency and is counted, so
+benchmarks can compare strategies by WebDriver round-trips and wall time
+without a browser or a WhatsApp account. The driver renders just enough of
+WhatsApp Web for `send_whatsapp_message`: the logged-in search box, chat
+spans in the chat list, deep-linked chats with a header and the compose box,
+and the delivery ticks of submitted messages.
+
+The benchmarks put `src` on sys.path before importing this module.
+"""
+
+import re
+import time
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.keys import Keys
+
+from delivery import snippet as preview
+from selector_registry import TARGETS
+
+# Registry target of each selector, so every fallback finds the same element
+_TARGET_OF: dict[tuple[str, str], str] = {
+    selector: name for name, selectors in TARGETS.items() for selector in selectors
+}
+
+
+class Latency:
+    """
+    Simulated cost of WebDriver commands.
+    """
+
+    def __init__(
+        self,
+        round_trip: float = 0.005,
+        per_key: float = 0.0002,
+        chat_open: float = 0.05,
+        delivery: float = 0.2,
+    ) -> None:
+        """
+        Args:
+            round_trip (float, optional): Seconds per WebDriver HTTP command. Defaults to 5ms.
+            per_key (float, optional): Extra seconds per character typed by chromedriver.
+                Defaults to 0.2ms.
+            chat_open (float, optional): Seconds until an opened chat is ready. Defaults to 50ms.
+            delivery (float, optional): Seconds from submit until a message shows two ticks;
+                it shows one tick before that. Defaults to 200ms.
+        """
+        self.round_trip: float = round_trip
+        self.per_key: float = per_key
+        self.chat_open: float = chat_open
+        self.delivery: float = delivery
+        self.commands: int = 0
+
+    def command(self, keys: int = 0) -> None:
+        self.commands += 1
+        time.sleep(self.round_trip + keys * self.per_key)
+
+
+class FakeElement:
+    """
+    A contenteditable element that records what was typed or pasted into it.
+    """
+
+    def __init__(self, latency: Latency, text: str = "", on_click=None, on_submit=None) -> None:
+        self.latency: Latency = latency
+        self.text: str = text
+        self.submitted: list[str] = []
+        self.on_click = on_click
+        self.on_submit = on_submit
+
+    def clear(self) -> None:
+        self.latency.command()
+        self.text = ""
+
+    def click(self) -> None:
+        self.latency.command()
+        if self.on_click is not None:
+            self.on_click()
+
+    def is_displayed(self) -> bool:
+        self.latency.command()
+        return True
+
+    def is_enabled(self) -> bool:
+        self.latency.command()
+        return True
+
+    def send_keys(self, *values: str) -> None:
+        value: str = "".join(values)
+        self.latency.command(len(value))
+        if value == Keys.ENTER:
+            self.submitted.append(self.text.strip("\n"))
+            self.text = ""
+            if self.on_submit is not None:
+                self.on_submit()
+        elif value == Keys.SHIFT + Keys.ENTER:
+            self.text += "\n"
+        else:
+            self.text += value
+
+
+class FakeDriver:
+    """
+    A driver for a logged-in WhatsApp Web page.
+
+    `execute_script` understands the compose paste and clear scripts, the
+    newest outgoing message id and the delivery tick check. Opening a chat, by deep link or by clicking its span,
+    shows the chat header and the compose box after `Latency.chat_open`
+    seconds. Selectors listed in `broken` match nothing, as after a markup
+    change of WhatsApp Web, so the registry has to fall back.
+    """
+
+    def __init__(
+        self,
+        latency: Latency | None = None,
+        names: dict[str, str] | None = None,
+        broken: set[tuple[str, str]] | None = None,
+    ) -> None:
+        """
+        Args:
+            latency (Latency, optional): The simulated command costs. Defaults to Latency().
+            names (dict[str, str], optional): Contact name shown in the header per phone
+                number digits. Defaults to showing the number.
+            broken (set[tuple[str, str]], optional): Selectors that match nothing.
+                Defaults to none.
+        """
+        self.latency: Latency = latency or Latency()
+        self.names: dict[str, str] = names or {}
+        self.broken: set[tuple[str, str]] = broken or set()
+        self.current_url: str = "https://web.whatsapp.com/"
+        self.search_box: FakeElement = FakeElement(self.latency)
+        self.header: FakeElement = FakeElement(self.latency)
+        self.compose: FakeElement = FakeElement(self.latency, on_submit=self._submitted)
+        self.chat: str | None = None
+        # Id, submit time and text of the messages sent per chat
+        self.outgoing: dict[str, list[tuple[str, float, str]]] = {}
+        self._ready_at: float = 0.0
+
+    def _open(self, chat: str, title: str) -> None:
+        self.chat = chat
+        self.header.text = title
+        self.compose.text = ""
+        self._ready_at = time.monotonic() + self.latency.chat_open
+
+    def _submitted(self) -> None:
+        if self.chat is not None:
+            sent = self.outgoing.setdefault(self.chat, [])
+            sent.append((f"true_{self.chat}_{len(sent)}", time.monotonic(), self.compose.submitted[-1]))
+
+    def _last_outgoing(self) -> str | None:
+        sent = self.outgoing.get(self.chat or "")
+        return sent[-1][0] if sent else None
+
+    def _tick(self, numbers: list[str], names: list[str], previous: str | None, snippet: str) -> str | None:
+        for chat, sent in self.outgoing.items():
+            if any(number in chat for number in numbers) or chat.lower() in names:
+                if chat == self.chat:
+                    ids: list[str] = [message_id for message_id, _, _ in sent]
+                    position: int = ids.index(previous) + 1 if previous in ids else 0
+                    own = sent[position] if position < len(sent) else None
+                else:
+                    # The chat list previews only the newest message
+                    own = sent[-1] if preview(sent[-1][2]).startswith(snippet) else None
+                if own is None:
+                    return None
+                waited: float = time.monotonic() - own[1]
+                return "delivered" if waited >= self.latency.delivery else "sent"
+        return None
+
+    def get(self, url: str) -> None:
+        self.latency.command()
+        self.current_url = url
+        match = re.search(r"send\?phone=(\d+)", url)
+        if match:
+            digits: str = match.group(1)
+            self._open(digits, self.names.get(digits, f"+{digits}"))
+        else:
+            self.chat = None
+
+    def find_elements(self, by: str, value: str) -> list[FakeElement]:
+        self.latency.command()
+        if (by, value) in self.broken:
+            return []
+        ready: bool = self.chat is not None and time.monotonic() >= self._ready_at
+        target: str | None = _TARGET_OF.get((by, value))
+        if target == "compose_box":
+            return [self.compose] if ready else []
+        if target == "chat_header":
+            return [self.header] if ready else []
+        if target == "search_box":
+            return [self.search_box]
+        match = re.search(r"span\[@title='(.+)'\]", value)
+        if match:
+            title: str = match.group(1)
+            return [FakeElement(self.latency, title, on_click=lambda: self._open(title, title))]
+        return []
+
+    def find_element(self, by: str, value: str) -> FakeElement:
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element for {by}={value}")
+        return elements[0]
+
+    def quit(self) -> None:
+        self.chat = None
+
+    def execute_script(self, script: str, *args):
+        self.latency.command()
+        if "ClipboardEvent" in script:
+            element, text = args
+            element.text += text
+            return element.text
+        if "selectAll" in script:
+            args[0].text = ""
+        if "data-icon" in script:
+            return [self._tick(*target) for target in args[0]]
+        if "message-out" in script:
+            return self._last_outgoing()
+        return None
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from selenium.webdriver import ChromeOptions
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+# "full" is the original maximized browser; "lean" drops what sending text does
+# not need, to save memory (see benchmarks/bench_browser_profile.py)
+BROWSER_PROFILES: tuple[str, ...] = ("full", "lean")
+
+# Fixed window of the lean profile; large enough for the chat list and a chat
+LEAN_WINDOW_SIZE: tuple[int, int] = (1024, 768)
+
+# Avatars, thumbnails, images and media that WhatsApp Web loads for every
+# chat; none of them are needed to send text
+LEAN_BLOCKED_URLS: list[str] = [
+    "*://pps.whatsapp.net/*",
+    "*://mmg.whatsapp.net/*",
+    "*://media*.whatsapp.net/*",
+    "*.jpg*",
+    "*.jpeg*",
+    "*.png*",
+    "*.gif*",
+    "*.webp*",
+    "*.mp4*",
+    "*.ogg*",
+    "*.webm*",
+]
+
+LEAN_ARGUMENTS: list[str] = [
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--mute-audio",
+    "--autoplay-policy=user-gesture-required",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    f"--window-size={LEAN_WINDOW_SIZE[0]},{LEAN_WINDOW_SIZE[1]}",
+]
+
+
+def apply_profile(chrome_options: ChromeOptions, profile: str = "full", headless: bool = False) -> None:
+    """
+    Adds the arguments of a browser profile to the Chrome options.
+
+    Args:
+        chrome_options (ChromeOptions): The options to extend.
+        profile (str, optional): 'full' or 'lean'. Defaults to 'full'.
+        headless (bool, optional): Run without a window, using Chrome's new headless
+            mode. The first login still needs a window to scan the QR code. Defaults to False.
+
+    Raises:
+        ValueError: If the profile is unknown.
+    """
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(f"Unknown browser profile '{profile}'; expected one of {BROWSER_PROFILES}.")
+    if profile == "lean":
+        for argument in LEAN_ARGUMENTS:
+            chrome_options.add_argument(argument)
+    else:
+        chrome_options.add_argument("--start-maximized")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+
+
+def block_media(driver: WebDriver) -> None:
+    """
+    Blocks image and media requests of a running browser through DevTools.
+
+    Args:
+        driver (WebDriver): A Chrome driver.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webdriver import WebDriver
+    from selenium.webdriver.remote.webelement import WebElement
+
+# "inject" pastes the whole message in one call; "keys" types it line by line
+COMPOSE_MODES: tuple[str, ...] = ("inject", "keys")
+
+# Dispatches a synthetic paste carrying the whole text, which the WhatsApp
+# editor handles like a real paste (line breaks included), and returns what
+# the compose box ended up containing so the caller can verify it.
+_PASTE_SCRIPT: str = """
+const box = arguments[0];
+const text = arguments[1];
+box.focus();
+const data = new DataTransfer();
+data.setData("text/plain", text);
+box.dispatchEvent(new ClipboardEvent("paste", {
+    clipboardData: data, bubbles: true, cancelable: true
+}));
+return box.innerText;
+"""
+
+_CLEAR_SCRIPT: str = """
+const box = arguments[0];
+box.focus();
+document.execCommand("selectAll", false, null);
+document.execCommand("delete", false, null);
+"""
+
+
+def _same_text(a: str, b: str) -> bool:
+    return " ".join(a.split()) == " ".join(b.split())
+
+
+def type_message(message_input: WebElement, text: str) -> None:
+    """
+    Types the message line by line, with SHIFT+ENTER between lines.
+
+    This costs two WebDriver round-trips per line and is kept as the fallback.
+
+    Args:
+        message_input (WebElement): The compose box.
+        text (str): The message to type.
+    """
+    from selenium.webdriver.common.keys import Keys
+
+    message_input.clear()
+    for line in text.splitlines():
+        message_input.send_keys(line)
+        message_input.send_keys(
+            Keys.SHIFT + Keys.ENTER
+        )  # Insert new line without sending message
+
+
+def inject_message(driver: WebDriver, message_input: WebElement, text: str) -> bool:
+    """
+    Inserts the whole message with a single synthetic paste event.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+        message_input (WebElement): The compose box.
+        text (str): The message to insert.
+
+    Returns:
+        bool: True if the compose box now holds the message.
+    """
+    content = driver.execute_script(_PASTE_SCRIPT, message_input, text)
+    return isinstance(content, str) and _same_text(content, text)
+
+
+def compose_message(
+    driver: WebDriver, message_input: WebElement, text: str, mode: str = "inject"
+) -> str:
+    """
+    Fills the compose box with the message, without sending it.
+
+    In "inject" mode the message is pasted in one call; if the compose box
+    does not end up holding exactly the message, it is cleared and typed
+    with keystrokes instead.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+        message_input (WebElement): The compose box.
+        text (str): The message.
+        mode (str, optional): One of COMPOSE_MODES. Defaults to 'inject'.
+
+    Raises:
+        ValueError: If the mode is unknown.
+
+    Returns:
+        str: The mode that was actually used.
+    """
+    if mode not in COMPOSE_MODES:
+        raise ValueError(f"Unknown compose mode '{mode}', expected one of {COMPOSE_MODES}.")
+
+    if mode == "inject":
+        if inject_message(driver, message_input, text):
+            return "inject"
+        driver.execute_script(_CLEAR_SCRIPT, message_input)
+
+    type_message(message_input, text)
+    return "keys"
@@ -0,0 +1,385 @@
+import json
+import threading
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable
+
+import pandas as pd
+from colorama import Fore
+
+from delivery import watcher_for
+from journal import open_journal
+from metrics import metrics
+from planner import SendPlan
+from recipient_index import RecipientIndex
+from retry import CircuitBreaker, CircuitOpenError
+from reloader import WorkbookReloader
+from scheduler import send_rate
+from sender_pool import RateLimiter, profile_dir_for
+
+# Seconds between two send cycles
+DEFAULT_INTERVAL: float = 3600.0
+
+DEFAULT_HEALTH_PORT: int = 8765
+
+
+def parse_windows(spec: str | None) -> list[tuple[dtime, dtime]]:
+    """
+    Parses send windows such as "09:00-12:00,14:00-18:00".
+
+    Args:
+        spec (str | None): Comma-separated HH:MM-HH:MM ranges; empty means all day.
+
+    Raises:
+        ValueError: If a range is malformed or ends before it starts.
+
+    Returns:
+        list[tuple[time, time]]: The windows, in the order given.
+    """
+    windows: list[tuple[dtime, dtime]] = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition("-")
+        if not sep:
+            raise ValueError(f"Send window '{part}' must look like HH:MM-HH:MM.")
+        window = (dtime.fromisoformat(start.strip()), dtime.fromisoformat(end.strip()))
+        if window[1] <= window[0]:
+            raise ValueError(f"Send window '{part}' ends before it starts.")
+        windows.append(window)
+    return windows
+
+
+def in_windows(now: datetime, windows: Iterable[tuple[dtime, dtime]]) -> bool:
+    """
+    Returns:
+        bool: True if `now` falls in one of the windows, or if there are none.
+    """
+    windows = list(windows)
+    return not windows or any(start <= now.time() < end for start, end in windows)
+
+
+def seconds_until_window(now: datetime, windows: Iterable[tuple[dtime, dtime]]) -> float:
+    """
+    Returns:
+        float: Seconds until the next window opens; 0 if one is open now.
+    """
+    windows = list(windows)
+    if in_windows(now, windows):
+        return 0.0
+    starts: list[datetime] = [
+        datetime.combine(now.date() + timedelta(days=days), start)
+        for days in (0, 1)
+        for start, _ in windows
+    ]
+    return min((start - now).total_seconds() for start in starts if start > now)
+
+
+def window_end(now: datetime, windows: Iterable[tuple[dtime, dtime]]) -> datetime | None:
+    """
+    Returns:
+        datetime | None: When the window open at `now` closes; None if there are no
+            windows or none is open.
+    """
+    for start, end in windows:
+        if start <= now.time() < end:
+            return datetime.combine(now.date(), end)
+    return None
+
+
+class SendDaemon:
+    """
+    Runs send cycles on a schedule with one warm, logged-in browser.
+
+    The driver is started once and kept alive between cycles; it is only
+    restarted when it stops responding. Before each cycle the recipient file
+    is reloaded incrementally and the plan is rebuilt when the day changes,
+    so a cycle only sends the rows that became due, or were added, since the
+    previous one. Each cycle sends the most urgent rows first and projects
+    when it will finish at the measured send rate. The state of the daemon
+    is served as JSON over HTTP.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        df: pd.DataFrame,
+        lead_days: Iterable[int],
+        driver_factory: Callable[[str], Any],
+        login_check: Callable[[Any], bool],
+        send: Callable[[Any, str, pd.DataFrame, RecipientIndex, SendPlan], str | None],
+        pending: Callable[[SendPlan], list[str]],
+        interval: float = DEFAULT_INTERVAL,
+        windows: Iterable[tuple[dtime, dtime]] = (),
+        min_interval: float = 0.0,
+        breaker: CircuitBreaker | None = None,
+        catch_up_days: int = 0,
+    ) -> None:
+        """
+        Args:
+            file_path (str): The recipient file.
+            df (pd.DataFrame): The table as loaded from it.
+            lead_days (Iterable[int]): Days before expiry on which rows are due.
+            driver_factory (Callable[[str], Any]): Starts a driver for a user-data directory.
+            login_check (Callable[[Any], bool]): Returns True once a driver is logged in.
+            send (Callable): Sends and records the message for a recipient, given the
+                driver, the number, the table, its index and the plan; returns the
+                failure class, or None if the message was sent.
+            pending (Callable[[SendPlan], list[str]]): Returns the numbers still to send.
+            interval (float, optional): Seconds between cycles. Defaults to one hour.
+            windows (Iterable[tuple[time, time]], optional): Times of day in which cycles
+                run. Defaults to all day.
+            min_interval (float, optional): Minimum seconds between two messages. Defaults to 0.
+            breaker (CircuitBreaker, optional): Ends a cycle early after repeated session
+                failures; the next cycle tries again once it has cooled down.
+            catch_up_days (int, optional): Days a missed send date stays due. Defaults to 0.
+        """
+        self.file_path: str = file_path
+        self.df: pd.DataFrame = df
+        self.lead_days: list[int] = list(lead_days)
+        self.driver_factory = driver_factory
+        self.login_check = login_check
+        self.send = send
+        self.pending = pending
+        self.interval: float = interval
+        self.windows: list[tuple[dtime, dtime]] = list(windows)
+        self.limiter: RateLimiter = RateLimiter(min_interval)
+        self.breaker: CircuitBreaker | None = breaker
+        self.catch_up_days: int = catch_up_days
+
+        self.index: RecipientIndex = RecipientIndex(df)
+        self.plan: SendPlan = SendPlan(df, lead_days=self.lead_days, catch_up_days=catch_up_days)
+        self.reloader: WorkbookReloader = WorkbookReloader(file_path, df)
+        self.driver: Any = None
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.state: dict[str, Any] = {
+            "status": "starting",
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "cycles": 0,
+            "sent": 0,
+            "failed": 0,
+            "last_cycle": None,
+            "next_cycle": None,
+            "last_error": None,
+            "logged_in": False,
+            "pending": None,
+            "projected_completion": None,
+        }
+
+    def _update(self, **values: Any) -> None:
+        with self._lock:
+            self.state.update(values)
+
+    def status(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: A snapshot of the daemon state.
+        """
+        with self._lock:
+            return dict(self.state)
+
+    def healthy(self) -> bool:
+        """
+        Returns:
+            bool: False if the browser is logged out, the last cycle failed or
+                sending is paused by the circuit breaker.
+        """
+        state = self.status()
+        return state["status"] not in ("logged_out", "failed", "paused")
+
+    def _ensure_driver(self) -> bool:
+        if self.driver is not None:
+            try:
+                self.driver.current_url
+            except Exception:
+                # The browser died; start a fresh one with the same profile
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                self.driver = None
+        if self.driver is None:
+            self.driver = self.driver_factory(profile_dir_for(0))
+        logged_in: bool = self.login_check(self.driver)
+        self._update(logged_in=logged_in)
+        return logged_in
+
+    def _refresh(self) -> None:
+        self.df, changed = self.reloader.reload(self.df)
+        if changed is None:
+            self.index.rebuild(self.df)
+        if changed is None or self.plan.today != date.today():
+            self.plan = SendPlan(self.df, lead_days=self.lead_days, catch_up_days=self.catch_up_days)
+        elif changed:
+            self.plan.refresh(changed)
+
+    def _project(self, remaining: int) -> None:
+        if not remaining:
+            self._update(pending=0, projected_completion=None)
+            return
+        finish: datetime = send_rate().projected_completion(remaining, min_interval=self.limiter.min_interval)
+        self._update(pending=remaining, projected_completion=finish.isoformat(timespec="seconds"))
+
+    def run_cycle(self) -> dict[str, Any]:
+        """
+        Sends the messages that are due now.
+
+        Returns:
+            dict[str, Any]: The cycle summary with `sent`, `failed` and `pending` counts.
+        """
+        self._update(status="running")
+        self._refresh()
+        pending: list[str] = self.pending(self.plan)
+        self._project(len(pending))
+        if not pending:
+            return {"sent": 0, "failed": 0, "pending": 0}
+
+        closes: datetime | None = window_end(datetime.now(), self.windows)
+        finish: datetime = send_rate().projected_completion(len(pending), min_interval=self.limiter.min_interval)
+        if closes is not None and finish > closes:
+            print(
+                f"{Fore.YELLOW}{len(pending)} messages are projected to finish at {finish:%H:%M}, "
+                f"after the send window closes at {closes:%H:%M}; the most urgent are sent first."
+            )
+
+        if not self._ensure_driver():
+            self._update(status="logged_out")
+            print(f"{Fore.RED}WhatsApp session not logged in; skipping this cycle.")
+            return {"sent": 0, "failed": 0, "pending": len(pending)}
+
+        sent: int = 0
+        failed: int = 0
+        remaining: int = len(pending)
+        for recipient in pending:
+            if self._stop.is_set():
+                break
+            if not in_windows(datetime.now(), self.windows):
+                # The rest waits for the next window, still ordered by deadline
+                print(f"{Fore.YELLOW}The send window closed; {remaining} messages wait for the next one.")
+                break
+            self.limiter.wait()
+            try:
+                failure = self.send(self.driver, recipient, self.df, self.index, self.plan)
+            except CircuitOpenError as e:
+                self._update(status="paused", last_error=str(e))
+                print(f"{Fore.RED}{str(e)} The rest of this cycle is skipped.")
+                break
+            if failure is None:
+                sent += 1
+            else:
+                failed += 1
+            remaining -= 1
+            self._project(remaining)
+        watcher_for(self.driver).drain()
+        open_journal(self.file_path).compact(self.df, self.file_path)
+        return {"sent": sent, "failed": failed, "pending": remaining}
+
+    def serve_forever(self) -> None:
+        """
+        Runs cycles until `stop` is called.
+
+        The browser is started and logged in up front, so the first cycle
+        does not pay for it.
+        """
+        if not self._ensure_driver():
+            print(f"{Fore.CYAN}Please scan the QR code to log in to WhatsApp Web.")
+        while not self._stop.is_set():
+            now: datetime = datetime.now()
+            wait: float = seconds_until_window(now, self.windows)
+            if wait == 0.0:
+                try:
+                    summary = self.run_cycle()
+                    with self._lock:
+                        self.state["cycles"] += 1
+                        self.state["sent"] += summary["sent"]
+                        self.state["failed"] += summary["failed"]
+                        self.state["last_cycle"] = now.isoformat(timespec="seconds")
+                        if self.state["status"] == "running":
+                            self.state["status"] = "idle"
+                    print(
+                        f"{Fore.CYAN}Cycle at {now:%H:%M}: sent {summary['sent']}, "
+                        f"failed {summary['failed']}, {summary['pending']} still pending."
+                    )
+                    metrics().flush()
+                except Exception as e:
+                    self._update(status="failed", last_error=str(e))
+                    print(f"{Fore.RED}Send cycle failed: {str(e)}")
+                wait = self.interval
+            else:
+                self._update(status="outside_window")
+                wait = min(wait, self.interval)
+
+            self._update(
+                next_cycle=(datetime.now() + timedelta(seconds=wait)).isoformat(timespec="seconds")
+            )
+            self._stop.wait(wait)
+
+    def stop(self) -> None:
+        """
+        Ends the loop after the message in flight, if any.
+        """
+        self._stop.set()
+
+    def close(self) -> None:
+        """
+        Saves the recipient file and quits the browser.
+        """
+        if self.driver is not None:
+            watcher_for(self.driver).close()
+        open_journal(self.file_path).compact(self.df, self.file_path)
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+def serve_health(daemon: SendDaemon, port: int = DEFAULT_HEALTH_PORT, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serves the daemon state as JSON on `/health` from a background thread.
+
+    The response is 200 while the daemon is healthy and 503 otherwise, so it
+    can be used directly by a process supervisor or uptime check. The send
+    metrics are served in Prometheus text format on `/metrics`.
+
+    Args:
+        daemon (SendDaemon): The daemon to report on.
+        port (int, optional): The port to listen on. Defaults to 8765.
+        host (str, optional): The address to bind. Defaults to localhost only.
+
+    Raises:
+        OSError: If the port cannot be bound, e.g. because it is in use.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call `shutdown()` to stop it.
+    """
+
+    class HealthHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            path: str = self.path.rstrip("/")
+            if path == "/metrics":
+                body: bytes = metrics().prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if path not in ("/health", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(daemon.status()).encode()
+            self.send_response(200 if daemon.healthy() else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), HealthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,318 @@
+import threading
+import time
+import weakref
+from typing import Callable, Iterable
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from journal import UNCONFIRMED_STATUS
+from metrics import metrics
+from session import match_keys, session_for
+
+SENT_STATUS: str = "Sent"
+DELIVERED_STATUS: str = "Delivered"
+
+# Seconds a submitted message is watched for its first tick
+CONFIRM_TIMEOUT: float = 30.0
+
+# Seconds between two tick checks; each check is one round-trip for all watched chats
+CONFIRM_POLL: float = 0.5
+
+# Characters of a message that identify it in the chat list preview
+SNIPPET_LENGTH: int = 24
+
+# Returns the id of the newest outgoing bubble in the open chat, or null
+_LAST_OUTGOING_SCRIPT: str = """
+const outgoing = document.querySelectorAll("#main .message-out");
+const bubble = outgoing.length ? outgoing[outgoing.length - 1].closest("[data-id]") : null;
+return bubble ? bubble.getAttribute("data-id") : null;
+"""
+
+# Reads the tick of each watched message: in the open conversation from the
+# first outgoing bubble after the one that was newest before the submit,
+# else from its chat list row while the row previews that message
+_TICKS_SCRIPT: str = """
+const targets = arguments[0];
+const squash = (text) => (text || "").replace(/\\s+/g, " ").trim().toLowerCase();
+const matches = (text, target) => {
+    const lower = (text || "").toLowerCase();
+    const digits = lower.replace(/\\D/g, "");
+    return target[0].some(n => digits.includes(n)) || target[1].some(n => lower.includes(n));
+};
+const tick = (root) => {
+    const icon = root && root.querySelector('[data-icon*="check"], [data-icon*="time"]');
+    if (!icon) return null;
+    const name = icon.getAttribute("data-icon");
+    if (name.includes("dblcheck")) return "delivered";
+    return name.includes("check") ? "sent" : "pending";
+};
+const header = document.querySelector("#main header");
+const rows = Array.from(document.querySelectorAll("#pane-side [role='listitem'], #pane-side [role='row']"));
+return targets.map(target => {
+    if (header && matches(header.innerText, target)) {
+        const ids = Array.from(document.querySelectorAll("#main .message-out")).map(bubble => {
+            const wrapper = bubble.closest("[data-id]");
+            return [wrapper ? wrapper.getAttribute("data-id") : null, bubble];
+        });
+        const before = target[2] === null ? -1 : ids.findIndex(([id]) => id === target[2]);
+        // The earlier bubble scrolled out of the rendered range; try the chat list
+        if (before >= 0 || target[2] === null) {
+            const own = ids[before + 1];
+            return own ? tick(own[1]) : null;
+        }
+    }
+    const row = rows.find(row => {
+        const title = row.querySelector("span[title]");
+        return title && matches(title.getAttribute("title"), target);
+    });
+    return row && squash(row.innerText).includes(target[3]) ? tick(row) : null;
+});
+"""
+
+
+def last_outgoing(driver: WebDriver) -> str | None:
+    """
+    Returns the id of the newest outgoing message in the open chat.
+
+    Read just before a message is submitted, it tells the delivery watcher
+    which bubble is the new one.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+
+    Returns:
+        str | None: The bubble's data-id, or None if the chat shows no outgoing message.
+    """
+    return driver.execute_script(_LAST_OUTGOING_SCRIPT)
+
+
+def snippet(message: str) -> str:
+    """
+    Returns the start of a message as the chat list previews it.
+
+    The preview shows the first line without WhatsApp's formatting marks.
+
+    Args:
+        message (str): The message text.
+
+    Returns:
+        str: The first characters of its first line with whitespace collapsed,
+            in lower case.
+    """
+    first: str = next((line for line in message.splitlines() if line.strip()), "")
+    plain: str = first.translate(str.maketrans("", "", "*_~`"))
+    return " ".join(plain.split())[:SNIPPET_LENGTH].lower()
+
+
+def tick_states(
+    driver: WebDriver, targets: list[tuple[list[str], list[str], str | None, str]]
+) -> list[str | None]:
+    """
+    Reads the delivery ticks of several messages in one round-trip.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+        targets (list[tuple[list[str], list[str], str | None, str]]): The `match_keys`
+            of each message's chat, followed by the `last_outgoing` id read before it
+            was submitted and its `snippet`.
+
+    Returns:
+        list[str | None]: 'delivered', 'sent', 'pending' or None (not visible) per message.
+    """
+    states = driver.execute_script(_TICKS_SCRIPT, [list(target) for target in targets])
+    return list(states or [None] * len(targets))
+
+
+class _Watch:
+    __slots__ = ("recipient", "target", "on_status", "started", "deadline", "state")
+
+    def __init__(
+        self,
+        recipient: str,
+        target: tuple[list[str], list[str], str | None, str],
+        on_status: Callable[[str], None],
+        timeout: float,
+    ) -> None:
+        self.recipient = recipient
+        self.target = target
+        self.on_status = on_status
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.state: str | None = None
+
+
+class DeliveryWatcher:
+    """
+    Confirms submitted messages in the background while the next ones are sent.
+
+    Each watched message is told apart from earlier messages of its chat by
+    the outgoing bubble that was newest before it was submitted, and by its
+    text in the chat list preview; ticks of any other message are ignored.
+    It is checked for its ticks until it shows two
+    (delivered) or its deadline passes. The first tick reports 'Sent', two
+    report 'Delivered', and a message with no tick by its deadline reports
+    'Unconfirmed'. Checks take the session lock, which the sender holds only
+    while it navigates and types, so they run while the next chat is opening.
+    """
+
+    def __init__(self, driver: WebDriver, poll_interval: float = CONFIRM_POLL) -> None:
+        """
+        Args:
+            driver (WebDriver): The driver whose messages are watched.
+            poll_interval (float, optional): Seconds between checks. Defaults to 0.5.
+        """
+        self.driver: WebDriver = driver
+        self.poll_interval: float = poll_interval
+        self._watches: list[_Watch] = []
+        self._changed = threading.Condition()
+        self._draining: bool = False
+        self._closed: bool = False
+        self._thread: threading.Thread | None = None
+
+    def watch(
+        self,
+        recipient: str,
+        expected: Iterable[str],
+        message: str,
+        previous: str | None,
+        on_status: Callable[[str], None],
+        timeout: float = CONFIRM_TIMEOUT,
+    ) -> None:
+        """
+        Starts confirming a message that was just submitted.
+
+        Args:
+            recipient (str): The recipient's WhatsApp number.
+            expected (Iterable[str]): Phone numbers or names the chat may show.
+            message (str): The submitted text.
+            previous (str | None): The `last_outgoing` id read before the submit.
+            on_status (Callable[[str], None]): Called from the watcher thread with
+                'Sent', 'Delivered' or 'Unconfirmed'.
+            timeout (float, optional): Seconds to wait for the first tick. Defaults to 30.
+        """
+        with self._changed:
+            numbers, names = match_keys(expected)
+            target = (numbers, names, previous, snippet(message))
+            self._watches.append(_Watch(recipient, target, on_status, timeout))
+            if self._thread is None:
+                self._closed = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._changed.notify_all()
+
+    def pending(self) -> int:
+        """
+        Returns:
+            int: The messages still being watched.
+        """
+        with self._changed:
+            return len(self._watches)
+
+    def _run(self) -> None:
+        lock = session_for(self.driver).lock
+        while True:
+            with self._changed:
+                while not self._watches and not self._closed:
+                    self._changed.wait()
+                if self._closed:
+                    return
+                watches: list[_Watch] = list(self._watches)
+
+            try:
+                with lock:
+                    states = tick_states(self.driver, [watch.target for watch in watches])
+            except Exception:
+                # The page is loading or the browser went away; try again until the deadline
+                states = [None] * len(watches)
+
+            now: float = time.monotonic()
+            for watch, state in zip(watches, states):
+                self._apply(watch, state, now)
+
+            with self._changed:
+                self._changed.notify_all()
+                if self._watches and not self._closed:
+                    self._changed.wait(self.poll_interval)
+
+    def _apply(self, watch: _Watch, state: str | None, now: float) -> None:
+        if state == "delivered":
+            metrics().observe("delivery", now - watch.started)
+            metrics().count("delivered")
+            self._resolve(watch, DELIVERED_STATUS)
+        elif state == "sent" and watch.state is None:
+            watch.state = state
+            watch.on_status(SENT_STATUS)
+            if self._draining:
+                self._resolve(watch, None)
+        elif now >= watch.deadline or (self._draining and watch.state == "sent"):
+            if watch.state is None:
+                metrics().count("unconfirmed")
+            self._resolve(watch, None if watch.state == "sent" else UNCONFIRMED_STATUS)
+
+    def _resolve(self, watch: _Watch, status: str | None) -> None:
+        with self._changed:
+            if watch not in self._watches:
+                return
+            self._watches.remove(watch)
+        if status is not None:
+            watch.on_status(status)
+
+    def drain(self) -> None:
+        """
+        Waits until every watched message has its first tick or has timed out.
+
+        Messages that are already sent stop waiting for the second tick and
+        keep the 'Sent' status.
+        """
+        with self._changed:
+            self._draining = True
+            self._changed.notify_all()
+            try:
+                while self._watches and self._thread is not None and not self._closed:
+                    self._changed.wait()
+            finally:
+                self._draining = False
+
+    def close(self) -> None:
+        """
+        Stops the watcher; messages without a tick yet are reported as unconfirmed.
+        """
+        with self._changed:
+            leftover: list[_Watch] = list(self._watches)
+            self._watches.clear()
+            self._closed = True
+            thread, self._thread = self._thread, None
+            self._changed.notify_all()
+        for watch in leftover:
+            if watch.state is None:
+                metrics().count("unconfirmed")
+                watch.on_status(UNCONFIRMED_STATUS)
+        if thread is not None:
+            thread.join()
+
+
+_watchers: "weakref.WeakKeyDictionary[WebDriver, DeliveryWatcher]" = weakref.WeakKeyDictionary()
+
+
+def watcher_for(driver: WebDriver) -> DeliveryWatcher:
+    """
+    Returns the delivery watcher of a driver, creating it on first use.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+
+    Returns:
+        DeliveryWatcher: The watcher.
+    """
+    watcher = _watchers.get(driver)
+    if watcher is None:
+        watcher = _watchers[driver] = DeliveryWatcher(driver)
+    return watcher
+
+
+def close_watchers() -> None:
+    """
+    Closes the watchers of all drivers, see `DeliveryWatcher.close`.
+    """
+    for watcher in list(_watchers.values()):
+        watcher.close()
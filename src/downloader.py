@@ -0,0 +1,314 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any
+from urllib.parse import urlparse
+
+# Kept in the working directory, next to the Chrome profiles
+DOWNLOAD_CACHE_DIR: str = "download_cache"
+
+# Chunk sizes adapt between these bounds so each read takes about TARGET_READ_SECONDS
+MIN_CHUNK: int = 64 * 1024
+MAX_CHUNK: int = 4 * 1024 * 1024
+TARGET_READ_SECONDS: float = 0.25
+
+
+class DownloadError(Exception):
+    """
+    Raised when a download cannot be completed or does not match its digest.
+    """
+
+
+def file_digest(path: str) -> str:
+    """
+    Returns:
+        str: The SHA-256 of a file, as hex.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(MAX_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Downloader:
+    """
+    Resumable downloads into a content-addressed cache.
+
+    Finished files are stored as `objects/<sha256><ext>`, so a file that is
+    already cached is never downloaded again, and the URL it came from is
+    remembered in `index.json` with the server's validators. A URL without a
+    known digest may change, so its cached copy is only reused after a
+    conditional request answers 304 Not Modified. A download in progress is kept as a partial
+    file next to a small state file with the server's validators. After a
+    dropped connection it is resumed with an HTTP Range request. `If-Range`
+    ensures the server sends the whole file again if it changed in between.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        session: Any = None,
+        attempts: int = 5,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+        progress: bool = True,
+    ) -> None:
+        """
+        Args:
+            cache_dir (str, optional): The cache directory. Defaults to download_cache in the
+                working directory.
+            session (requests.Session, optional): The HTTP session to use. Defaults to a new one.
+            attempts (int, optional): Consecutive attempts without progress before giving up.
+                Defaults to 5.
+            backoff (float, optional): Seconds before the first retry, doubled after each. Defaults to 1.
+            timeout (float, optional): Connect and read timeout in seconds. Defaults to 30.
+            progress (bool, optional): Show a progress bar. Defaults to True.
+        """
+        if session is None:
+            import requests
+
+            session = requests.Session()
+        self.cache_dir: str = cache_dir or os.path.join(os.getcwd(), DOWNLOAD_CACHE_DIR)
+        self.session = session
+        self.attempts: int = attempts
+        self.backoff: float = backoff
+        self.timeout: float = timeout
+        self.progress: bool = progress
+        self.resumes: int = 0
+        os.makedirs(os.path.join(self.cache_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.cache_dir, "partial"), exist_ok=True)
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _read_index(self) -> dict[str, dict]:
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Older caches stored only the digest
+        return {
+            url: entry if isinstance(entry, dict) else {"sha256": entry}
+            for url, entry in index.items()
+        }
+
+    def _remember(self, url: str, digest: str, validators: dict) -> None:
+        index = self._read_index()
+        index[url] = {
+            "sha256": digest,
+            "etag": validators.get("etag"),
+            "last_modified": validators.get("last_modified"),
+        }
+        tmp_path: str = f"{self._index_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self._index_path())
+
+    def object_path(self, digest: str, url: str) -> str:
+        """
+        Returns:
+            str: Where the content with a digest is cached, keeping the URL's extension
+                so installers can still be run.
+        """
+        ext: str = os.path.splitext(urlparse(url).path)[1]
+        return os.path.join(self.cache_dir, "objects", f"{digest.lower()}{ext}")
+
+    def cached(self, url: str, expected_sha256: str | None = None) -> str | None:
+        """
+        Returns the cached file for a digest, or for a URL downloaded before.
+
+        The copy of a URL without a digest may be outdated; `fetch` revalidates it.
+
+        Args:
+            url (str): The download URL.
+            expected_sha256 (str, optional): The known digest of the content.
+
+        Returns:
+            str | None: The cached file, or None if it must be downloaded.
+        """
+        digest: str | None = expected_sha256 or self._read_index().get(url, {}).get("sha256")
+        if digest is None:
+            return None
+        path: str = self.object_path(digest, url)
+        return path if os.path.exists(path) else None
+
+    def fetch(self, url: str, expected_sha256: str | None = None) -> str:
+        """
+        Returns a local copy of a URL, downloading or resuming it as needed.
+
+        Without a digest, a copy downloaded before is reused only while the
+        server reports it unchanged for its stored ETag or Last-Modified.
+
+        Args:
+            url (str): The download URL.
+            expected_sha256 (str, optional): The known digest; a download that does not
+                match it is discarded.
+
+        Raises:
+            DownloadError: If the download fails after all attempts or the digest does not match.
+
+        Returns:
+            str: The path of the verified file in the cache.
+        """
+        path = self.cached(url, expected_sha256)
+        if path is not None and expected_sha256 is not None:
+            return path
+        conditional: dict[str, str] = {}
+        if path is not None:
+            entry: dict = self._read_index()[url]
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
+
+        partial: str = os.path.join(
+            self.cache_dir, "partial", hashlib.sha256(url.encode()).hexdigest()
+        )
+        failures: int = 0
+        delay: float = self.backoff
+        while True:
+            before: int = self._size(partial)
+            try:
+                if self._download(url, partial, conditional):
+                    # Not modified since the cached copy was downloaded
+                    return path
+                break
+            except DownloadError:
+                raise
+            except Exception as e:
+                # Only attempts that made no progress count towards the limit
+                if self._size(partial) > before:
+                    failures, delay = 0, self.backoff
+                else:
+                    failures += 1
+                if failures >= self.attempts:
+                    raise DownloadError(
+                        f"Download of {url} failed after {failures} attempts without progress: {e}"
+                    ) from e
+                self.resumes += 1
+                time.sleep(delay)
+                delay *= 2
+
+        digest: str = file_digest(partial)
+        if expected_sha256 is not None and digest != expected_sha256.lower():
+            self._discard(partial)
+            raise DownloadError(
+                f"Digest mismatch for {url}: expected {expected_sha256.lower()}, got {digest}."
+            )
+
+        validators: dict = self._state(partial)
+        path = self.object_path(digest, url)
+        os.replace(partial, path)
+        self._discard(partial)
+        self._remember(url, digest, validators)
+        return path
+
+    @staticmethod
+    def _size(path: str) -> int:
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    @staticmethod
+    def _state(partial: str) -> dict:
+        try:
+            with open(f"{partial}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _discard(partial: str) -> None:
+        for name in (partial, f"{partial}.json"):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def _download(self, url: str, partial: str, conditional: dict[str, str]) -> bool:
+        state_path: str = f"{partial}.json"
+        offset: int = self._size(partial)
+        state: dict = self._state(partial) if offset else {}
+
+        headers: dict[str, str] = {}
+        validator: str | None = state.get("etag") or state.get("last_modified")
+        if offset and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        else:
+            offset = 0
+            headers.update(conditional)
+
+        with self.session.get(
+            url, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code == 304 and conditional and not offset:
+                return True
+            if response.status_code == 416 and offset:
+                # The partial file is already complete
+                return False
+            if 400 <= response.status_code < 500:
+                raise DownloadError(f"Download of {url} failed with HTTP {response.status_code}.")
+            response.raise_for_status()
+            if response.status_code != 206:
+                offset = 0
+
+            length: int = int(response.headers.get("content-length", 0))
+            total: int = offset + length if length else 0
+            with open(state_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "etag": response.headers.get("etag"),
+                        "last_modified": response.headers.get("last-modified"),
+                        "total": total,
+                    },
+                    f,
+                )
+
+            bar = None
+            if self.progress:
+                from tqdm import tqdm
+
+                bar = tqdm(
+                    total=total or None,
+                    initial=offset,
+                    unit="iB",
+                    unit_scale=True,
+                    ncols=80,
+                    desc="Downloading",
+                )
+            try:
+                received: int = self._stream(response, partial, offset, bar)
+            finally:
+                if bar is not None:
+                    bar.close()
+
+        if total and offset + received != total:
+            raise ConnectionError(f"Connection closed after {offset + received} of {total} bytes.")
+        return False
+
+    @staticmethod
+    def _stream(response: Any, partial: str, offset: int, bar: Any) -> int:
+        chunk: int = MIN_CHUNK
+        received: int = 0
+        with open(partial, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            while True:
+                started: float = time.monotonic()
+                data: bytes = response.raw.read(chunk, decode_content=True)
+                if not data:
+                    break
+                f.write(data)
+                received += len(data)
+                if bar is not None:
+                    bar.update(len(data))
+
+                # Grow the chunk on a fast link, shrink it on a slow one
+                elapsed: float = time.monotonic() - started
+                if elapsed < TARGET_READ_SECONDS / 2:
+                    chunk = min(chunk * 2, MAX_CHUNK)
+                elif elapsed > TARGET_READ_SECONDS * 2:
+                    chunk = max(chunk // 2, MIN_CHUNK)
+            f.flush()
+            os.fsync(f.fileno())
+        return received
@@ -0,0 +1,301 @@
+import json
+import os
+from datetime import datetime
+from typing import Iterable
+
+import pandas as pd
+from colorama import Fore
+
+from loader import write_recipients
+from phone import default_rules
+
+# Status written before the final keystroke; a record left in this state by a
+# crash means the message may or may not have gone out.
+IN_FLIGHT_STATUS: str = "Sending"
+UNCONFIRMED_STATUS: str = "Unconfirmed"
+
+_journals: dict[str, "SendJournal"] = {}
+
+
+def journal_path_for(file_path: str) -> str:
+    """
+    Returns the path of the send journal that belongs to a workbook.
+
+    Args:
+        file_path (str): The path to the recipient workbook.
+
+    Returns:
+        str: The journal path, stored next to the workbook.
+    """
+    return f"{file_path}.journal"
+
+
+def open_journal(file_path: str, checkpoint_every: int = 50) -> "SendJournal":
+    """
+    Returns the shared send journal for a workbook, creating it on first use.
+
+    A SQLite recipient store records statuses itself, so for a database path
+    the store is returned; it offers the same interface.
+
+    Args:
+        file_path (str): The path to the recipient workbook or database.
+        checkpoint_every (int, optional): Records between compactions. Defaults to 50.
+
+    Returns:
+        SendJournal: The journal bound to the workbook, or the RecipientStore.
+    """
+    # Imported here because the store module builds on this one
+    from store import is_store_path, open_store
+
+    if is_store_path(file_path):
+        return open_store(file_path)
+
+    key: str = os.path.abspath(file_path)
+    if key not in _journals:
+        _journals[key] = SendJournal(journal_path_for(file_path), checkpoint_every)
+    return _journals[key]
+
+
+def save_workbook(df: pd.DataFrame, file_path: str) -> None:
+    """
+    Writes the DataFrame to the workbook (or CSV/Parquet file) atomically.
+
+    The data is written to a temporary file first and then moved over the
+    original, so a crash during the save never leaves a truncated workbook.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to save.
+        file_path (str): The path to the workbook.
+    """
+    base, ext = os.path.splitext(file_path)
+    tmp_path: str = f"{base}.tmp{ext}"
+    write_recipients(df, tmp_path)
+    os.replace(tmp_path, file_path)
+
+
+class SendJournal:
+    """
+    Append-only log of send outcomes for a recipient workbook.
+
+    Every status change is appended as one JSON line of (number, status,
+    timestamp, and the positions of the rows it applies to) and fsynced,
+    which is cheap regardless of the table size. The workbook itself is only
+    rewritten by `compact`, at checkpoints or on exit.
+    """
+
+    def __init__(self, path: str, checkpoint_every: int = 50) -> None:
+        """
+        Args:
+            path (str): The path to the journal file.
+            checkpoint_every (int, optional): Records between compactions. Defaults to 50.
+        """
+        self.path: str = path
+        self.checkpoint_every: int = checkpoint_every
+        self.pending: int = len(self.records())
+        # Set while compaction waits for a reload, so the warning is shown once
+        self._deferred: bool = False
+
+    def append(
+        self,
+        number: str,
+        status: str,
+        timestamp: datetime | None = None,
+        attempts: int | None = None,
+        rows: list[int] | None = None,
+    ) -> None:
+        """
+        Appends a status record and forces it to disk.
+
+        Args:
+            number (str): The recipient's WhatsApp number.
+            status (str): The new status of the recipient's rows.
+            timestamp (datetime, optional): When the change happened. Defaults to now.
+            attempts (int, optional): The send attempts made for the rows so far, if they changed.
+            rows (list[int], optional): The positions of the rows the status applies to.
+                Defaults to every row of the number.
+        """
+        record: dict = {
+            "number": str(number),
+            "status": status,
+            "timestamp": (timestamp or datetime.now()).isoformat(timespec="seconds"),
+        }
+        if attempts is not None:
+            record["attempts"] = int(attempts)
+        if rows is not None:
+            record["rows"] = [int(row) for row in rows]
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+
+    def records(self) -> list[dict]:
+        """
+        Reads all complete records from the journal.
+
+        A trailing line cut short by a crash is ignored.
+
+        Returns:
+            list[dict]: The records in the order they were written.
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        records: list[dict] = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict) and {"number", "status", "timestamp"} <= record.keys():
+                    records.append(record)
+        return records
+
+    def _targets(self, df: pd.DataFrame) -> list[tuple[dict, list[int]]]:
+        records = self.records()
+        if not records:
+            return []
+
+        keys = default_rules().keys(df["whatsapp_number"]).to_numpy()
+        by_key: dict[str, list[int]] = {}
+        for position, key in enumerate(keys):
+            by_key.setdefault(key, []).append(position)
+
+        targets: list[tuple[dict, list[int]]] = []
+        for record in records:
+            # Records written before numbers were normalized hold the raw number
+            number: str = default_rules().key(record["number"])
+            positions: list[int]
+            if "rows" in record:
+                found = df.index.get_indexer(record["rows"])
+                found = found[found >= 0]
+                positions = [int(position) for position in found if keys[position] == number]
+                if len(found) and not positions:
+                    positions = by_key.get(number, [])
+            else:
+                positions = by_key.get(number, [])
+            if positions:
+                targets.append((record, positions))
+        return targets
+
+    def touched(self, df: pd.DataFrame) -> list[int]:
+        """
+        Returns the rows that `replay` would update.
+
+        Args:
+            df (pd.DataFrame): The DataFrame loaded from the workbook.
+
+        Returns:
+            list[int]: Their positions in `df`.
+        """
+        return sorted({position for _, positions in self._targets(df) for position in positions})
+
+    def replay(self, df: pd.DataFrame, skip: Iterable[int] = ()) -> int:
+        """
+        Applies the journaled statuses to a freshly loaded DataFrame.
+
+        A record is applied to the rows it names, by their index labels, which
+        are the table positions also when `df` holds only some of the rows.
+        A named row that now holds another number means the file was
+        reordered; if none of them still match, the record falls back to
+        every row of its number. Records written without rows apply to every
+        row of the number. A status still in flight is replayed as
+        unconfirmed, so it is neither lost nor sent a second time.
+
+        Args:
+            df (pd.DataFrame): The DataFrame loaded from the workbook.
+            skip (Iterable[int], optional): Index labels of rows to leave as they are,
+                e.g. rows whose status was edited in the file. Defaults to none.
+
+        Returns:
+            int: The number of rows updated.
+        """
+        targets = self._targets(df)
+        if not targets:
+            return 0
+        skipped: set[int] = set(df.index.get_indexer(list(skip)).tolist()) - {-1}
+
+        if "timestep" not in df.columns:
+            df["timestep"] = None
+        df["status"] = df["status"].astype(object)
+        df["timestep"] = df["timestep"].astype(object)
+        status_column = df.columns.get_loc("status")
+        timestep_column = df.columns.get_loc("timestep")
+        attempts_column: int | None = None
+
+        updated: set[int] = set()
+        for record, positions in targets:
+            positions = [position for position in positions if position not in skipped]
+            if not positions:
+                continue
+
+            status: str = record["status"]
+            if status == IN_FLIGHT_STATUS:
+                status = UNCONFIRMED_STATUS
+            stamp = datetime.fromisoformat(record["timestamp"]).date()
+            for position in positions:
+                df.iat[position, status_column] = status
+                df.iat[position, timestep_column] = stamp
+            if "attempts" in record:
+                if attempts_column is None:
+                    if "attempts" not in df.columns:
+                        df["attempts"] = 0
+                    df["attempts"] = df["attempts"].astype(object)
+                    attempts_column = df.columns.get_loc("attempts")
+                for position in positions:
+                    df.iat[position, attempts_column] = int(record["attempts"])
+            updated.update(positions)
+        return len(updated)
+
+    def should_checkpoint(self) -> bool:
+        """
+        Returns:
+            bool: True if enough records have accumulated to compact.
+        """
+        return self.pending >= self.checkpoint_every
+
+    def compact(self, df: pd.DataFrame, file_path: str) -> bool:
+        """
+        Writes the DataFrame back to the workbook and truncates the journal.
+
+        The journal is only truncated after the workbook has been replaced, so
+        a crash in between simply replays records that are already applied.
+
+        If the file was edited since it was loaded, the edits are merged into
+        `df` first through the file's `reloader.WorkbookReloader`, so they are
+        not overwritten. Edits that add, remove or reorder rows cannot be
+        merged in place; the workbook is then left alone and the statuses stay
+        in the journal until the table is reloaded.
+
+        Args:
+            df (pd.DataFrame): The DataFrame with the current statuses; edited rows
+                are updated in place.
+            file_path (str): The path to the workbook.
+
+        Returns:
+            bool: False if the workbook was not written because of such edits.
+        """
+        # Imported here because the reloader builds on this module
+        from reloader import reloader_for
+
+        if self.pending == 0 and not os.path.exists(self.path):
+            return True
+        reloader = reloader_for(file_path)
+        if reloader is not None and not reloader.merge(df):
+            if not self._deferred:
+                print(
+                    f"{Fore.YELLOW}'{file_path}' was edited and its rows changed; statuses are kept "
+                    f"in the send journal and written after the file is reloaded."
+                )
+                self._deferred = True
+            return False
+        save_workbook(df, file_path)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.pending = 0
+        self._deferred = False
+        if reloader is not None:
+            # Our own write is not an edit to merge next time
+            reloader.saved(df)
+        return True
@@ -0,0 +1,203 @@
+import os
+import re
+from typing import Iterable
+
+import pandas as pd
+
+from planner import parse_dates, parse_expire_dates
+
+# Columns the sender works with, in sheet order
+RECIPIENT_COLUMNS: list[str] = [
+    "surname",
+    "name",
+    "whatsapp_number",
+    "expire_date",
+    "vehicle_license",
+    "model_vehicle",
+    "status",
+    "timestep",
+    "attempts",
+]
+
+# Declared types: text columns are kept as strings, never inferred as numbers
+STRING_COLUMNS: tuple[str, ...] = (
+    "surname",
+    "name",
+    "whatsapp_number",
+    "vehicle_license",
+    "model_vehicle",
+)
+CATEGORY_COLUMNS: tuple[str, ...] = ("status",)
+DATE_COLUMNS: tuple[str, ...] = ("expire_date", "timestep")
+INTEGER_COLUMNS: tuple[str, ...] = ("attempts",)
+
+SUPPORTED_FORMATS: tuple[str, ...] = (".xlsx", ".csv", ".parquet")
+
+
+def _format_of(file_path: str) -> str:
+    ext: str = os.path.splitext(file_path)[1].lower()
+    if ext not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported recipient file '{file_path}', expected one of {SUPPORTED_FORMATS}.")
+    return ext
+
+
+def _number_to_text(value) -> str | None:
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    # Numbers that went through a float column elsewhere come back as "3517885067.0"
+    return re.sub(r"^(\d+)\.0$", r"\1", str(value).strip())
+
+
+def _read_xlsx(file_path: str, sheet_name: str, columns: list[str] | None) -> pd.DataFrame:
+    """
+    Streams a worksheet row by row in read-only mode.
+
+    Only the values of the projected columns are kept, so openpyxl never
+    builds the cell objects of the whole sheet.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name in workbook.sheetnames else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header: list[str] = [str(cell) if cell is not None else "" for cell in next(rows, ())]
+        wanted: list[tuple[int, str]] = [
+            (position, name)
+            for position, name in enumerate(header)
+            if name and (columns is None or name in columns)
+        ]
+        data: dict[str, list] = {name: [] for _, name in wanted}
+        for row in rows:
+            if not any(cell is not None for cell in row):
+                continue
+            for position, name in wanted:
+                data[name].append(row[position] if position < len(row) else None)
+    finally:
+        workbook.close()
+    return pd.DataFrame(data)
+
+
+def _read_csv(file_path: str, columns: list[str] | None) -> pd.DataFrame:
+    return pd.read_csv(
+        file_path,
+        usecols=(lambda name: name in columns) if columns is not None else None,
+        dtype={name: "string" for name in STRING_COLUMNS + CATEGORY_COLUMNS},
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+
+def _read_parquet(file_path: str, columns: list[str] | None) -> pd.DataFrame:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files requires the 'pyarrow' package.") from e
+
+    available: list[str] = pq.ParquetFile(file_path).schema_arrow.names
+    return pd.read_parquet(
+        file_path,
+        columns=[name for name in available if columns is None or name in columns],
+    )
+
+
+def apply_declared_types(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the recipient columns to their declared types in place.
+
+    Numbers become digit strings ("3517885067.0" is read as "3517885067"),
+    status becomes a categorical with missing values as "", counts are
+    integers with missing values as 0, and dates are parsed. A date cell
+    that cannot be parsed keeps its original value, so it is not lost when
+    the file is saved again.
+
+    Args:
+        df (pd.DataFrame): The freshly read table.
+
+    Returns:
+        pd.DataFrame: The same table.
+    """
+    for name in STRING_COLUMNS:
+        if name in df.columns:
+            if name == "whatsapp_number":
+                df[name] = df[name].astype(object).map(_number_to_text)
+            df[name] = df[name].astype(object).where(df[name].notna(), None)
+    for name in CATEGORY_COLUMNS:
+        if name in df.columns:
+            df[name] = df[name].astype(object).where(df[name].notna(), "").astype(str).astype("category")
+    for name in DATE_COLUMNS:
+        if name in df.columns:
+            parsed = (parse_expire_dates if name == "expire_date" else parse_dates)(df[name])
+            unparsed = parsed.isna() & df[name].notna()
+            df[name] = df[name].astype(object).where(unparsed, parsed) if unparsed.any() else parsed
+    for name in INTEGER_COLUMNS:
+        if name in df.columns:
+            df[name] = pd.to_numeric(df[name], errors="coerce").fillna(0).astype(int)
+    return df
+
+
+def read_recipients(
+    file_path: str,
+    sheet_name: str = "Sheet1",
+    columns: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Reads a recipient table from an Excel, CSV or Parquet file with declared types.
+
+    Args:
+        file_path (str): The path to the file; the format follows the extension.
+        sheet_name (str, optional): The sheet to read from a workbook. Defaults to 'Sheet1',
+            falling back to the active sheet.
+        columns (Iterable[str], optional): Only read these columns. Defaults to all columns.
+            Saving a projected table back would drop the other columns.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the format is not supported.
+        ImportError: If a Parquet file is read without pyarrow installed.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    ext: str = _format_of(file_path)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+
+    projected: list[str] | None = list(columns) if columns is not None else None
+    if ext == ".xlsx":
+        df = _read_xlsx(file_path, sheet_name, projected)
+    elif ext == ".csv":
+        df = _read_csv(file_path, projected)
+    else:
+        df = _read_parquet(file_path, projected)
+    return apply_declared_types(df)
+
+
+def write_recipients(df: pd.DataFrame, file_path: str) -> None:
+    """
+    Writes a recipient table in the format given by the file extension.
+
+    Args:
+        df (pd.DataFrame): The table.
+        file_path (str): The destination path.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    ext: str = _format_of(file_path)
+    if ext == ".xlsx":
+        df.to_excel(file_path, index=False)
+    elif ext == ".csv":
+        df.to_csv(file_path, index=False)
+    else:
+        # Parquet columns need a single type; mixed cells (e.g. an unparsed
+        # date next to real dates) are stored as text
+        df = df.copy()
+        for name in df.columns:
+            if name in CATEGORY_COLUMNS:
+                df[name] = df[name].astype(object).where(df[name].notna(), "").astype(str)
+            elif df[name].dtype == object and df[name].dropna().map(type).nunique() > 1:
+                df[name] = df[name].map(lambda value: None if pd.isna(value) else str(value))
+        df.to_parquet(file_path, index=False)
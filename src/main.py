@@ -1,52 +1,97 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import os
 import platform
-import re
 import subprocess
 import sys
-import pandas as pd
-from datetime import datetime, timedelta
-import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import chromedriver_autoinstaller
+import threading
 import time
-import os
+from datetime import datetime
+from typing import TYPE_CHECKING
+
 from colorama import init, Fore
-from tqdm import tqdm
-from selenium.webdriver.remote.webdriver import WebDriver
+
+from browser_profile import BROWSER_PROFILES, apply_profile, block_media
+from compose import COMPOSE_MODES
+from metrics import enable_metrics, metrics
+from provisioning import ProvisioningCache, add_to_path, chrome_path
+from retry import (
+    BREAKER_THRESHOLD,
+    MAX_ATTEMPTS,
+    PERMANENT,
+    RETRY_STATUS,
+    SESSION,
+    TRANSIENT,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    send_with_retry,
+)
+from sender_pool import MAX_SESSIONS, SenderPool, profile_dir_for
+from timing import PhaseTimer
+
+# pandas and selenium take most of the import time; they are imported where
+# they are first needed, so the browser is only loaded when sending
+if TYPE_CHECKING:
+    import pandas as pd
+    from selenium.webdriver import ChromeOptions
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+    from planner import SendPlan
+    from recipient_index import RecipientIndex
+
+# Taken once the light imports above are done; pandas and selenium are timed
+# as phases of their own where they are imported
+STARTED: float = time.perf_counter()
 
 # Initialize colorama
 init(autoreset=True)
 
-# Dynamically generate template and message
-template: str = (
-    "_¡Hola {name}!_\n\n"
-    "_*Recordatorio Importante*_\n\n"
-    "_Queremos recordarte que tu seguro para el vehículo {model_vehicle} con patente {vehicle_license} vence el {expire_date:%d/%m/%Y}._\n\n"
-    "_Desde ya, muchas gracias por confiar en nosotros._\n\n"
-    "_No olvides que puedes pagar de manera sencilla y segura *por este medio.*_\n\n"
-    "_Si ya realizaste el pago, *ignora este mensaje*._\n"
-    "_Para dejar de recibir estos recordatorios, simplemente envíanos un mensaje con la palabra *cancelar*._"
-)
+# Lower-cased statuses of rows that must not be sent again
+PROCESSED_STATUSES: list[str] = ["correct", "error", "unconfirmed", "sending", "sent", "delivered"]
 
+# Login checks while waiting for the QR code to be scanned, about 10 seconds
+# apart (a 5 second wait and a 5 second pause)
+LOGIN_ATTEMPTS: int = 24
 
-def setup_chromedriver() -> None:
+# Serializes status writes from parallel sender sessions
+_status_lock = threading.Lock()
+
+
+def setup_chromedriver(installer_sha256: str | None = None) -> None:
     """
     Sets up the Chromedriver by downloading and installing Chrome if necessary,
     and then installing the Chromedriver.
 
+    The verified setup is cached; while Chrome and the Chromedriver are
+    unchanged on disk the installation and version probes are skipped.
+
+    Args:
+        installer_sha256 (str, optional): The known SHA-256 of the Chrome installer.
+
     Raises:
         Exception: If there is an error setting up Chromedriver.
 
     Returns:
         None
     """
+    cache = ProvisioningCache()
+    driver_path = cache.lookup()
+    if driver_path is not None:
+        add_to_path(driver_path)
+        print(f"{Fore.GREEN}Chromedriver is up to date.")
+        return
+
     try:
-        download_and_install_chrome()
-        chromedriver_autoinstaller.install()
+        import chromedriver_autoinstaller
+
+        download_and_install_chrome(installer_sha256)
+        driver_path = chromedriver_autoinstaller.install()
+        chrome = chrome_path()
+        if driver_path and chrome:
+            cache.record(chrome, chromedriver_autoinstaller.get_chrome_version(), driver_path)
         print(f"{Fore.GREEN}Chromedriver is up to date.")
     except Exception as e:
         print(f"{Fore.RED}Error setting up Chromedriver: {str(e)}")
@@ -60,78 +105,47 @@ def is_chrome_installed() -> bool:
     Returns:
         bool: True if Chrome is installed, False otherwise.
     """
-    system: str = platform.system()
-
-    if system == "Windows":
-        chrome_path: str = os.path.join(
-            os.getenv("PROGRAMFILES", "C:\\Program Files"),
-            "Google",
-            "Chrome",
-            "Application",
-            "chrome.exe",
-        )
-        return os.path.exists(chrome_path)
-    elif system == "Linux":
-        try:
-            result: subprocess.CompletedProcess = subprocess.run(
-                ["which", "google-chrome"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
-    else:
-        return False
+    return chrome_path() is not None
 
 
-def download_file_with_progress(url: str, dest_path: str) -> None:
+def download_installer(url: str, expected_sha256: str | None = None) -> str:
     """
-    Downloads a file from the given URL and saves it to the specified destination path.
+    Downloads an installer into the local download cache, resuming interrupted downloads.
 
     Args:
-        url (str): The URL of the file to download.
-        dest_path (str): The path where the downloaded file will be saved.
+        url (str): The URL of the installer.
+        expected_sha256 (str, optional): The known SHA-256 of the installer. Without it the
+            installer cannot be verified and a warning is printed.
 
     Raises:
-        Exception: If the downloading process fails.
-    """
-    response = requests.get(url, stream=True)
-    total_size: int = int(response.headers.get("content-length", 0))
-    block_size: int = 1024  # 1 KB
-    progress_bar: tqdm = tqdm(
-        total=total_size, unit="iB", unit_scale=True, ncols=80, desc="Downloading"
-    )
-
-    with open(dest_path, "wb") as file:
-        for data in response.iter_content(block_size):
-            progress_bar.update(len(data))
-            file.write(data)
-
-    progress_bar.close()
-    if total_size != 0 and progress_bar.n != total_size:
-        raise Exception("Error: Downloading failed.")
+        DownloadError: If the download fails or does not match the expected digest.
 
-
-def simulate_installation_progress(description: str, steps: int = 10) -> None:
+    Returns:
+        str: The path of the installer in the cache.
     """
-    Simulates the progress of an installation process.
+    from downloader import Downloader, file_digest
 
-    Args:
-        description (str): The description of the installation process.
-        steps (int, optional): The number of steps in the installation process. Defaults to 10.
-    """
-    progress_bar: tqdm = tqdm(total=steps, ncols=80, desc=description)
-    for _ in range(steps):
-        subprocess.run(["sleep", "1"], check=True)
-        progress_bar.update(1)
-    progress_bar.close()
+    installer_path: str = Downloader().fetch(url, expected_sha256)
+    if expected_sha256 is None:
+        print(
+            f"{Fore.YELLOW}No known digest for {url}; installer sha256 is "
+            f"{file_digest(installer_path)}. Pass --installer-sha256 to verify it."
+        )
+    else:
+        print(f"{Fore.GREEN}Installer verified against sha256 {expected_sha256.lower()}.")
+    return installer_path
 
 
-def download_and_install_chrome() -> None:
+def download_and_install_chrome(installer_sha256: str | None = None) -> None:
     """
     Downloads and installs Google Chrome based on the operating system.
 
+    The installer only runs once it is fully downloaded and, if a digest is
+    given, verified.
+
+    Args:
+        installer_sha256 (str, optional): The known SHA-256 of the installer.
+
     Raises:
         Exception: If the operating system is not supported.
 
@@ -150,13 +164,11 @@ def download_and_install_chrome() -> None:
             chrome_url: str = (
                 "https://dl.google.com/chrome/install/latest/chrome_installer.exe"
             )
-            installer_path: str = os.path.join(os.getcwd(), "chrome_installer.exe")
             print(Fore.CYAN + "Downloading Chrome installer for Windows...")
-            download_file_with_progress(chrome_url, installer_path)
+            installer_path: str = download_installer(chrome_url, installer_sha256)
 
             print(Fore.CYAN + "Installing Chrome on Windows...")
             subprocess.run([installer_path], check=True)
-            os.remove(installer_path)
             print(Fore.GREEN + "Chrome installed successfully on Windows.")
 
         elif system == "Linux":
@@ -169,18 +181,13 @@ def download_and_install_chrome() -> None:
                 chrome_url: str = (
                     "https://dl.google.com/linux/direct/google-chrome-stable_current_x86_64.rpm"
                 )
-                installer_path: str = os.path.join(
-                    os.getcwd(), "google-chrome-stable_current_x86_64.rpm"
-                )
                 print(Fore.CYAN + "Downloading Chrome installer for Fedora/Nobara...")
-                download_file_with_progress(chrome_url, installer_path)
+                installer_path: str = download_installer(chrome_url, installer_sha256)
 
                 print(Fore.CYAN + "Installing Chrome on Fedora/Nobara...")
-                simulate_installation_progress("Installing Chrome")
                 subprocess.run(
                     ["sudo", "dnf", "install", "-y", installer_path], check=True
                 )
-                os.remove(installer_path)
                 print(Fore.GREEN + "Chrome installed successfully on Fedora/Nobara.")
             else:
                 raise Exception(
@@ -194,38 +201,166 @@ def download_and_install_chrome() -> None:
         print(Fore.RED + f"Error: {str(e)}")
 
 
-def is_logged_in(driver: WebDriver) -> bool:
+def build_chrome_options(
+    user_data_dir: str, profile: str = "full", headless: bool = False
+) -> ChromeOptions:
+    """
+    Builds the Chrome options for a WhatsApp Web session.
+
+    Args:
+        user_data_dir (str): The Chrome profile directory that keeps the login.
+        profile (str, optional): 'full' (maximized window) or 'lean' (small fixed window,
+            no GPU, no media). Defaults to 'full'.
+        headless (bool, optional): Run without a window. Defaults to False.
+
+    Returns:
+        webdriver.ChromeOptions: The options.
+    """
+    from selenium import webdriver
+
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-plugins")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-infobars")
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--disable-popup-blocking")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    apply_profile(chrome_options, profile, headless)
+    return chrome_options
+
+
+def start_driver(
+    user_data_dir: str, profile: str = "full", headless: bool = False, persistent: bool = False
+) -> WebDriver:
+    """
+    Starts Chrome with the given profile and opens WhatsApp Web.
+
+    With the lean profile, image and media requests are blocked before the
+    page is loaded. A persistent browser is started once, detached from this
+    process, and later runs attach to it through its remote-debugging port;
+    a WhatsApp Web tab that is already open is kept as it is, so the chat
+    list does not have to sync again. If the recorded browser was closed or
+    crashed, a new one is started.
+
+    Args:
+        user_data_dir (str): The Chrome profile directory that keeps the login.
+        profile (str, optional): The browser profile, see `build_chrome_options`.
+            Defaults to 'full'.
+        headless (bool, optional): Run without a window. Defaults to False.
+        persistent (bool, optional): Attach to the profile's running browser, or
+            start one that outlives this process. Defaults to False.
+
+    Returns:
+        WebDriver: The running driver.
+    """
+    from selenium import webdriver
+
+    from session import WHATSAPP_URL
+
+    if not os.path.exists(user_data_dir):
+        os.makedirs(user_data_dir)
+
+    chrome_options = build_chrome_options(user_data_dir, profile, headless)
+    if not persistent:
+        driver = webdriver.Chrome(options=chrome_options)
+        if profile == "lean":
+            block_media(driver)
+        driver.get(WHATSAPP_URL)
+        return driver
+
+    from persistent_browser import attach_or_launch
+
+    address, reused = attach_or_launch(user_data_dir, chrome_options.arguments, WHATSAPP_URL)
+    attach_options = webdriver.ChromeOptions()
+    attach_options.debugger_address = address
+    driver = webdriver.Chrome(options=attach_options)
+    if profile == "lean":
+        block_media(driver)
+    if reused:
+        print(f"{Fore.CYAN}Attached to the running Chrome at {address}.")
+    else:
+        print(f"{Fore.CYAN}Started Chrome at {address}; it keeps running for the next run.")
+    for handle in driver.window_handles:
+        driver.switch_to.window(handle)
+        if driver.current_url.startswith(WHATSAPP_URL):
+            return driver
+    driver.get(WHATSAPP_URL)
+    return driver
+
+
+def is_logged_in(driver: WebDriver, max_attempts: int = LOGIN_ATTEMPTS) -> bool:
     """
     Checks if the WhatsApp session is logged in.
 
+    Each attempt waits up to 5 seconds for the chat list or the login QR
+    code. With more than one attempt, a QR code is given time to be scanned;
+    a single attempt is a quick probe that answers as soon as either shows.
+
     Args:
         driver (webdriver): The WebDriver instance.
+        max_attempts (int, optional): Attempts, about 10 seconds apart. Defaults to 24.
 
     Returns:
         bool: True if the session is logged in, False otherwise.
     """
-    max_attempts: int = 24  # 2 minutes (30 seconds x 24 attempts)
+    from selenium.common.exceptions import TimeoutException
+
+    from selector_registry import default_registry
+
     attempt: int = 1
 
     while attempt <= max_attempts:
         try:
-            WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]')
-                )
+            # The search box or the chat list only render once logged in
+            shown, _ = default_registry().wait_any(
+                driver, ["search_box", "chat_list", "login_qr"], 5
             )
-            return True
+            if shown != "login_qr":
+                return True
+            if max_attempts == 1:
+                return False
+            print(f"{Fore.YELLOW}Attempt {attempt}: WhatsApp Web is waiting for the QR code to be scanned...")
         except TimeoutException:
             print(
                 f"{Fore.YELLOW}Attempt {attempt}: Timeout - WhatsApp session not logged in yet. Retrying..."
             )
-            attempt += 1
+        attempt += 1
+        if attempt <= max_attempts:
             time.sleep(5)  # Wait for 5 seconds before retrying
 
     print(f"{Fore.RED}Max attempts reached. WhatsApp session not logged in.")
     return False
 
 
+def ensure_logged_in(driver: WebDriver, max_attempts: int = LOGIN_ATTEMPTS) -> bool:
+    """
+    Returns the cached login state of a session, polling only when it is unknown.
+
+    The state is cached after the first successful check and cleared when a
+    send fails with a session failure, so a healthy session skips
+    `is_logged_in` entirely.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+        max_attempts (int, optional): Attempts of `is_logged_in` if the state is
+            unknown. Defaults to 24; the send path probes once.
+
+    Returns:
+        bool: True if the session is logged in, False otherwise.
+    """
+    from session import session_for
+
+    session = session_for(driver)
+    if not session.logged_in:
+        session.logged_in = is_logged_in(driver, max_attempts)
+    return session.logged_in
+
+
 def clean_to_bmp(text: str) -> str:
     """
     Cleans the given text by removing any characters that are not within the BMP (Basic Multilingual Plane) range.
@@ -237,7 +372,69 @@ def clean_to_bmp(text: str) -> str:
         str: The cleaned text.
 
     """
-    return re.sub(r"[^\U00000000-\U0000FFFF]", "", text)
+    from templates import BMP_TABLE
+
+    return text.translate(BMP_TABLE)
+
+
+def render_message(
+    index: RecipientIndex,
+    recipient: str,
+    plan: SendPlan | None = None,
+    rows: list[int] | None = None,
+) -> str:
+    """
+    Renders the reminder message for a recipient.
+
+    Messages come from the shared template engine, which renders every due
+    row in one batch on first use and caches the result for the plan, so
+    preview and send reuse the same text. A number with several due rows
+    gets one message that lists all of them.
+
+    Args:
+        index (RecipientIndex): The index over the recipient table.
+        recipient (str): The recipient's WhatsApp number.
+        plan (SendPlan, optional): The send plan that picks the template and provides
+            the parsed expire dates. Defaults to planning the whole table for today.
+        rows (list[int], optional): The rows the message is for. Defaults to the
+            recipient's due rows.
+
+    Raises:
+        KeyError: If the recipient or a template field is missing.
+
+    Returns:
+        str: The message, cleaned to BMP characters only.
+    """
+    from planner import SendPlan
+    from templates import default_engine
+
+    if plan is None:
+        plan = SendPlan(index.df)
+    if rows:
+        return default_engine().message_for(index.df, plan, rows)
+    rows = index.rows(recipient)
+    due = [position for position in rows if plan.due.iat[position]]
+    return default_engine().message_for(index.df, plan, due or rows[:1])
+
+
+def target_rows(index: RecipientIndex, recipient: str, plan: SendPlan | None = None) -> list[int]:
+    """
+    Returns the rows a message to a number is for.
+
+    Args:
+        index (RecipientIndex): The index over the recipient table.
+        recipient (str): The recipient's WhatsApp number.
+        plan (SendPlan, optional): The send plan for today.
+
+    Returns:
+        list[int]: The number's rows that are due and not processed for their send
+            date; every row of the number if there is no plan or none is pending.
+    """
+    rows = index.rows(recipient)
+    if plan is None:
+        return rows
+    pending = plan.pending_at(rows, PROCESSED_STATUSES)
+    return [row for row, due in zip(rows, pending) if due] or rows
 
 
 def send_whatsapp_message(
@@ -246,139 +443,560 @@ def send_whatsapp_message(
     df: pd.DataFrame,
     file_path: str,
     chat_type: str = "contact",
-) -> None:
+    index: RecipientIndex | None = None,
+    plan: SendPlan | None = None,
+    compose_mode: str = "inject",
+    confirm_timeout: float = 30.0,
+    max_attempts: int = MAX_ATTEMPTS,
+    rows: list[int] | None = None,
+) -> str | None:
     """
     Sends a WhatsApp message to the specified recipient using the provided driver and DataFrame.
 
+    The message is rendered before its chat is opened, and after it is
+    submitted its delivery ticks are confirmed in the background, so the
+    next message does not wait for them. The row's status is 'Sending' until
+    the watcher reports 'Sent', 'Delivered' or 'Unconfirmed'.
+
     Args:
         driver (WebDriver): The WebDriver instance for controlling the browser.
         recipient (str): The recipient's WhatsApp number or group name.
         df (pd.DataFrame): The DataFrame containing the message data.
         file_path (str): The file path to save the updated DataFrame.
         chat_type (str, optional): The type of chat to send the message to. Defaults to 'contact'.
-
-    Raises:
-        NoSuchElementException: If an element is not found on the page.
+        index (RecipientIndex, optional): The index over `df`, built once at load time.
+            Defaults to building a new one, which costs a full pass over the table.
+        plan (SendPlan, optional): The send plan used to render the expire date.
+        compose_mode (str, optional): How the message is entered, 'inject' (one paste,
+            falling back to typing) or 'keys' (typed line by line). Defaults to 'inject'.
+        confirm_timeout (float, optional): Seconds to wait for the first tick before the
+            message counts as unconfirmed. 0 skips the confirmation and records 'Correct'
+            on submit. Defaults to 30.
+        max_attempts (int, optional): Attempts per row before a transient failure is
+            recorded as 'Error'. Defaults to 3.
+        rows (list[int], optional): The rows the message is for; only their status is
+            written. Defaults to `target_rows`.
 
     Returns:
-        None
+        str | None: The failure class (see `retry.classify`) if the attempt failed;
+            None if the message was sent or skipped.
     """
-    try:
-        if not is_logged_in(driver):
-            print(f"{Fore.RED}WhatsApp session not logged in. Please log in and retry.")
-            return
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    from compose import compose_message
+    from delivery import last_outgoing, watcher_for
+    from journal import IN_FLIGHT_STATUS, open_journal
+    from phone import default_rules
+    from recipient_index import RecipientIndex
+    from retry import classify
+    from selector_registry import default_registry
+    from session import WHATSAPP_URL, open_chat, session_for, wait_for_chat
+
+    if index is None:
+        index = RecipientIndex(df)
+    session = session_for(driver)
+    spans = metrics()
 
-        # Check if message has already been sent or has an error
-        current_status = df.loc[df["whatsapp_number"] == recipient, "status"].iloc[0]
-        if current_status.lower() == "send" or current_status.lower() == "error":
+    try:
+        if rows is None:
+            rows = target_rows(index, recipient, plan)
+        # Check if message has already been sent or has an error; with a plan,
+        # a status recorded for an earlier send date does not count
+        current_status = index.get(recipient, "status", rows)
+        if plan is not None:
+            processed = not plan.pending_at(rows, PROCESSED_STATUSES).any()
+            if not processed and attempts_of(index, recipient, rows) and plan.stale(rows).all():
+                # Attempts of an earlier reminder do not count against this one
+                index.set(recipient, "attempts", 0, rows)
+        else:
+            processed = current_status.lower() in PROCESSED_STATUSES
+        if processed:
             print(
                 f"{Fore.YELLOW}Message for {recipient} already processed with status: {current_status}"
             )
-            return
+            spans.count("skipped")
+            return None
+
+        if chat_type != "group":
+            # A number that cannot be normalized fails here, before any browser time is spent
+            _, reason = default_rules().normalize(recipient)
+            if reason:
+                print(f"{Fore.RED}Not sending to {recipient}: invalid phone number ({reason}).")
+                spans.count("rejected")
+                with spans.span("persist", recipient):
+                    record_failure(index, recipient, PERMANENT, file_path, max_attempts, rows)
+                return PERMANENT
+
+        with spans.span("login_check", recipient):
+            # One quick probe; waiting for a QR scan here would stall every row
+            logged_in = ensure_logged_in(driver, max_attempts=1)
+        if not logged_in:
+            print(f"{Fore.RED}WhatsApp session not logged in. Please log in and retry.")
+            spans.count("skipped")
+            return SESSION
+
+        expected = (
+            [recipient] if chat_type == "group" else [recipient, index.get(recipient, "name", rows)]
+        )
 
-        # Open WhatsApp Web if not already open
-        if driver.current_url != "https://web.whatsapp.com/":
-            driver.get("https://web.whatsapp.com/")
+        # Rendered before the chat is opened, while the watcher may still be
+        # checking the previous message
+        with spans.span("render", recipient):
+            clean_message = render_message(index, recipient, plan, rows)
 
-        # Wait for WhatsApp Web to load
         wait = WebDriverWait(driver, 30)
-        wait.until(
-            EC.presence_of_element_located(
-                (By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]')
-            )
-        )
+        started = time.monotonic()
 
         # Select recipient (group or contact)
-        if chat_type == "group":
-            group = wait.until(
-                EC.element_to_be_clickable((By.XPATH, f"//span[@title='{recipient}']"))
-            )
-            group.click()
-        else:  # Assume 'contact' as default
-            chat_input = wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]')
-                )
-            )
-            chat_input.clear()
-            chat_input.send_keys(recipient)
-            chat_input.send_keys(Keys.ENTER)
-
-        # Wait for chat to load
-        time.sleep(3)  # Adjust time as needed
-
-        message_fields = {
-            "name": df.loc[df["whatsapp_number"] == recipient, "name"].iloc[0].upper(),
-            "vehicle_license": df.loc[
-                df["whatsapp_number"] == recipient, "vehicle_license"
-            ]
-            .iloc[0]
-            .upper(),
-            "model_vehicle": df.loc[df["whatsapp_number"] == recipient, "model_vehicle"]
-            .iloc[0]
-            .upper(),
-            "expire_date": df.loc[
-                df["whatsapp_number"] == recipient, "expire_date"
-            ].iloc[0],
-        }
-
-        message = template.format(**message_fields)
-
-        # Clean message to BMP characters only
-        clean_message = clean_to_bmp(message)
-
-        # Locate message input field and send message
-        message_input = wait.until(
-            EC.element_to_be_clickable(
-                (
-                    By.XPATH,
-                    "/html/body/div[1]/div/div/div[2]/div[4]/div/footer/div[1]/div/span[2]/div/div[2]/div[1]/div/div[1]/p",
+        with spans.span("navigation", recipient), session.lock:
+            session.navigations += 1
+            if chat_type == "group":
+                # Groups have no phone number, so they are still picked from the chat list
+                if not driver.current_url.startswith(WHATSAPP_URL):
+                    driver.get(WHATSAPP_URL)
+                    default_registry().forget(driver)
+                group = wait.until(
+                    EC.element_to_be_clickable((By.XPATH, f"//span[@title='{recipient}']"))
                 )
+                group.click()
+            else:  # Assume 'contact' as default
+                # Open the chat directly by its phone-number deep link
+                open_chat(driver, recipient, timeout=session.chat_open.timeout())
+
+        # Wait until the header shows the recipient and the compose box is
+        # usable; the session lock is free here, so delivery checks run meanwhile
+        with spans.span("chat_open", recipient):
+            message_input = wait_for_chat(driver, expected, started)
+
+        with session.lock:
+            with spans.span("compose", recipient):
+                # Fill the message input field with the whole multiline message
+                compose_message(driver, message_input, clean_message, compose_mode)
+
+            with spans.span("submit", recipient):
+                # Journal the attempt before the final keystroke so a crash after
+                # this point is replayed as unconfirmed instead of being resent
+                if confirm_timeout > 0:
+                    record_status(index, recipient, IN_FLIGHT_STATUS, file_path, rows=rows)
+                    # The watcher reads the ticks of the bubble after this one
+                    previous = last_outgoing(driver)
+                else:
+                    with _status_lock:
+                        open_journal(file_path).append(recipient, IN_FLIGHT_STATUS, rows=rows)
+
+                # Send final message
+                message_input.send_keys(Keys.ENTER)
+        print(f"{Fore.GREEN}Message sent to {recipient}")
+        spans.count("sent")
+
+        if confirm_timeout > 0:
+            watcher_for(driver).watch(
+                recipient,
+                expected,
+                clean_message,
+                previous,
+                lambda status: record_status(index, recipient, status, file_path, rows=rows),
+                confirm_timeout,
             )
+        else:
+            with spans.span("persist", recipient):
+                record_status(index, recipient, "Correct", file_path, rows=rows)
+
+    except Exception as e:
+        if isinstance(e, NoSuchElementException):
+            print(f"{Fore.RED}Error: Element not found - {str(e)}")
+        else:
+            print(f"{Fore.RED}Error sending message to {recipient}: {str(e)}")
+        failure = classify(e)
+        if failure == SESSION:
+            # Only a session failure puts the cached login in doubt
+            session.invalidate()
+        with spans.span("persist", recipient):
+            status = record_failure(index, recipient, failure, file_path, max_attempts, rows)
+        spans.count("failed")
+        if status == RETRY_STATUS:
+            print(f"{Fore.YELLOW}{recipient} will be retried ({failure} failure).")
+        return failure
+    return None
+
+
+def send_reminder(
+    driver: WebDriver,
+    recipient: str,
+    df: pd.DataFrame,
+    file_path: str,
+    index: RecipientIndex,
+    plan: SendPlan,
+    args: argparse.Namespace,
+    policy: RetryPolicy,
+    breaker: CircuitBreaker | None = None,
+) -> str | None:
+    """
+    Sends one reminder with the command line options, retrying transient failures.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+        recipient (str): The recipient's WhatsApp number.
+        df (pd.DataFrame): The recipient table.
+        file_path (str): The recipient file or database.
+        index (RecipientIndex): The index over `df`.
+        plan (SendPlan): The send plan for today.
+        args (argparse.Namespace): The parsed command line options.
+        policy (RetryPolicy): Attempts and backoff for transient failures.
+        breaker (CircuitBreaker, optional): Pauses sending after repeated session failures.
+
+    Raises:
+        CircuitOpenError: If the breaker is open.
+
+    Returns:
+        str | None: The failure class of the last attempt, or None.
+    """
+    from scheduler import send_rate
+    from session import session_for
+
+    # Fixed before the first attempt, since the attempts change the statuses
+    rows = target_rows(index, recipient, plan)
+    session = session_for(driver)
+    navigations: int = session.navigations
+    with send_rate().timer() as timing:
+        failure = send_with_retry(
+            lambda: send_whatsapp_message(
+                driver,
+                recipient,
+                df,
+                file_path,
+                index=index,
+                plan=plan,
+                compose_mode=args.compose,
+                confirm_timeout=args.confirm_timeout,
+                max_attempts=policy.attempts,
+                rows=rows,
+            ),
+            lambda: attempts_of(index, recipient, rows),
+            policy,
+            breaker,
         )
+        if session.navigations == navigations:
+            # Skipped or rejected without opening a chat; says nothing about the rate
+            timing.discard()
+    return failure
 
-        # Clear any existing text in message input field
-        message_input.clear()
 
-        # Send new message with multiline support
-        lines = clean_message.splitlines()
-        for line in lines:
-            message_input.send_keys(line)
-            message_input.send_keys(
-                Keys.SHIFT + Keys.ENTER
-            )  # Insert new line without sending message
+def pending_recipients(plan: SendPlan, file_path: str) -> list[str]:
+    """
+    Returns the numbers that are due and not processed yet, once each, most urgent first.
 
-        # Send final message
-        message_input.send_keys(Keys.ENTER)
-        print(f"{Fore.GREEN}Message sent to {recipient}")
+    With a SQLite store this is an indexed query on the send date; otherwise
+    it comes from the in-memory plan. A number with several due rows is
+    listed once, since all of its rows go out in one message. The numbers
+    are ordered by `scheduler.deadline_order`: soonest expiry first, then the
+    rows caught up from a missed send date.
 
-        # Update status and timestamp in DataFrame
-        df.loc[df["whatsapp_number"] == recipient, "status"] = "Correct"
-        df.loc[df["whatsapp_number"] == recipient, "timestep"] = datetime.today().date()
+    Args:
+        plan (SendPlan): The send plan for today.
+        file_path (str): The recipient file or database.
 
-        # Save DataFrame with updated status
-        df.to_excel(file_path, index=False)
+    Returns:
+        list[str]: The WhatsApp numbers, in send order.
+    """
+    import pandas as pd
+
+    from phone import default_rules
+    from scheduler import deadline_order, plan_order
+    from store import is_store_path, open_store
+
+    if not is_store_path(file_path):
+        return plan_order(plan, plan.groups(PROCESSED_STATUSES))
+
+    due = open_store(file_path).due_unsent(
+        plan.today,
+        PROCESSED_STATUSES,
+        "r.rowid, r.whatsapp_number, r.expire_date",
+        plan.catch_up_days,
+    )
+    today = pd.Timestamp(plan.today)
+    due["days_left"] = (pd.to_datetime(due["expire_date"]).dt.normalize() - today).dt.days
+    due["overdue"] = (today - pd.to_datetime(due["send_date"])).dt.days
+    # Grouped by E.164 form, like the plan, so one number gets one message
+    due["key"] = default_rules().keys(due["whatsapp_number"])
+    numbers = due.groupby("key", sort=False).agg(
+        days_left=("days_left", "min"), overdue=("overdue", "max"), position=("rowid", "min")
+    )
+    return deadline_order(
+        (str(number), int(row.days_left), int(row.overdue), int(row.position))
+        for number, row in numbers.iterrows()
+    )
 
-    except NoSuchElementException as e:
-        print(f"{Fore.RED}Error: Element not found - {str(e)}")
-        # Update status to 'Error' in DataFrame
-        df.loc[df["whatsapp_number"] == recipient, "status"] = "Error"
-        df.loc[df["whatsapp_number"] == recipient, "timestep"] = datetime.today().date()
-        df.to_excel(file_path, index=False)  # Save DataFrame with updated status
-    except Exception as e:
-        print(f"{Fore.RED}Error sending message to {recipient}: {str(e)}")
-        # Update status to 'Error' in DataFrame
-        df.loc[df["whatsapp_number"] == recipient, "status"] = "Error"
-        df.loc[df["whatsapp_number"] == recipient, "timestep"] = datetime.today().date()
-        df.to_excel(file_path, index=False)  # Save DataFrame with updated status
+
+def print_projection(pending: list[str], sessions: int = 1, min_interval: float = 0.0) -> None:
+    """
+    Prints when the queued messages are projected to be sent, at the measured send rate.
+
+    Args:
+        pending (list[str]): The queued numbers.
+        sessions (int, optional): Sessions sending in parallel. Defaults to 1.
+        min_interval (float, optional): Minimum seconds between two messages of a session.
+
+    Returns:
+        None
+    """
+    from scheduler import send_rate
+
+    rate = send_rate()
+    finish = rate.projected_completion(len(pending), sessions, min_interval)
+    basis: str = "measured" if rate.measured else "assumed"
+    print(
+        f"{Fore.CYAN}{len(pending)} messages queued, most urgent first; projected to finish at "
+        f"{finish:%H:%M} ({rate.seconds_per_message(min_interval):.1f}s per message, {basis})."
+    )
+
+
+def run_daemon(args: argparse.Namespace, df: pd.DataFrame, lead_days: list[int]) -> None:
+    """
+    Runs scheduled send cycles until interrupted, see `daemon.SendDaemon`.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+        df (pd.DataFrame): The loaded recipient table.
+        lead_days (list[int]): Days before expiry on which rows are due.
+
+    Returns:
+        None
+    """
+    import signal
+
+    from daemon import SendDaemon, parse_windows, serve_health
+
+    policy = RetryPolicy(args.max_attempts)
+    breaker = CircuitBreaker(args.breaker_threshold)
+    daemon = SendDaemon(
+        args.file,
+        df,
+        lead_days,
+        functools.partial(
+            start_driver,
+            profile=args.browser_profile,
+            headless=args.headless,
+            persistent=args.persistent_browser,
+        ),
+        ensure_logged_in,
+        lambda driver, recipient, table, index, plan: send_reminder(
+            driver, recipient, table, args.file, index, plan, args, policy, breaker
+        ),
+        lambda plan: pending_recipients(plan, args.file),
+        interval=args.interval * 60,
+        windows=parse_windows(args.windows),
+        min_interval=args.min_interval,
+        breaker=breaker,
+        catch_up_days=args.catch_up_days,
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+
+    server = None
+    try:
+        if args.health_port:
+            try:
+                server = serve_health(daemon, args.health_port)
+            except OSError as e:
+                # Sending does not depend on the endpoint, so the daemon keeps running
+                print(f"{Fore.YELLOW}Health endpoint disabled; port {args.health_port} is unavailable: {e}")
+            else:
+                print(f"{Fore.CYAN}Health endpoint on http://127.0.0.1:{args.health_port}/health")
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+        daemon.close()
+        metrics().close()
+
+
+def print_pause(breaker: CircuitBreaker, unsent: int) -> None:
+    """
+    Reports that the circuit breaker paused sending.
+
+    Args:
+        breaker (CircuitBreaker): The open breaker.
+        unsent (int): The messages left pending.
+
+    Returns:
+        None
+    """
+    print(
+        f"{Fore.RED}Sending paused after {breaker.failures} consecutive session failures "
+        f"(logged out or browser gone); {unsent} messages are left pending. "
+        f"Check the WhatsApp session and choose Send Messages again."
+    )
+
+
+def wait_for_deliveries(drivers: list[WebDriver]) -> None:
+    """
+    Waits until the messages of each session have their first tick or time out.
+
+    Args:
+        drivers (list[WebDriver]): The drivers whose delivery watchers to drain.
+
+    Returns:
+        None
+    """
+    from delivery import watcher_for
+
+    for driver in drivers:
+        watcher = watcher_for(driver)
+        if watcher.pending():
+            print(f"{Fore.CYAN}Waiting for the delivery ticks of {watcher.pending()} messages...")
+        watcher.drain()
+
+
+def print_wait_report(drivers: list[WebDriver]) -> None:
+    """
+    Prints the chat-open wait distribution of each session.
+
+    Args:
+        drivers (list[WebDriver]): The drivers whose sessions to report.
+
+    Returns:
+        None
+    """
+    from session import session_for
+
+    for slot, driver in enumerate(drivers):
+        report = session_for(driver).chat_open.report()
+        if not report["count"]:
+            continue
+        print(
+            f"{Fore.CYAN}Session {slot} chat-open wait over {report['count']} messages: "
+            f"mean {report['mean']:.2f}s, p50 {report['p50']:.2f}s, p90 {report['p90']:.2f}s, "
+            f"p99 {report['p99']:.2f}s, max {report['max']:.2f}s "
+            f"({report['saved']:+.1f}s saved versus a fixed 3s sleep)"
+        )
+
+
+def print_stage_report() -> None:
+    """
+    Prints the mean time per send stage and the message outcomes, and
+    writes the Prometheus file. Does nothing unless metrics are enabled.
+
+    Returns:
+        None
+    """
+    spans = metrics()
+    if not spans.enabled:
+        return
+    stages = ", ".join(
+        f"{stage} {values['mean'] * 1000:.0f}ms"
+        for stage, values in spans.summary().items()
+        if stage != "send_loop"
+    )
+    outcomes = ", ".join(f"{outcome} {count}" for outcome, count in spans.counters.items())
+    print(f"{Fore.CYAN}Mean time per stage: {stages} ({outcomes})")
+    spans.flush()
+
+
+def attempts_of(index: RecipientIndex, recipient: str, rows: list[int] | None = None) -> int:
+    """
+    Returns:
+        int: The send attempts recorded for a recipient, or for the first of `rows`,
+            0 if none.
+    """
+    try:
+        value = index.get(recipient, "attempts", rows)
+    except KeyError:
+        return 0
+    return 0 if value is None or value != value else int(value)
+
+
+def record_failure(
+    index: RecipientIndex,
+    recipient: str,
+    failure: str,
+    file_path: str,
+    max_attempts: int,
+    rows: list[int] | None = None,
+) -> str:
+    """
+    Records a failed attempt according to its failure class.
+
+    Transient failures leave the row pending as 'Retry' until it has used
+    `max_attempts`, permanent ones mark it 'Error' at once, and session
+    failures leave it pending without counting an attempt against it.
+
+    Args:
+        index (RecipientIndex): The index over the DataFrame containing the message data.
+        recipient (str): The recipient's WhatsApp number.
+        failure (str): TRANSIENT, PERMANENT or SESSION.
+        file_path (str): The path to the workbook the journal belongs to.
+        max_attempts (int): Attempts per row.
+        rows (list[int], optional): The rows the message was for. Defaults to every row.
+
+    Returns:
+        str: The recorded status.
+    """
+    attempts = attempts_of(index, recipient, rows)
+    if failure == SESSION:
+        status = RETRY_STATUS
+    else:
+        attempts += 1
+        status = RETRY_STATUS if failure == TRANSIENT and attempts < max_attempts else "Error"
+    record_status(index, recipient, status, file_path, attempts, rows)
+    return status
+
+
+def record_status(
+    index: RecipientIndex,
+    recipient: str,
+    status: str,
+    file_path: str,
+    attempts: int | None = None,
+    rows: list[int] | None = None,
+) -> None:
+    """
+    Updates a recipient's status in the DataFrame and appends it to the send journal.
+
+    The workbook is only rewritten when the journal reaches a checkpoint.
+
+    Args:
+        index (RecipientIndex): The index over the DataFrame containing the message data.
+        recipient (str): The recipient's WhatsApp number.
+        status (str): The new status.
+        file_path (str): The path to the workbook the journal belongs to.
+        attempts (int, optional): The new attempt count, if it changed.
+        rows (list[int], optional): The rows to update, i.e. those the message was for;
+            other rows of the number keep their status. Defaults to every row.
+
+    Returns:
+        None
+    """
+    from journal import open_journal
+
+    with _status_lock:
+        index.set(recipient, "status", status, rows)
+        index.set(recipient, "timestep", datetime.today().date(), rows)
+        if attempts is not None:
+            index.set(recipient, "attempts", attempts, rows)
+
+        journal = open_journal(file_path)
+        journal.append(recipient, status, attempts=attempts, rows=rows)
+        if journal.should_checkpoint():
+            journal.compact(index.df, file_path)
 
 
 def load_excel_data(file_path: str, sheet_name: str = "Sheet1") -> pd.DataFrame | None:
     """
     Load data from an Excel file and return it as a pandas DataFrame.
 
+    The workbook is streamed in read-only mode with declared column types;
+    CSV and Parquet files are accepted as well, and a .db/.sqlite path is
+    loaded from the SQLite recipient store. Statuses recorded in the send
+    journal since the last checkpoint are replayed on top of the loaded data.
+
     Args:
-        file_path (str): The path to the Excel file.
+        file_path (str): The path to the Excel, CSV, Parquet or SQLite file.
         sheet_name (str, optional): The name of the sheet to load data from. Defaults to 'Sheet1'.
 
     Returns:
@@ -388,9 +1006,19 @@ def load_excel_data(file_path: str, sheet_name: str = "Sheet1") -> pd.DataFrame
         FileNotFoundError: If the specified Excel file does not exist.
 
     """
+    import pandas as pd
+
+    from journal import open_journal
+    from loader import apply_declared_types, read_recipients, write_recipients
+    from store import is_store_path, open_store
+
     try:
         try:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
+            if is_store_path(file_path):
+                store = open_store(file_path)
+                df = store.load() if store.exists() else None
+            else:
+                df = read_recipients(file_path, sheet_name=sheet_name)
         except FileNotFoundError:
             df = None
 
@@ -405,18 +1033,22 @@ def load_excel_data(file_path: str, sheet_name: str = "Sheet1") -> pd.DataFrame
                 "status": [""],
                 "timestep": [pd.Timestamp.today()],
             }
-            df = pd.DataFrame(data)
-            df.to_excel(file_path, index=False)
+            df = apply_declared_types(pd.DataFrame(data))
+            if is_store_path(file_path):
+                open_store(file_path).import_frame(df)
+            else:
+                write_recipients(df, file_path)
             print(
                 f"{Fore.GREEN}File '{file_path}' created successfully as a testing template."
             )
 
-        # Convert 'status' column to string and fill NaN values with an empty string
-        if "status" in df.columns:
-            df["status"] = df["status"].astype(str).fillna("")
-        else:
+        if "status" not in df.columns:
             df["status"] = ""
 
+        replayed = open_journal(file_path).replay(df)
+        if replayed:
+            print(f"{Fore.YELLOW}Replayed {replayed} unsaved status updates from the send journal.")
+
         print(f"{Fore.GREEN}Excel data loaded successfully.")
         return df
 
@@ -425,34 +1057,57 @@ def load_excel_data(file_path: str, sheet_name: str = "Sheet1") -> pd.DataFrame
         return None
 
 
-def verbose_excel_data(file_path: str) -> None:
+def verbose_excel_data(file_path: str, rows: int = 20) -> None:
     """
-    Display the content of an Excel file in a verbose manner.
+    Display the first rows of each sheet of an Excel file, e.g. when the table could not be loaded.
 
     Args:
         file_path (str): The path to the Excel file.
+        rows (int, optional): Rows to show per sheet. Defaults to 20.
 
     Raises:
         Exception: If there is an error displaying the Excel content.
 
     """
+    import pandas as pd
+
     try:
         with pd.ExcelFile(file_path) as xls:
             for sheet in xls.sheet_names:
-                print(f"{Fore.BLUE}Sheet: {sheet}")
-                df = pd.read_excel(xls, sheet_name=sheet)
+                print(f"{Fore.BLUE}Sheet: {sheet} (first {rows} rows)")
+                df = pd.read_excel(xls, sheet_name=sheet, nrows=rows)
                 print(df.to_string(index=False))
                 print("=" * 80)
     except Exception as e:
         print(f"{Fore.RED}Error displaying Excel content: {str(e)}")
 
 
-def preview_whatsapp_message(df):
+def view_recipients(df: pd.DataFrame, plan: SendPlan) -> None:
+    """
+    Pages through the loaded recipient table, see `viewer.TableViewer`.
+
+    Args:
+        df (pd.DataFrame): The recipient table.
+        plan (SendPlan): The send plan for today.
+
+    Returns:
+        None
+    """
+    from viewer import TableViewer, browse
+
+    browse(TableViewer(df, plan, PROCESSED_STATUSES))
+
+
+def preview_whatsapp_message(
+    df, index: RecipientIndex | None = None, plan: SendPlan | None = None
+):
     """
-    Preview the WhatsApp message for each recipient in the given DataFrame.
+    Preview the WhatsApp message for each recipient that is due today.
 
     Args:
         df (pandas.DataFrame): The DataFrame containing the WhatsApp message data.
+        index (RecipientIndex, optional): The index over `df`. Defaults to building a new one.
+        plan (SendPlan, optional): The precomputed send plan. Defaults to planning for today.
 
     Raises:
         KeyError: If a required key is missing in the Excel data.
@@ -461,44 +1116,22 @@ def preview_whatsapp_message(df):
     Returns:
         None
     """
+    from phone import default_rules
+    from planner import SendPlan
+    from recipient_index import RecipientIndex
+
     try:
-        for index, row in df.iterrows():
+        if index is None:
+            index = RecipientIndex(df)
+        if plan is None:
+            plan = SendPlan(df)
 
-            expire_date = (
-                datetime.strptime(row["expire_date"], "%d/%m/%Y")
-                if isinstance(row["expire_date"], str)
-                else row["expire_date"]
-            )
-            recipient = row["whatsapp_number"]
-            send_date = expire_date - timedelta(days=2)
-
-            if datetime.now().date() == send_date.date():
-                message_fields = {
-                    "name": df.loc[df["whatsapp_number"] == recipient, "name"]
-                    .iloc[0]
-                    .upper(),
-                    "vehicle_license": df.loc[
-                        df["whatsapp_number"] == recipient, "vehicle_license"
-                    ]
-                    .iloc[0]
-                    .upper(),
-                    "model_vehicle": df.loc[
-                        df["whatsapp_number"] == recipient, "model_vehicle"
-                    ]
-                    .iloc[0]
-                    .upper(),
-                    "expire_date": df.loc[
-                        df["whatsapp_number"] == recipient, "expire_date"
-                    ].iloc[0],
-                }
-
-                message = template.format(**message_fields)
-                clean_message = clean_to_bmp(message)
-                clean_message = clean_to_bmp(message)
+        # Only the due numbers are normalized, not the whole table
+        recipients = default_rules().keys(df.loc[plan.due, "whatsapp_number"])
+        for recipient in recipients.drop_duplicates():
+            clean_message = render_message(index, recipient, plan)
 
-                print(
-                    f"{Fore.BLUE}Preview message for {row['whatsapp_number']}:\n{clean_message}\n"
-                )
+            print(f"{Fore.BLUE}Preview message for {recipient}:\n{clean_message}\n")
 
     except KeyError as e:
         print(f"{Fore.RED}Error: Missing key in Excel data: {str(e)}")
@@ -506,13 +1139,25 @@ def preview_whatsapp_message(df):
         print(f"{Fore.RED}Error previewing message: {str(e)}")
 
 
-def display_pending_messages(df, today):
+def has_unsent(df: pd.DataFrame, plan: SendPlan) -> bool:
+    """
+    Returns:
+        bool: True if a row has not been processed, or is due again after a
+            reminder for an earlier send date.
+    """
+    return bool(
+        (~df["status"].str.lower().isin(PROCESSED_STATUSES)).any()
+        or plan.pending_mask(PROCESSED_STATUSES).any()
+    )
+
+
+def display_pending_messages(df, plan: SendPlan):
     """
     Display pending messages to be sent.
 
     Args:
         df (pandas.DataFrame): The DataFrame containing the messages.
-        today (datetime.date): The current date.
+        plan (SendPlan): The precomputed send plan for today.
 
     Returns:
         None
@@ -521,13 +1166,23 @@ def display_pending_messages(df, today):
         None
     """
     try:
-        pending_df = df[
-            (df["expire_date"].apply(lambda x: x.date()) - timedelta(days=2) == today)
-            & (~df["status"].str.lower().isin(["correct", "error"]))
-        ]
+        pending_df = plan.pending(PROCESSED_STATUSES)
+        if plan.invalid.any():
+            print(
+                f"{Fore.YELLOW}{int(plan.invalid.sum())} rows have an unreadable expire_date and were skipped."
+            )
         if not pending_df.empty:
-            print(f"{Fore.YELLOW}Pending messages to be sent:")
+            messages = plan.keys[pending_df.index].nunique()
+            print(f"{Fore.YELLOW}Pending messages to be sent ({len(pending_df)} rows in {messages} messages):")
             print(pending_df)
+            rejected = plan.rejected(PROCESSED_STATUSES)
+            if rejected:
+                print(
+                    f"{Fore.RED}{len(rejected)} of them have an invalid phone number and will be "
+                    f"marked Error without opening WhatsApp:"
+                )
+                for number, reason in rejected.items():
+                    print(f"{Fore.RED}  {number}: {reason}")
         else:
             print(
                 f"{Fore.GREEN}No messages need to be sent today or all messages already sent."
@@ -536,41 +1191,213 @@ def display_pending_messages(df, today):
         print(f"{Fore.RED}Error processing data: {str(e)}")
 
 
-if __name__ == "__main__":
-    setup_chromedriver()  # Setup Chromedriver automatically
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parses the command line options.
+
+    Args:
+        argv (list[str], optional): The arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed options; `lead_days` is None unless given,
+            meaning DEFAULT_LEAD_DAYS.
+    """
+    parser = argparse.ArgumentParser(description="Send WhatsApp insurance reminders.")
+    parser.add_argument(
+        "--file", default="data.xlsx", help="recipient workbook (default: data.xlsx)"
+    )
+    parser.add_argument(
+        "--import-from",
+        metavar="PATH",
+        help="with a .db --file: replace the stored recipients with this .xlsx/.csv/.parquet file",
+    )
+    parser.add_argument(
+        "--export-to",
+        metavar="PATH",
+        help="with a .db --file: write the recipients and statuses to this file on exit",
+    )
+    parser.add_argument(
+        "--installer-sha256",
+        metavar="HEX",
+        help="known SHA-256 of the Chrome installer; a download that does not match is rejected",
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=1,
+        help=f"parallel WhatsApp sessions, each with its own Chrome profile (max {MAX_SESSIONS})",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="minimum seconds between two messages of the same session (default: 0)",
+    )
+    parser.add_argument(
+        "--compose",
+        choices=COMPOSE_MODES,
+        default="inject",
+        help="enter messages with one paste event (inject) or line by line (keys)",
+    )
+    parser.add_argument(
+        "--browser-profile",
+        choices=BROWSER_PROFILES,
+        default="full",
+        help="full: maximized Chrome as before; lean: small window, no GPU, "
+        "images and media blocked, for more sessions per machine",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run Chrome without a window (new headless mode); log in once without it first",
+    )
+    parser.add_argument(
+        "--persistent-browser",
+        action="store_true",
+        help="keep Chrome running after exit and attach to it on the next run through its "
+        "remote-debugging port, so WhatsApp Web does not sync again; a closed browser is restarted",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=MAX_ATTEMPTS,
+        metavar="N",
+        help=f"attempts per row before a timeout or page error marks it Error (default: {MAX_ATTEMPTS})",
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=BREAKER_THRESHOLD,
+        metavar="N",
+        help=f"pause sending after N consecutive session failures, e.g. logged out (default: {BREAKER_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--confirm-timeout",
+        type=float,
+        default=30.0,
+        metavar="SECONDS",
+        help="seconds to wait in the background for a message's first tick before it is "
+        "marked Unconfirmed; 0 records Correct on submit without checking (default: 30)",
+    )
+    parser.add_argument(
+        "--lead-days",
+        type=int,
+        nargs="+",
+        default=None,
+        metavar="DAYS",
+        help="days before expiry on which to send a reminder, e.g. 7 2 0 (default: 2)",
+    )
+    parser.add_argument(
+        "--area-code",
+        metavar="CODE",
+        help="area code of phone numbers written without one, e.g. 351; "
+        "without it such numbers are rejected as no_area_code",
+    )
+    parser.add_argument(
+        "--catch-up-days",
+        type=int,
+        default=0,
+        metavar="DAYS",
+        help="also send reminders whose send date was missed up to DAYS days ago, "
+        "unless the policy already expired; 0 sends only on the send date (default: 0)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="append a JSON line per send stage (login_check, render, navigation, chat_open, compose, submit, persist) to this file",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="write message counters and stage latency histograms in Prometheus text format to this file",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="run without the menu, sending due messages on a schedule with one warm browser",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=60.0,
+        metavar="MINUTES",
+        help="with --daemon: minutes between send cycles (default: 60)",
+    )
+    parser.add_argument(
+        "--windows",
+        metavar="HH:MM-HH:MM[,...]",
+        help="with --daemon: times of day in which to send, e.g. 09:00-12:00,14:00-18:00 (default: all day)",
+    )
+    parser.add_argument(
+        "--health-port",
+        type=int,
+        default=8765,
+        metavar="PORT",
+        help="with --daemon: port of the JSON health endpoint on localhost, 0 to disable (default: 8765)",
+    )
+    return parser.parse_args(argv)
+
 
-    file_path = "data.xlsx"
+if __name__ == "__main__":
+    timer = PhaseTimer(STARTED)
+    args = parse_args()
+    if args.trace or args.metrics or args.daemon:
+        enable_metrics(args.trace, args.metrics)
+    setup_chromedriver(args.installer_sha256)  # Setup Chromedriver automatically
+    timer.mark("provisioning")
+
+    import planner
+    import recipient_index
+    from journal import open_journal
+    from phone import PhoneRules, configure
+    from reloader import WorkbookReloader
+    from store import is_store_path, open_store
+
+    timer.mark("data imports")
+
+    if args.area_code:
+        configure(PhoneRules(default_area_code=args.area_code))
+
+    file_path = args.file
+    lead_days = args.lead_days or list(planner.DEFAULT_LEAD_DAYS)
+    if is_store_path(file_path):
+        store = open_store(file_path)
+        if args.import_from:
+            imported = store.import_file(args.import_from, lead_days)
+            print(f"{Fore.GREEN}Imported {imported} recipients from '{args.import_from}'.")
+        elif store.exists():
+            store.plan(lead_days)
     df = load_excel_data(file_path)
+    timer.mark("load")
 
-    if df is not None:
-        # Set up user data directory for Chrome
-        user_data_dir = os.path.join(os.getcwd(), "chrome_user_data")
-        if not os.path.exists(user_data_dir):
-            os.makedirs(user_data_dir)
-
-        # Start WebDriver with user data directory
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--start-maximized")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--disable-notifications")
-        chrome_options.add_argument("--disable-popup-blocking")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option("useAutomationExtension", False)
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.get("https://web.whatsapp.com/")
+    if df is not None and args.daemon:
+        print(f"{Fore.CYAN}{timer.report()}")
+        run_daemon(args, df, lead_days)
+        sys.exit(0)
 
-        try:
-            if not is_logged_in(driver):
-                print(f"{Fore.CYAN}Please scan the QR code to log in to WhatsApp Web.")
+    if df is not None:
+        # The browser is started on the first send, so viewing and checking
+        # the data never waits for Chrome
+        driver = None
+        pool = None
+        launch_driver = functools.partial(
+            start_driver,
+            profile=args.browser_profile,
+            headless=args.headless,
+            persistent=args.persistent_browser,
+        )
+        retry_policy = RetryPolicy(args.max_attempts)
+        breaker = CircuitBreaker(args.breaker_threshold)
 
-            today = datetime.today().date()
+        # Built once here and rebuilt only when the table is reloaded
+        recipients = recipient_index.RecipientIndex(df)
+        plan = planner.SendPlan(df, lead_days=lead_days, catch_up_days=args.catch_up_days)
+        reloader = WorkbookReloader(file_path, df)
+        timer.mark("plan")
+        print(f"{Fore.CYAN}{timer.report()}")
 
+        try:
             while True:
                 print(f"\n{Fore.CYAN}Menu:")
                 print(f"{Fore.CYAN}1. View the table of users to send messages")
@@ -583,7 +1410,7 @@ if __name__ == "__main__":
 
                 if choice == "1":
                     if df is not None:
-                        verbose_excel_data(file_path)
+                        view_recipients(df, plan)
                     else:
                         print(
                             f"{Fore.RED}Excel data is not loaded. Please load the data first."
@@ -591,18 +1418,25 @@ if __name__ == "__main__":
 
                 elif choice == "2":
                     if df is not None:
-                        pending_df = df[
-                            ~df["status"].str.lower().isin(["correct", "error"])
-                        ]
-                        if not pending_df.empty:
+                        if has_unsent(df, plan):
                             print(
-                                f"{Fore.CYAN}Reloading the Excel file to check for changes..."
+                                f"{Fore.CYAN}Checking the Excel file for changes..."
                             )
-                            df = load_excel_data(file_path)
-                            if df is not None:
-                                display_pending_messages(df, today)
+                            try:
+                                df, changed = reloader.reload(df)
+                            except Exception as e:
+                                print(f"{Fore.RED}Failed to reload the Excel file: {str(e)}")
                             else:
-                                print(f"{Fore.RED}Failed to reload the Excel file.")
+                                if changed is None:
+                                    recipients.rebuild(df)
+                                    plan = planner.SendPlan(df, plan.today, plan.lead_days, plan.catch_up_days)
+                                    print(f"{Fore.GREEN}Reloaded all {len(df)} rows.")
+                                elif changed:
+                                    plan.refresh(changed)
+                                    print(f"{Fore.GREEN}Merged {len(changed)} changed rows.")
+                                else:
+                                    print(f"{Fore.GREEN}No changes since the last load.")
+                                display_pending_messages(df, plan)
                         else:
                             print(f"{Fore.GREEN}No pending messages to verify.")
                     else:
@@ -611,41 +1445,94 @@ if __name__ == "__main__":
                         )
 
                 elif choice == "3":
-                    if not is_logged_in(driver):
+                    if driver is None:
+                        # Start WebDriver with the user data directory of the first session
+                        browser_timer = PhaseTimer()
+                        driver = launch_driver(profile_dir_for(0))
+                        browser_timer.mark("browser")
+                        print(f"{Fore.CYAN}{browser_timer.report('Browser start')}")
+                        if not ensure_logged_in(driver):
+                            print(f"{Fore.CYAN}Please scan the QR code to log in to WhatsApp Web.")
+
+                    if not ensure_logged_in(driver):
                         print(
                             f"{Fore.RED}WhatsApp session not logged in. Please log in to WhatsApp Web."
                         )
 
                     if df is not None:
-                        pending_df = df[
-                            ~df["status"].str.lower().isin(["correct", "error"])
-                        ]
-                        if not pending_df.empty:
-                            for index, row in pending_df.iterrows():
-                                try:
-                                    expire_date = (
-                                        datetime.strptime(
-                                            row["expire_date"], "%d/%m/%Y"
-                                        )
-                                        if isinstance(row["expire_date"], str)
-                                        else row["expire_date"]
-                                    )
-                                    send_date = expire_date - timedelta(days=2)
-
-                                    if datetime.now().date() == send_date.date():
-                                        send_whatsapp_message(
+                        # Asking to send again is the user's go-ahead after a pause
+                        breaker.reset()
+                        pending = pending_recipients(plan, file_path)
+                        if pending:
+                            # Normalizes every number in one pass; the per-message checks then hit the cache
+                            rejected = plan.rejected(PROCESSED_STATUSES)
+                            if rejected:
+                                print(
+                                    f"{Fore.YELLOW}{len(rejected)} numbers are invalid and will be marked "
+                                    f"Error without opening WhatsApp (see Verify Messages)."
+                                )
+                            print_projection(pending, args.sessions, args.min_interval)
+                        if pending and args.sessions > 1:
+                            if pool is None:
+                                pool = SenderPool(
+                                    launch_driver,
+                                    lambda session_driver, recipient: send_reminder(
+                                        session_driver,
+                                        recipient,
+                                        df,
+                                        file_path,
+                                        recipients,
+                                        plan,
+                                        args,
+                                        retry_policy,
+                                        breaker,
+                                    ),
+                                    # A quick probe; a slot that is not logged in is checked again next run
+                                    functools.partial(ensure_logged_in, max_attempts=1),
+                                    args.sessions,
+                                    args.min_interval,
+                                    drivers=[driver],
+                                    breaker=breaker,
+                                )
+                            with metrics().span("send_loop"):
+                                summary = pool.run(pending)
+                                wait_for_deliveries(pool.drivers)
+                            print(
+                                f"{Fore.CYAN}Processed {sum(summary['processed'])} messages over "
+                                f"{len(summary['processed'])} sessions in {summary['elapsed']:.1f}s "
+                                f"(per session: {summary['processed']}, unsent: {summary['unsent']})."
+                            )
+                            if not breaker.allow():
+                                print_pause(breaker, summary["unsent"])
+                            print_wait_report(pool.drivers)
+                            print_stage_report()
+                        elif pending:
+                            with metrics().span("send_loop"):
+                                for position, recipient in enumerate(pending):
+                                    try:
+                                        send_reminder(
                                             driver,
-                                            row["whatsapp_number"],
+                                            recipient,
                                             df,
                                             file_path,
+                                            recipients,
+                                            plan,
+                                            args,
+                                            retry_policy,
+                                            breaker,
                                         )
-
-                                except KeyError as e:
-                                    print(
-                                        f"{Fore.RED}Error: Missing key in Excel data: {str(e)}"
-                                    )
-                                except Exception as e:
-                                    print(f"{Fore.RED}Error processing data: {str(e)}")
+                                    except CircuitOpenError:
+                                        print_pause(breaker, len(pending) - position)
+                                        break
+                                    except KeyError as e:
+                                        print(
+                                            f"{Fore.RED}Error: Missing key in Excel data: {str(e)}"
+                                        )
+                                    except Exception as e:
+                                        print(f"{Fore.RED}Error processing data: {str(e)}")
+                                wait_for_deliveries([driver])
+                            print_wait_report([driver])
+                            print_stage_report()
                         else:
                             print(f"{Fore.GREEN}No pending messages to send.")
                     else:
@@ -655,11 +1542,8 @@ if __name__ == "__main__":
 
                 elif choice == "4":
                     if df is not None:
-                        pending_df = df[
-                            ~df["status"].str.lower().isin(["correct", "error"])
-                        ]
-                        if not pending_df.empty:
-                            preview_whatsapp_message(df)
+                        if has_unsent(df, plan):
+                            preview_whatsapp_message(df, recipients, plan)
                         else:
                             print(f"{Fore.GREEN}No pending messages to preview.")
                     else:
@@ -673,8 +1557,22 @@ if __name__ == "__main__":
                     print(f"{Fore.RED}Invalid choice. Please try again.")
 
         finally:
-            driver.quit()  # Ensure WebDriver is closed
+            if driver is not None:
+                from delivery import close_watchers
+
+                close_watchers()
+            if df is not None:
+                open_journal(file_path).compact(df, file_path)
+            if args.export_to and is_store_path(file_path):
+                open_store(file_path).export_file(args.export_to)
+                print(f"{Fore.GREEN}Exported recipients to '{args.export_to}'.")
+            if pool is not None:
+                pool.close()
+            if driver is not None:
+                # An attached persistent browser stays open; only its driver ends
+                driver.quit()  # Ensure WebDriver is closed
+            metrics().close()
             sys.exit(0)
-            
+
     else:
         verbose_excel_data(file_path)
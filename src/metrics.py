@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Outcomes counted per message
+OUTCOMES: tuple[str, ...] = ("sent", "failed", "skipped", "rejected", "delivered", "unconfirmed")
+
+
+class _Span:
+    """
+    Times one stage; on exit the duration goes to the owning Metrics.
+    """
+
+    __slots__ = ("metrics", "stage", "recipient", "started")
+
+    def __init__(self, metrics: "Metrics", stage: str, recipient: str | None) -> None:
+        self.metrics = metrics
+        self.stage = stage
+        self.recipient = recipient
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.metrics._finish(self, time.perf_counter() - self.started, exc)
+        return False
+
+
+class _NullSpan:
+    """
+    The span handed out while metrics are disabled; it does nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_SPAN: _NullSpan = _NullSpan()
+
+
+class Metrics:
+    """
+    Stage spans, outcome counters and latency histograms for the send path.
+
+    Each finished span is added to the histogram of its stage and, when a
+    trace file is set, appended to it as one JSON line. The totals can be
+    exported in the Prometheus text format. While disabled, `span` returns
+    a shared no-op object and `count` returns at once, so the
+    instrumentation costs one attribute check per call.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        trace_path: str | None = None,
+        prometheus_path: str | None = None,
+    ) -> None:
+        """
+        Args:
+            enabled (bool, optional): Record anything at all. Defaults to True.
+            trace_path (str, optional): JSON-lines file that receives every span. Defaults to none.
+            prometheus_path (str, optional): File that `flush` writes the Prometheus text to.
+                Defaults to none.
+        """
+        self.enabled: bool = enabled
+        self.trace_path: str | None = trace_path
+        self.prometheus_path: str | None = prometheus_path
+        self._lock = threading.Lock()
+        self._trace = open(trace_path, "a", encoding="utf-8") if enabled and trace_path else None
+        self.counters: dict[str, int] = {outcome: 0 for outcome in OUTCOMES}
+        self.histograms: dict[str, list[int]] = {}
+        self.sums: dict[str, float] = {}
+
+    def span(self, stage: str, recipient: str | None = None) -> _Span | _NullSpan:
+        """
+        Returns a context manager that times a stage.
+
+        Args:
+            stage (str): The stage name, e.g. 'compose'.
+            recipient (str, optional): The recipient, written to the trace.
+
+        Returns:
+            _Span | _NullSpan: The span.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, recipient)
+
+    def count(self, outcome: str, value: int = 1) -> None:
+        """
+        Adds to the message counter of an outcome.
+
+        Args:
+            outcome (str): One of OUTCOMES.
+            value (int, optional): The amount to add. Defaults to 1.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[outcome] = self.counters.get(outcome, 0) + value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Adds a duration to the histogram of a stage.
+
+        Args:
+            stage (str): The stage name.
+            seconds (float): The duration.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._observe(stage, seconds)
+
+    def _observe(self, stage: str, seconds: float) -> None:
+        buckets = self.histograms.get(stage)
+        if buckets is None:
+            buckets = self.histograms[stage] = [0] * (len(BUCKETS) + 1)
+            self.sums[stage] = 0.0
+        for position, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                buckets[position] += 1
+                break
+        else:
+            buckets[-1] += 1
+        self.sums[stage] += seconds
+
+    def _finish(self, span: _Span, seconds: float, exc: BaseException | None) -> None:
+        with self._lock:
+            self._observe(span.stage, seconds)
+            if self._trace is not None:
+                record: dict[str, Any] = {
+                    "ts": datetime.now().isoformat(timespec="milliseconds"),
+                    "stage": span.stage,
+                    "recipient": span.recipient,
+                    "seconds": round(seconds, 6),
+                    "error": None if exc is None else f"{type(exc).__name__}: {exc}",
+                }
+                self._trace.write(json.dumps(record) + "\n")
+                self._trace.flush()
+
+    def prometheus(self) -> str:
+        """
+        Returns:
+            str: The counters and histograms in the Prometheus text exposition format.
+        """
+        with self._lock:
+            lines: list[str] = [
+                "# HELP whatsapp_messages_total Messages by outcome.",
+                "# TYPE whatsapp_messages_total counter",
+            ]
+            for outcome, value in self.counters.items():
+                lines.append(f'whatsapp_messages_total{{outcome="{outcome}"}} {value}')
+
+            lines += [
+                "# HELP whatsapp_stage_seconds Time spent per send stage.",
+                "# TYPE whatsapp_stage_seconds histogram",
+            ]
+            for stage, buckets in self.histograms.items():
+                cumulative: int = 0
+                for bound, hits in zip(BUCKETS + (float("inf"),), buckets):
+                    cumulative += hits
+                    le: str = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'whatsapp_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'whatsapp_stage_seconds_sum{{stage="{stage}"}} {self.sums[stage]:.6f}')
+                lines.append(f'whatsapp_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+            return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Returns:
+            dict[str, dict[str, float]]: The count and mean seconds per stage.
+        """
+        with self._lock:
+            return {
+                stage: {"count": sum(buckets), "mean": self.sums[stage] / max(sum(buckets), 1)}
+                for stage, buckets in self.histograms.items()
+            }
+
+    def flush(self) -> None:
+        """
+        Writes the Prometheus text to `prometheus_path`, atomically, if one is set.
+        """
+        if not self.enabled or not self.prometheus_path:
+            return
+        tmp_path: str = f"{self.prometheus_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, self.prometheus_path)
+
+    def close(self) -> None:
+        """
+        Flushes the Prometheus file and closes the trace.
+        """
+        self.flush()
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+
+_metrics: Metrics = Metrics(enabled=False)
+
+
+def metrics() -> Metrics:
+    """
+    Returns:
+        Metrics: The shared metrics; disabled unless `enable_metrics` was called.
+    """
+    return _metrics
+
+
+def enable_metrics(trace_path: str | None = None, prometheus_path: str | None = None) -> Metrics:
+    """
+    Replaces the shared metrics with an enabled instance.
+
+    Args:
+        trace_path (str, optional): JSON-lines trace file. Defaults to none.
+        prometheus_path (str, optional): Prometheus text file written by `flush`. Defaults to none.
+
+    Returns:
+        Metrics: The enabled metrics.
+    """
+    global _metrics
+    _metrics.close()
+    _metrics = Metrics(True, trace_path, prometheus_path)
+    return _metrics
@@ -0,0 +1,218 @@
+import json
+import os
+import subprocess
+import time
+import urllib.request
+from typing import Iterable
+
+from provisioning import chrome_path
+
+# Written into the Chrome profile it describes, so each session slot has its own
+STATE_FILE: str = "automation_browser.json"
+
+# Chrome writes the port it picked for --remote-debugging-port=0 here
+DEVTOOLS_PORT_FILE: str = "DevToolsActivePort"
+
+# Seconds a freshly launched Chrome has to open its debugging port
+LAUNCH_TIMEOUT: float = 20.0
+
+# Seconds the liveness probe waits for the debugging endpoint
+PROBE_TIMEOUT: float = 1.0
+
+
+class BrowserState:
+    """
+    Records the Chrome that was left running for a profile.
+
+    The entry holds the process id, the remote-debugging port and the Chrome
+    executable. A later run attaches to that browser while its debugging
+    endpoint answers, keeping the WhatsApp Web page that has already synced
+    the chat list; otherwise the entry is stale and a new browser is started.
+    """
+
+    def __init__(self, user_data_dir: str) -> None:
+        """
+        Args:
+            user_data_dir (str): The Chrome profile directory of the browser.
+        """
+        self.user_data_dir: str = user_data_dir
+        self.path: str = os.path.join(user_data_dir, STATE_FILE)
+        self.entry: dict = self._read()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entry if isinstance(entry, dict) else {}
+
+    @property
+    def address(self) -> str | None:
+        """
+        Returns:
+            str | None: The recorded debugger address, e.g. '127.0.0.1:9222', or None.
+        """
+        port = self.entry.get("port")
+        return f"127.0.0.1:{port}" if isinstance(port, int) else None
+
+    def alive(self) -> bool:
+        """
+        Returns:
+            bool: True if the recorded browser answers on its debugging port.
+        """
+        port = self.entry.get("port")
+        return isinstance(port, int) and probe(port)
+
+    def record(self, pid: int, port: int, chrome: str) -> None:
+        """
+        Records a launched browser, replacing the state file atomically.
+
+        Args:
+            pid (int): The Chrome process id.
+            port (int): Its remote-debugging port.
+            chrome (str): The Chrome executable.
+        """
+        self.entry = {"pid": pid, "port": port, "chrome": chrome, "started": time.time()}
+        tmp_path: str = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entry, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """
+        Forgets the recorded browser.
+        """
+        self.entry = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def probe(port: int, timeout: float = PROBE_TIMEOUT) -> bool:
+    """
+    Checks that a Chrome debugging endpoint answers on a local port.
+
+    Args:
+        port (int): The remote-debugging port.
+        timeout (float, optional): Seconds to wait for the answer. Defaults to 1.
+
+    Returns:
+        bool: True if the endpoint describes a browser.
+    """
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=timeout) as response:
+            return "Browser" in json.load(response)
+    except (OSError, ValueError):
+        return False
+
+
+def _devtools_port(user_data_dir: str) -> int | None:
+    try:
+        with open(os.path.join(user_data_dir, DEVTOOLS_PORT_FILE), encoding="utf-8") as f:
+            return int(f.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def launch(
+    user_data_dir: str,
+    arguments: Iterable[str],
+    url: str | None = None,
+    timeout: float = LAUNCH_TIMEOUT,
+) -> BrowserState:
+    """
+    Starts Chrome detached from this process with a remote-debugging port.
+
+    Chrome picks a free port itself and reports it in the profile directory,
+    so two profiles never race for the same one. The browser keeps running
+    after this process exits.
+
+    Args:
+        user_data_dir (str): The Chrome profile directory.
+        arguments (Iterable[str]): Further Chrome arguments, see `main.build_chrome_options`.
+        url (str, optional): The page to open. Defaults to a blank page.
+        timeout (float, optional): Seconds to wait for the debugging port. Defaults to 20.
+
+    Raises:
+        RuntimeError: If Chrome is not installed or its debugging port does not open,
+            e.g. because another Chrome already uses the profile.
+
+    Returns:
+        BrowserState: The recorded state of the new browser.
+    """
+    chrome = chrome_path()
+    if chrome is None:
+        raise RuntimeError("Google Chrome was not found; it is needed to keep a browser running.")
+    os.makedirs(user_data_dir, exist_ok=True)
+    # A file left by an earlier browser would point at a closed port
+    try:
+        os.remove(os.path.join(user_data_dir, DEVTOOLS_PORT_FILE))
+    except FileNotFoundError:
+        pass
+
+    command: list[str] = [
+        chrome,
+        *(argument for argument in arguments if not argument.startswith("--user-data-dir=")),
+        f"--user-data-dir={user_data_dir}",
+        "--remote-debugging-port=0",
+        "--no-first-run",
+        "--no-default-browser-check",
+    ]
+    if url:
+        command.append(url)
+    detached: dict = (
+        {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        if os.name == "nt"
+        else {"start_new_session": True}
+    )
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **detached,
+    )
+
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        port = _devtools_port(user_data_dir)
+        if port is not None and probe(port):
+            state = BrowserState(user_data_dir)
+            state.record(process.pid, port, chrome)
+            return state
+        if process.poll() is not None and port is None:
+            # Chrome hands the profile to a browser already using it and exits
+            raise RuntimeError(
+                f"Chrome exited without opening its debugging port; close any other "
+                f"Chrome window that uses '{user_data_dir}' and try again."
+            )
+        time.sleep(0.2)
+    raise RuntimeError(f"Chrome did not open its debugging port within {timeout:.0f}s.")
+
+
+def attach_or_launch(
+    user_data_dir: str, arguments: Iterable[str], url: str | None = None
+) -> tuple[str, bool]:
+    """
+    Returns the debugger address of the profile's browser, starting one if needed.
+
+    Args:
+        user_data_dir (str): The Chrome profile directory.
+        arguments (Iterable[str]): Chrome arguments for a new browser.
+        url (str, optional): The page a new browser opens. Defaults to a blank page.
+
+    Raises:
+        RuntimeError: See `launch`.
+
+    Returns:
+        tuple[str, bool]: The address for ChromeOptions.debugger_address, and True
+            if a running browser was reused.
+    """
+    state = BrowserState(user_data_dir)
+    if state.alive():
+        return state.address, True
+    # The recorded browser was closed or crashed
+    state.clear()
+    return launch(user_data_dir, arguments, url).address, False
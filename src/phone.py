@@ -0,0 +1,271 @@
+import importlib.util
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Reason codes of numbers that cannot be sent to; "" means the number is valid
+EMPTY: str = "empty"
+NOT_A_NUMBER: str = "not_a_number"
+TOO_SHORT: str = "too_short"
+TOO_LONG: str = "too_long"
+NO_AREA_CODE: str = "no_area_code"
+BAD_AREA_CODE: str = "bad_area_code"
+BAD_COUNTRY_CODE: str = "bad_country_code"
+
+# Argentine area codes shorter than four digits; every other area code has
+# four, so these tell where the mobile "15" sits in a national number
+ARGENTINA_SHORT_AREA_CODES: tuple[str, ...] = (
+    "11",
+    "220", "221", "223", "230", "236", "237", "249", "260", "261", "263", "264", "266",
+    "280", "291", "294", "297", "298", "299", "336", "341", "342", "343", "344", "345",
+    "348", "351", "353", "358", "362", "364", "370", "376", "379", "380", "381", "383",
+    "385", "387", "388",
+)  # fmt: skip
+
+
+# Arrow strings run the string operations below in compiled kernels; pyarrow
+# is optional, as for Parquet files
+_STRING_DTYPE: str = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
+
+
+class PhoneRules:
+    """
+    How numbers written the local way are turned into E.164 for one country.
+
+    The defaults describe Argentina: national numbers have ten digits (area
+    code and subscriber), are often written with the trunk prefix 0 and, for
+    mobiles, with 15 between the area code and the subscriber
+    ("0351 15-788-5067"), and WhatsApp expects mobiles as +54 9 followed by
+    the ten digits. A number with a leading + or 00 and another country code
+    is accepted as it is if its length is plausible.
+
+    Normalized values are cached per raw value, so a number is only parsed
+    once per process however often the table is reloaded.
+    """
+
+    def __init__(
+        self,
+        country_code: str = "54",
+        mobile_prefix: str = "9",
+        trunk_prefix: str = "0",
+        mobile_infix: str = "15",
+        national_length: int = 10,
+        short_area_codes: Iterable[str] = ARGENTINA_SHORT_AREA_CODES,
+        default_area_code: str | None = None,
+    ) -> None:
+        """
+        Args:
+            country_code (str, optional): Country calling code. Defaults to '54'.
+            mobile_prefix (str, optional): Digit between the country code and a mobile
+                number in E.164. Defaults to '9'.
+            trunk_prefix (str, optional): Prefix of national numbers dialled locally. Defaults to '0'.
+            mobile_infix (str, optional): Digits written between area code and subscriber
+                of a mobile. Defaults to '15'.
+            national_length (int, optional): Digits of a national number. Defaults to 10.
+            short_area_codes (Iterable[str], optional): Area codes shorter than four digits.
+                Defaults to Argentina's.
+            default_area_code (str, optional): Area code of numbers written without one.
+                Defaults to none, which rejects them.
+        """
+        self.country_code: str = country_code
+        self.mobile_prefix: str = mobile_prefix
+        self.trunk_prefix: str = trunk_prefix
+        self.mobile_infix: str = mobile_infix
+        self.national_length: int = national_length
+        self.short_area_codes: frozenset[str] = frozenset(short_area_codes)
+        self.default_area_code: str | None = default_area_code.lstrip(trunk_prefix) if default_area_code else None
+        self._cache: dict[str, tuple[str | None, str]] = {}
+
+    def _area_length(self, national: pd.Series) -> np.ndarray:
+        lengths = np.full(len(national), 4)
+        for length in sorted({len(code) for code in self.short_area_codes}, reverse=True):
+            lengths[national.str[:length].isin(self.short_area_codes).to_numpy()] = length
+        return lengths
+
+    def _normalize(self, raw: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Normalizes distinct raw values in one vectorized pass.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The E.164 digits (without +) or None, and
+                the reason code ("" if valid), per value.
+        """
+        text = raw.astype(_STRING_DTYPE).str.strip().str.replace(r"\.0$", "", regex=True)
+        international = text.str.match(r"^(\+|00)")
+        digits = text.str.replace(r"\D", "", regex=True)
+        digits = digits.where(~text.str.startswith("00"), digits.str.removeprefix("00"))
+
+        code, mobile, trunk, infix = self.country_code, self.mobile_prefix, self.trunk_prefix, self.mobile_infix
+        length: int = self.national_length
+        # Written with the country code, with or without the + (no area code starts with it)
+        lengths = [len(code) + length + extra for extra in (0, len(mobile), len(infix))]
+        domestic = digits.str.startswith(code) & (international | digits.str.len().isin(lengths))
+        foreign = international & ~domestic
+
+        national = digits.where(~domestic, _drop(digits, len(code)))
+        national = national.where(
+            ~(domestic & (national.str.len() == len(mobile) + length) & national.str.startswith(mobile)),
+            _drop(national, len(mobile)),
+        )
+        national = national.str.removeprefix(trunk)
+
+        # "<area> 15 <subscriber>": drop the infix after an area code of 2, 3 or 4 digits
+        area = self._area_length(national)
+        with_infix = national.str.len() == length + len(infix)
+        for size in map(int, np.unique(area)):
+            at = with_infix & (area == size) & (national.str[size:size + len(infix)] == infix)
+            national = national.where(~at, national.str[:size] + _drop(national, size + len(infix)))
+        # "15 <subscriber>" written locally, without the area code; no area code starts with 15
+        local_mobile = (national.str.len() <= length) & national.str.startswith(infix)
+        national = national.where(~local_mobile, _drop(national, len(infix)))
+        if self.default_area_code:
+            short = national.str.len() == length - len(self.default_area_code)
+            national = national.where(~short, self.default_area_code + national)
+
+        size = national.str.len().to_numpy()
+        # No area code starts with the trunk or mobile prefix; one left over means
+        # a digit is missing, e.g. "549351788506" read as +54 9 9351788506
+        bad_area = national.str.startswith("0")
+        for prefix in filter(None, (trunk, mobile)):
+            bad_area |= national.str.startswith(prefix)
+        conditions = [
+            text.eq("").to_numpy() | text.str.lower().isin(["nan", "none"]).to_numpy(),
+            text.str.contains(r"[A-Za-z]").to_numpy(),
+            foreign.to_numpy() & (digits.str.len().to_numpy() < 8),
+            foreign.to_numpy() & (digits.str.len().to_numpy() > 15),
+            foreign.to_numpy() & digits.str.startswith("0").to_numpy(),
+            foreign.to_numpy(),
+            size > length,
+            # A subscriber number on its own has six to eight digits
+            (size >= length - 4) & (size < length),
+            size < length,
+            bad_area.to_numpy(),
+        ]
+        reasons = np.select(
+            conditions,
+            [EMPTY, NOT_A_NUMBER, TOO_SHORT, TOO_LONG, BAD_COUNTRY_CODE, "", TOO_LONG, NO_AREA_CODE, TOO_SHORT, BAD_AREA_CODE],
+            default="",
+        ).astype(object)
+        e164 = np.where(foreign.to_numpy(), digits.to_numpy(dtype=object), (code + mobile + national).to_numpy(dtype=object))
+        return np.where(reasons == "", e164, None), reasons
+
+    def normalize_column(self, numbers: pd.Series) -> pd.DataFrame:
+        """
+        Normalizes a column of phone numbers.
+
+        Only distinct values that are not cached yet are parsed.
+
+        Args:
+            numbers (pd.Series): The raw numbers, as text or numbers.
+
+        Returns:
+            pd.DataFrame: `e164` (digits without the +, None if rejected) and `reason`
+                ("" if valid) per row, aligned with `numbers`.
+        """
+        codes, uniques = pd.factorize(numbers.astype(object), use_na_sentinel=True)
+        keys: list[str | None] = [_key(value) for value in uniques]
+        missing: list[str] = list({key for key in keys if key is not None and key not in self._cache})
+        if missing:
+            e164, reasons = self._normalize(pd.Series(missing, dtype=object))
+            self._remember(missing, e164.tolist(), reasons.tolist())
+        resolved = [self._cache.get(key, (None, EMPTY)) if key is not None else (None, EMPTY) for key in keys]
+        e164 = np.array([value for value, _ in resolved] + [None], dtype=object)
+        reasons = np.array([reason for _, reason in resolved] + [EMPTY], dtype=object)
+        # factorize marks missing values with -1, which picks the trailing EMPTY entry
+        return pd.DataFrame({"e164": e164[codes], "reason": reasons[codes]}, index=numbers.index)
+
+    def keys(self, numbers: pd.Series, e164: pd.Series | None = None) -> pd.Series:
+        """
+        Returns the key each number is grouped and looked up by.
+
+        Args:
+            numbers (pd.Series): The raw numbers.
+            e164 (pd.Series, optional): Their `normalize_column` E.164 values, if
+                already known. Defaults to normalizing `numbers`.
+
+        Returns:
+            pd.Series: "+" and the E.164 digits of valid numbers and the raw text of
+                the others, so "0351 15-788-5067" and "3517885067" share the key
+                "+5493517885067".
+        """
+        if e164 is None:
+            e164 = self.normalize_column(numbers)["e164"]
+        return ("+" + e164).where(e164.notna(), numbers.astype(str)).astype(str)
+
+    def key(self, number) -> str:
+        """
+        Returns the key of one number, see `keys`.
+
+        Args:
+            number: The raw number.
+
+        Returns:
+            str: The key.
+        """
+        e164, _ = self.normalize(number)
+        return f"+{e164}" if e164 is not None else str(number)
+
+    def normalize(self, number) -> tuple[str | None, str]:
+        """
+        Normalizes one phone number, from the cache when it was seen before.
+
+        Args:
+            number: The raw number.
+
+        Returns:
+            tuple[str | None, str]: The E.164 digits without the + (None if rejected)
+                and the reason code ("" if valid).
+        """
+        key = _key(number)
+        if key is None:
+            return None, EMPTY
+        if key not in self._cache:
+            e164, reasons = self._normalize(pd.Series([key], dtype=object))
+            self._remember([key], e164.tolist(), reasons.tolist())
+        return self._cache[key]
+
+    def _remember(self, keys: list[str], e164: list[str | None], reasons: list[str]) -> None:
+        self._cache.update(zip(keys, zip(e164, reasons)))
+        # Keys (see `keys`) are passed back in as recipients; they normalize to themselves
+        self._cache.update((f"+{value}", (value, "")) for value in e164 if value is not None)
+
+
+def _drop(text: pd.Series, count: int) -> pd.Series:
+    # An explicit stop keeps Arrow slicing in compiled code; an open one falls back to Python
+    return text.str.slice(count, count + 64)
+
+
+def _key(value) -> str | None:
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+_rules: PhoneRules | None = None
+
+
+def default_rules() -> PhoneRules:
+    """
+    Returns the rules used for the recipient table, Argentina's unless configured.
+
+    Returns:
+        PhoneRules: The rules.
+    """
+    global _rules
+    if _rules is None:
+        _rules = PhoneRules()
+    return _rules
+
+
+def configure(rules: PhoneRules) -> None:
+    """
+    Replaces the default rules, e.g. to set a default area code.
+
+    Args:
+        rules (PhoneRules): The new rules.
+    """
+    global _rules
+    _rules = rules
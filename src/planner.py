@@ -0,0 +1,261 @@
+from datetime import date, datetime
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from phone import default_rules
+
+# Days before expiry on which a reminder is sent
+DEFAULT_LEAD_DAYS: tuple[int, ...] = (2,)
+
+# Days after a missed send date on which the reminder is still sent; 0 sends
+# only on the send date itself
+DEFAULT_CATCH_UP_DAYS: int = 0
+
+# Format used by staff when they type dates into the sheet by hand
+EXPIRE_DATE_FORMAT: str = "%d/%m/%Y"
+
+
+def parse_dates(dates: pd.Series) -> pd.Series:
+    """
+    Parses a date column in a single pass.
+
+    Cells may hold Timestamps, datetimes, `%d/%m/%Y` strings or ISO strings;
+    anything that cannot be parsed becomes NaT.
+
+    Args:
+        dates (pd.Series): The raw date column.
+
+    Returns:
+        pd.Series: The dates as datetime64.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    parsed = pd.to_datetime(dates, format=EXPIRE_DATE_FORMAT, errors="coerce")
+    # Text exported by other tools (CSV, Parquet) is usually ISO formatted
+    retry = parsed.isna() & dates.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(dates[retry].astype(str), format="ISO8601", errors="coerce")
+    return parsed
+
+
+def parse_expire_dates(dates: pd.Series) -> pd.Series:
+    """
+    Parses an expire_date column in a single pass, see `parse_dates`.
+
+    Args:
+        dates (pd.Series): The raw expire_date column.
+
+    Returns:
+        pd.Series: The dates as datetime64, truncated to midnight.
+    """
+    return parse_dates(dates).dt.normalize()
+
+
+class SendPlan:
+    """
+    Which rows are due for a reminder on a given day.
+
+    The plan is computed once per load with column operations. Due-ness only
+    depends on dates, so it stays valid while statuses change; the status
+    filter is applied when the pending rows are requested.
+
+    A row is due on each of its send dates, `lead_days` before expiry. With
+    `catch_up_days` it also stays due for that many days after a send date
+    it missed, e.g. because a run was cut short, as long as it has not
+    expired; `overdue` holds how many days late such a row is, and
+    `send_date` the send date it is due for. A processed status only counts
+    for the send date it was recorded on: a row whose `timestep` precedes
+    its current send date is pending again, so each lead day gets its
+    reminder.
+
+    The WhatsApp numbers are normalized to E.164 on first use of `numbers`,
+    so rows that cannot be sent to are known before a browser is involved.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        today: date | None = None,
+        lead_days: Iterable[int] = DEFAULT_LEAD_DAYS,
+        catch_up_days: int = DEFAULT_CATCH_UP_DAYS,
+    ) -> None:
+        """
+        Args:
+            df (pd.DataFrame): The recipient table.
+            today (date, optional): The day to plan for. Defaults to today.
+            lead_days (Iterable[int], optional): Days before expiry on which to send,
+                e.g. (7, 2, 0). Defaults to (2,).
+            catch_up_days (int, optional): Days a missed send date stays due. Defaults to 0.
+        """
+        self.df: pd.DataFrame = df
+        self.today: date = today or datetime.today().date()
+        self.lead_days: tuple[int, ...] = tuple(sorted(set(lead_days), reverse=True))
+        self.catch_up_days: int = max(0, int(catch_up_days))
+
+        # Bumped whenever rows are re-planned, so caches keyed on the plan can tell
+        self.version: int = 0
+
+        self.expire_date: pd.Series = parse_expire_dates(df["expire_date"])
+        self._numbers: pd.DataFrame | None = None
+        self._keys: pd.Series | None = None
+        self._derive()
+
+    def _derive(self) -> None:
+        self.days_left: pd.Series = (self.expire_date - pd.Timestamp(self.today)).dt.days
+        self.invalid: pd.Series = self.expire_date.isna()
+        # Days since the latest send date of each row, where that is within the
+        # catch-up period and the row has not expired; NaN where nothing is due
+        overdue = pd.Series(float("nan"), index=self.days_left.index)
+        for days in sorted(self.lead_days):
+            late = days - self.days_left
+            catching_up = (late >= 0) & (late <= self.catch_up_days) & (self.days_left >= 0)
+            overdue = overdue.where(~catching_up | (overdue <= late), late)
+        self.overdue: pd.Series = overdue
+        self.due: pd.Series = overdue.notna()
+        self.send_date: pd.Series = pd.Timestamp(self.today) - pd.to_timedelta(overdue, unit="D")
+
+    def refresh(self, positions: Iterable[int]) -> None:
+        """
+        Re-plans rows whose data changed in place.
+
+        Only the expire dates of those rows are parsed again; the derived
+        columns are cheap and are recomputed for the whole table.
+
+        Args:
+            positions (Iterable[int]): The positions of the changed rows.
+        """
+        positions = list(positions)
+        if not positions:
+            return
+        expire = self.expire_date.to_numpy(copy=True)
+        expire[positions] = parse_expire_dates(self.df["expire_date"].iloc[positions]).to_numpy()
+        self.expire_date = pd.Series(expire, index=self.expire_date.index, name="expire_date")
+        self._numbers = None
+        self._keys = None
+        self._derive()
+        self.version += 1
+
+    @property
+    def numbers(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: `e164` and `reason` per row, see `phone.PhoneRules.normalize_column`.
+        """
+        if self._numbers is None:
+            self._numbers = default_rules().normalize_column(self.df["whatsapp_number"])
+        return self._numbers
+
+    @property
+    def keys(self) -> pd.Series:
+        """
+        Returns:
+            pd.Series: The key each row's number is grouped by, its E.164 form where
+                valid, see `phone.PhoneRules.keys`.
+        """
+        if self._keys is None:
+            self._keys = default_rules().keys(self.df["whatsapp_number"], self.numbers["e164"])
+        return self._keys
+
+    def rejected(self, processed: Iterable[str]) -> dict[str, str]:
+        """
+        Returns the pending numbers that cannot be sent to, with the reason.
+
+        Args:
+            processed (Iterable[str]): Lower-cased statuses that mark a row as done.
+
+        Returns:
+            dict[str, str]: The reason code per WhatsApp number, in table order.
+        """
+        reasons = self.numbers["reason"].to_numpy()
+        rows = self.pending_mask(processed).to_numpy() & (reasons != "")
+        numbers = self.df["whatsapp_number"].to_numpy()[rows]
+        return dict(zip(map(str, numbers), reasons[rows]))
+
+    def stale(self, positions: Iterable[int]) -> np.ndarray:
+        """
+        Returns which rows were last updated before the send date they are due for.
+
+        Args:
+            positions (Iterable[int]): The row positions to check.
+
+        Returns:
+            np.ndarray: A boolean per position; False for rows that are not due or
+                have no readable `timestep`.
+        """
+        rows = np.asarray(list(positions), dtype=int)
+        result = np.zeros(len(rows), dtype=bool)
+        if "timestep" not in self.df.columns or not len(rows):
+            return result
+        send_date = self.send_date.to_numpy()[rows]
+        check = ~np.isnat(send_date)
+        if check.any():
+            stamped = parse_dates(self.df["timestep"].iloc[rows[check]]).dt.normalize().to_numpy()
+            result[check] = stamped < send_date[check]
+        return result
+
+    def pending_at(self, positions: Iterable[int], processed: Iterable[str]) -> np.ndarray:
+        """
+        Returns which of some rows are due today and not processed for their send date.
+
+        Args:
+            positions (Iterable[int]): The row positions to check.
+            processed (Iterable[str]): Lower-cased statuses that mark a row as done.
+
+        Returns:
+            np.ndarray: A boolean per position.
+        """
+        rows = np.asarray(list(positions), dtype=int)
+        done = self.df["status"].iloc[rows].str.lower().isin(list(processed)).to_numpy()
+        done &= ~self.stale(rows)
+        return self.due.to_numpy()[rows] & ~done
+
+    def pending_mask(self, processed: Iterable[str]) -> pd.Series:
+        """
+        Returns the rows that are due today and not processed for their send date.
+
+        Args:
+            processed (Iterable[str]): Lower-cased statuses that mark a row as done.
+
+        Returns:
+            pd.Series: A boolean mask aligned with the recipient table.
+        """
+        due = self.due.to_numpy()
+        done = self.df["status"].str.lower().isin(list(processed)).to_numpy()
+        # Only the due rows with a processed status need their timestep parsed
+        recheck = np.flatnonzero(due & done)
+        done[recheck] = ~self.stale(recheck)
+        return pd.Series(due & ~done, index=self.df.index)
+
+    def pending(self, processed: Iterable[str]) -> pd.DataFrame:
+        """
+        Returns the rows that are due today and not processed yet.
+
+        Args:
+            processed (Iterable[str]): Lower-cased statuses that mark a row as done.
+
+        Returns:
+            pd.DataFrame: The pending rows.
+        """
+        return self.df[self.pending_mask(processed)]
+
+    def groups(self, processed: Iterable[str]) -> dict[str, list[int]]:
+        """
+        Groups the pending rows by WhatsApp number, so each number gets one message.
+
+        Numbers are grouped by their E.164 form, so rows that write the same
+        number differently still get a single message.
+
+        Args:
+            processed (Iterable[str]): Lower-cased statuses that mark a row as done.
+
+        Returns:
+            dict[str, list[int]]: The row positions per number key, both in table order.
+        """
+        positions = self.pending_mask(processed).to_numpy().nonzero()[0]
+        numbers = self.keys.iloc[positions].reset_index(drop=True)
+        return {
+            number: positions[rows].tolist()
+            for number, rows in numbers.groupby(numbers, sort=False).indices.items()
+        }
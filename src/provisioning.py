@@ -0,0 +1,130 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+
+# Written next to the Chrome profiles, in the working directory
+PROVISIONING_CACHE: str = "provisioning.json"
+
+
+def chrome_path() -> str | None:
+    """
+    Locates the Google Chrome executable without starting a subprocess.
+
+    Returns:
+        str | None: The path to Chrome, or None if it is not installed.
+    """
+    system: str = platform.system()
+    if system == "Windows":
+        path: str = os.path.join(
+            os.getenv("PROGRAMFILES", "C:\\Program Files"),
+            "Google",
+            "Chrome",
+            "Application",
+            "chrome.exe",
+        )
+        return path if os.path.exists(path) else None
+    if system == "Linux":
+        return shutil.which("google-chrome")
+    return None
+
+
+def _stamp(path: str) -> list[int] | None:
+    # Follows symlinks such as /usr/bin/google-chrome, so an update of the
+    # real binary changes the stamp
+    try:
+        stat = os.stat(os.path.realpath(path))
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def driver_version(driver_path: str) -> str | None:
+    """
+    Returns:
+        str | None: The version reported by `chromedriver --version`, or None.
+    """
+    try:
+        result = subprocess.run(
+            [driver_path, "--version"], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    parts: list[str] = result.stdout.split()
+    return parts[1] if len(parts) > 1 else None
+
+
+def add_to_path(driver_path: str) -> None:
+    """
+    Puts the Chromedriver directory first on PATH, as chromedriver_autoinstaller does.
+
+    Args:
+        driver_path (str): The path to the Chromedriver executable.
+    """
+    directory: str = os.path.dirname(driver_path)
+    if directory not in os.environ.get("PATH", "").split(os.pathsep):
+        os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+
+
+class ProvisioningCache:
+    """
+    Remembers the Chrome and Chromedriver setup that was last verified.
+
+    Each executable is recorded with its path, version and a stamp of its
+    modification time and size. While both stamps still match, the setup is
+    reused without running the version probes; an update of either binary
+    changes its stamp and triggers a full check.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        """
+        Args:
+            path (str, optional): The cache file. Defaults to provisioning.json in the working directory.
+        """
+        self.path: str = path or os.path.join(os.getcwd(), PROVISIONING_CACHE)
+        self.entry: dict = self._read()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entry if isinstance(entry, dict) else {}
+
+    def lookup(self) -> str | None:
+        """
+        Returns the verified Chromedriver path if nothing changed since it was recorded.
+
+        Returns:
+            str | None: The Chromedriver path, or None if the setup must be checked again.
+        """
+        if self.entry.get("platform") != platform.system():
+            return None
+        for name in ("chrome", "driver"):
+            item = self.entry.get(name)
+            if not isinstance(item, dict) or not item.get("path"):
+                return None
+            if _stamp(item["path"]) != item.get("stamp"):
+                return None
+        return self.entry["driver"]["path"]
+
+    def record(self, chrome: str, chrome_version: str | None, driver: str) -> None:
+        """
+        Records a verified setup, replacing the cache file atomically.
+
+        Args:
+            chrome (str): The path to Chrome.
+            chrome_version (str | None): Chrome's version.
+            driver (str): The path to the matching Chromedriver.
+        """
+        self.entry = {
+            "platform": platform.system(),
+            "chrome": {"path": chrome, "version": chrome_version, "stamp": _stamp(chrome)},
+            "driver": {"path": driver, "version": driver_version(driver), "stamp": _stamp(driver)},
+        }
+        tmp_path: str = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entry, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,152 @@
+from typing import Any, Iterable
+
+import pandas as pd
+
+from phone import default_rules
+
+
+class RecipientIndex:
+    """
+    Hash index from WhatsApp number to row positions in the recipient table.
+
+    The index is built once when the data is loaded. Reads and writes go
+    through positional access (`iat`), so looking up or updating a recipient
+    costs the same whether the table has a thousand rows or half a million.
+    Status changes never move rows, so the index stays valid as long as rows
+    are not added or removed; call `rebuild` after reloading the table.
+
+    WhatsApp numbers are keyed by their E.164 form, so the same number
+    written in different ways maps to the same rows.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: str = "whatsapp_number") -> None:
+        """
+        Args:
+            df (pd.DataFrame): The recipient table to index.
+            key (str, optional): The column to index by. Defaults to 'whatsapp_number'.
+        """
+        self.df: pd.DataFrame = df
+        self.key: str = key
+        self._positions: dict[str, list[int]] = {}
+        self._columns: dict[str, int] = {}
+        self._writable: set[str] = set()
+        self.rebuild()
+
+    def normalize_key(self, number: Any) -> str:
+        """
+        Returns the lookup key for a number, so int and str cells match.
+
+        Args:
+            number (Any): The WhatsApp number as read from the table.
+
+        Returns:
+            str: The lookup key; for the WhatsApp number column its E.164 form
+                where it can be normalized, see `phone.PhoneRules.key`.
+        """
+        if self.key == "whatsapp_number":
+            return default_rules().key(number)
+        return str(number)
+
+    def rebuild(self, df: pd.DataFrame | None = None) -> None:
+        """
+        Rebuilds the index, optionally against a new DataFrame.
+
+        Args:
+            df (pd.DataFrame, optional): The new recipient table. Defaults to the current one.
+        """
+        if df is not None:
+            self.df = df
+        column: pd.Series = self.df[self.key]
+        keys: pd.Series = (
+            default_rules().keys(column) if self.key == "whatsapp_number" else column.astype(str)
+        ).reset_index(drop=True)
+        self._positions = {
+            k: positions.tolist()
+            for k, positions in keys.groupby(keys, sort=False).indices.items()
+        }
+        self._columns = {column: i for i, column in enumerate(self.df.columns)}
+        self._writable = set()
+
+    def __contains__(self, number: Any) -> bool:
+        return self.normalize_key(number) in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def rows(self, number: Any) -> list[int]:
+        """
+        Returns the row positions for a number.
+
+        Args:
+            number (Any): The WhatsApp number.
+
+        Raises:
+            KeyError: If the number is not in the table.
+
+        Returns:
+            list[int]: The positions of every row with that number.
+        """
+        return self._positions[self.normalize_key(number)]
+
+    def _column(self, column: str) -> int:
+        if column not in self._columns:
+            self.df[column] = None
+            self._columns[column] = len(self.df.columns) - 1
+        return self._columns[column]
+
+    def get(self, number: Any, column: str, rows: Iterable[int] | None = None) -> Any:
+        """
+        Returns a column value from the first row of a number.
+
+        Args:
+            number (Any): The WhatsApp number.
+            column (str): The column to read.
+            rows (Iterable[int], optional): Read the first of these positions instead.
+
+        Raises:
+            KeyError: If the number or column is not in the table.
+
+        Returns:
+            Any: The cell value.
+        """
+        position: int = next(iter(rows)) if rows else self.rows(number)[0]
+        return self.df.iat[position, self._columns[column]]
+
+    def fields(self, number: Any, columns: Iterable[str]) -> dict[str, Any]:
+        """
+        Returns several column values from the first row of a number.
+
+        Args:
+            number (Any): The WhatsApp number.
+            columns (Iterable[str]): The columns to read.
+
+        Returns:
+            dict[str, Any]: The cell values by column name.
+        """
+        position: int = self.rows(number)[0]
+        return {column: self.df.iat[position, self._columns[column]] for column in columns}
+
+    def set(self, number: Any, column: str, value: Any, rows: Iterable[int] | None = None) -> None:
+        """
+        Sets a column value on the rows of a number.
+
+        Args:
+            number (Any): The WhatsApp number.
+            column (str): The column to write; created if missing.
+            value (Any): The new value.
+            rows (Iterable[int], optional): Write only these positions, e.g. the rows
+                a message was sent for. Defaults to every row of the number.
+
+        Raises:
+            KeyError: If the number is not in the table.
+        """
+        positions: Iterable[int] = self.rows(number) if rows is None else rows
+        column_position: int = self._column(column)
+        if column not in self._writable:
+            # Statuses and dates are mixed with strings, so written columns
+            # are widened to object once instead of on every write
+            if self.df[column].dtype != object:
+                self.df[column] = self.df[column].astype(object)
+            self._writable.add(column)
+        for position in positions:
+            self.df.iat[position, column_position] = value
@@ -0,0 +1,203 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from journal import open_journal
+from loader import read_recipients
+from store import is_store_path, open_store
+
+
+def _signature(file_path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns a stable key per row: the WhatsApp number and its occurrence.
+
+    A number can appear on several rows (one per vehicle), so the n-th row
+    of a number is keyed as "<number>#<n>".
+
+    Args:
+        df (pd.DataFrame): The recipient table.
+
+    Returns:
+        pd.Series: The row keys, aligned with the table.
+    """
+    numbers = df["whatsapp_number"].astype(str)
+    return numbers + "#" + numbers.groupby(numbers).cumcount().astype(str)
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns a content hash per row over all columns.
+
+    Args:
+        df (pd.DataFrame): The recipient table.
+
+    Returns:
+        np.ndarray: One uint64 hash per row.
+    """
+    return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+
+def _statuses(df: pd.DataFrame) -> np.ndarray:
+    return df["status"].fillna("").astype(str).str.strip().to_numpy(dtype=object)
+
+
+class WorkbookReloader:
+    """
+    Reloads the recipient file only as far as it changed.
+
+    The file's mtime and size are checked first, so an untouched file is not
+    parsed at all. When it did change, each row is hashed and compared, by
+    row key, with the version read last time; only the edited rows are
+    merged into the in-memory table. Statuses in the send journal that have
+    not been written to the file yet are replayed over the merged rows, so
+    they are never overwritten by the older values on disk, unless the status
+    cell itself was edited in the file; the edit then wins.
+    """
+
+    def __init__(self, file_path: str, df: pd.DataFrame, sheet_name: str = "Sheet1") -> None:
+        """
+        Args:
+            file_path (str): The recipient file.
+            df (pd.DataFrame): The table as loaded from it.
+            sheet_name (str, optional): The sheet to read from a workbook. Defaults to 'Sheet1'.
+        """
+        self.file_path: str = file_path
+        self.sheet_name: str = sheet_name
+        # Rows merged by `merge` that the next `reload` still has to report
+        self.merged: list[int] = []
+        self._track(df)
+        _reloaders[os.path.abspath(file_path)] = self
+
+    def _track(self, df: pd.DataFrame) -> None:
+        self.signature: tuple[int, int] | None = _signature(self.file_path)
+        self.columns: list[str] = list(df.columns)
+        self.keys: pd.Series = row_keys(df)
+        self.hashes: np.ndarray = row_hashes(df)
+        # The status each row has in the file; None where journaled statuses were
+        # replayed over it, so the value on disk is not known
+        self.statuses: np.ndarray = _statuses(df)
+        self.statuses[open_journal(self.file_path).touched(df)] = None
+
+    def changed(self) -> bool:
+        """
+        Returns:
+            bool: True if the file's mtime or size differ from the last read.
+        """
+        return _signature(self.file_path) != self.signature
+
+    def reload(self, df: pd.DataFrame) -> tuple[pd.DataFrame, list[int] | None]:
+        """
+        Brings the in-memory table up to date with the file.
+
+        Args:
+            df (pd.DataFrame): The in-memory table; edited rows are updated in place.
+
+        Returns:
+            tuple[pd.DataFrame, list[int] | None]: The up-to-date table and the
+                positions of the merged rows, including rows merged by `merge`
+                since the last reload. The positions are None when rows were
+                added, removed or reordered, or columns changed; the returned
+                table is then a new one and indexes must be rebuilt.
+        """
+        if is_store_path(self.file_path):
+            # The store is written on every status change, so it is always current
+            return open_store(self.file_path).load(), None
+
+        merged, self.merged = self.merged, []
+        if not self.changed():
+            return df, merged
+
+        fresh = self._read()
+        if not self._same_rows(fresh):
+            open_journal(self.file_path).replay(fresh)
+            self._track(fresh)
+            return fresh, None
+        return df, sorted(set(merged) | set(self._merge(df, fresh)))
+
+    def merge(self, df: pd.DataFrame) -> bool:
+        """
+        Merges edits of the file into the table in place, if that is possible.
+
+        Used before the table is written back, so edits made meanwhile are not
+        overwritten. The merged positions are reported by the next `reload`.
+
+        Args:
+            df (pd.DataFrame): The in-memory table; edited rows are updated in place.
+
+        Returns:
+            bool: False if rows were added, removed or reordered, or columns changed;
+                the file is then left to the next `reload`.
+        """
+        if is_store_path(self.file_path) or not self.changed():
+            return True
+        fresh = self._read()
+        if not self._same_rows(fresh):
+            return False
+        self.merged.extend(self._merge(df, fresh))
+        return True
+
+    def saved(self, df: pd.DataFrame) -> None:
+        """
+        Records that the table was written to the file, so it is not read back as an edit.
+
+        Args:
+            df (pd.DataFrame): The table as written.
+        """
+        self._track(df)
+
+    def _read(self) -> pd.DataFrame:
+        fresh = read_recipients(self.file_path, sheet_name=self.sheet_name)
+        if "status" not in fresh.columns:
+            fresh["status"] = ""
+        return fresh
+
+    def _same_rows(self, fresh: pd.DataFrame) -> bool:
+        return list(fresh.columns) == self.columns and row_keys(fresh).equals(self.keys)
+
+    def _merge(self, df: pd.DataFrame, fresh: pd.DataFrame) -> list[int]:
+        hashes = row_hashes(fresh)
+        positions: list[int] = np.flatnonzero(hashes != self.hashes).tolist()
+        statuses = _statuses(fresh)
+        known = np.not_equal(self.statuses, None)
+        # A status edited in the file is not overwritten by an older journal record
+        edited: list[int] = np.flatnonzero(known & (statuses != self.statuses)).tolist()
+        self.signature = _signature(self.file_path)
+        self.hashes = hashes
+        self.statuses = statuses
+        if not positions:
+            return []
+
+        rows = fresh.iloc[positions].copy()
+        open_journal(self.file_path).replay(rows, skip=edited)
+        for name in fresh.columns:
+            values = rows[name]
+            if values.dtype != df[name].dtype:
+                df[name] = df[name].astype(object)
+                values = values.astype(object)
+            df.iloc[positions, df.columns.get_loc(name)] = values.to_numpy()
+        return positions
+
+
+_reloaders: dict[str, WorkbookReloader] = {}
+
+
+def reloader_for(file_path: str) -> WorkbookReloader | None:
+    """
+    Returns the reloader that tracks a recipient file, if one was created.
+
+    Args:
+        file_path (str): The recipient file.
+
+    Returns:
+        WorkbookReloader | None: The latest reloader for the file.
+    """
+    return _reloaders.get(os.path.abspath(file_path))
@@ -0,0 +1,255 @@
+import random
+import threading
+import time
+from typing import Callable
+
+# Failure classes: worth retrying, never worth retrying, and failures of the
+# browser session rather than of the row
+TRANSIENT: str = "transient"
+PERMANENT: str = "permanent"
+SESSION: str = "session"
+
+# Status of a row whose last attempt failed transiently; it stays pending
+RETRY_STATUS: str = "Retry"
+
+MAX_ATTEMPTS: int = 3
+
+# Consecutive session failures that pause sending, and for how long
+BREAKER_THRESHOLD: int = 3
+BREAKER_COOLDOWN: float = 300.0
+
+# Messages of WebDriver errors that mean the browser or its driver is gone
+_SESSION_MESSAGES: tuple[str, ...] = (
+    "invalid session id",
+    "disconnected",
+    "not reachable",
+    "no such window",
+    "target window already closed",
+    "session deleted",
+)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a send is attempted while the circuit breaker is open.
+    """
+
+
+def classify(error: BaseException) -> str:
+    """
+    Sorts a send failure into TRANSIENT, PERMANENT or SESSION.
+
+    Timeouts and elements that went stale, missing or covered are transient.
+    An invalid number is permanent, as is any error outside the browser
+    (bad data, a template problem), since a retry would fail the same way.
+    A logged-out page, a dead browser or page markup that no selector
+    matches any more is a session failure, since every row would hit it;
+    a selector miss only counts as such once it repeated, see
+    `selector_registry.SelectorNotFoundError`.
+
+    Args:
+        error (BaseException): The exception raised while sending.
+
+    Returns:
+        str: The failure class.
+    """
+    from selenium.common.exceptions import (
+        ElementClickInterceptedException,
+        ElementNotInteractableException,
+        InvalidSessionIdException,
+        NoSuchElementException,
+        NoSuchWindowException,
+        StaleElementReferenceException,
+        TimeoutException,
+        WebDriverException,
+    )
+
+    from selector_registry import SelectorNotFoundError
+    from session import InvalidNumberError, LoggedOutError
+
+    if isinstance(error, InvalidNumberError):
+        return PERMANENT
+    if isinstance(error, SelectorNotFoundError):
+        # One miss may be a slow page; every fallback missing repeatedly is broken markup
+        return SESSION if error.repeated else TRANSIENT
+    if isinstance(error, (LoggedOutError, InvalidSessionIdException, NoSuchWindowException)):
+        return SESSION
+    if isinstance(
+        error,
+        (
+            TimeoutException,
+            StaleElementReferenceException,
+            NoSuchElementException,
+            ElementNotInteractableException,
+            ElementClickInterceptedException,
+        ),
+    ):
+        return TRANSIENT
+    if isinstance(error, WebDriverException):
+        message: str = (error.msg or "").lower()
+        return SESSION if any(text in message for text in _SESSION_MESSAGES) else TRANSIENT
+    if isinstance(error, ConnectionError) or type(error).__module__.startswith("urllib3"):
+        # chromedriver itself stopped answering
+        return SESSION
+    return PERMANENT
+
+
+class RetryPolicy:
+    """
+    How often a transient failure is retried, and how long to wait in between.
+
+    The wait doubles with every attempt up to a cap. Half of it is fixed
+    and half is random, so sessions that failed together do not retry in
+    lockstep.
+    """
+
+    def __init__(
+        self,
+        attempts: int = MAX_ATTEMPTS,
+        base: float = 2.0,
+        cap: float = 60.0,
+        rng: random.Random | None = None,
+    ) -> None:
+        """
+        Args:
+            attempts (int, optional): Attempts per row, the first included. Defaults to 3.
+            base (float, optional): Seconds of the first wait. Defaults to 2.
+            cap (float, optional): Longest wait in seconds. Defaults to 60.
+            rng (random.Random, optional): Source of the jitter. Defaults to the shared one.
+        """
+        self.attempts: int = max(1, attempts)
+        self.base: float = base
+        self.cap: float = cap
+        self.rng: random.Random = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """
+        Args:
+            attempt (int): The number of attempts made so far, at least 1.
+
+        Returns:
+            float: Seconds to wait before the next attempt.
+        """
+        ceiling: float = min(self.cap, self.base * 2 ** max(0, attempt - 1))
+        return ceiling / 2 + self.rng.uniform(0, ceiling / 2)
+
+
+class CircuitBreaker:
+    """
+    Pauses sending after consecutive session-level failures.
+
+    While closed every send is allowed. `threshold` session failures in a
+    row open it, and sends are refused for `cooldown` seconds. After that
+    it is half-open: the next send is a trial, which closes the breaker on
+    success and opens it again on another session failure. Transient and
+    permanent failures neither count nor reset the streak. The breaker is
+    safe to share between sender threads.
+    """
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_THRESHOLD,
+        cooldown: float = BREAKER_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            threshold (int, optional): Consecutive session failures that open it. Defaults to 3.
+            cooldown (float, optional): Seconds it stays open. Defaults to 300.
+            clock (Callable[[], float], optional): Time source. Defaults to time.monotonic.
+        """
+        self.threshold: int = max(1, threshold)
+        self.cooldown: float = cooldown
+        self.clock = clock
+        self.failures: int = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        Returns:
+            str: 'closed', 'open' or 'half-open'.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "open" if self.clock() - self.opened_at < self.cooldown else "half-open"
+
+    def allow(self) -> bool:
+        """
+        Returns:
+            bool: False while the breaker is open.
+        """
+        return self.state != "open"
+
+    def remaining(self) -> float:
+        """
+        Returns:
+            float: Seconds until an open breaker becomes half-open; 0 otherwise.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (self.clock() - self.opened_at))
+
+    def record(self, failure: str | None) -> None:
+        """
+        Records the outcome of a send.
+
+        Args:
+            failure (str | None): The failure class, or None for a success.
+        """
+        with self._lock:
+            if failure is None:
+                self.failures, self.opened_at = 0, None
+            elif failure == SESSION:
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= self.threshold:
+                    # A failed half-open trial opens it again for a full cooldown
+                    self.opened_at = self.clock()
+
+    def reset(self) -> None:
+        """
+        Closes the breaker, e.g. after the user logged in again.
+        """
+        self.record(None)
+
+
+def send_with_retry(
+    send: Callable[[], str | None],
+    attempts: Callable[[], int],
+    policy: RetryPolicy,
+    breaker: CircuitBreaker | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> str | None:
+    """
+    Sends one message, retrying transient failures with backoff.
+
+    Args:
+        send (Callable[[], str | None]): Makes one attempt and returns its failure
+            class, or None if it succeeded or was skipped.
+        attempts (Callable[[], int]): Returns the attempts recorded for the row so far.
+        policy (RetryPolicy): The retry limits and waits.
+        breaker (CircuitBreaker, optional): Checked before, and told after, every attempt.
+        sleep (Callable[[float], None], optional): Waits between attempts. Defaults to time.sleep.
+
+    Raises:
+        CircuitOpenError: If the breaker is open before an attempt.
+
+    Returns:
+        str | None: The failure class of the last attempt, or None.
+    """
+    while True:
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(
+                f"Sending is paused for {breaker.remaining():.0f}s after "
+                f"{breaker.failures} consecutive session failures."
+            )
+        failure = send()
+        if breaker is not None:
+            breaker.record(failure)
+        made: int = attempts()
+        if failure != TRANSIENT or made >= policy.attempts:
+            return failure
+        sleep(policy.delay(made))
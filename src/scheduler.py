@@ -0,0 +1,176 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from planner import SendPlan
+
+# Seconds per message assumed for a projection before any message was timed
+DEFAULT_SECONDS_PER_MESSAGE: float = 15.0
+
+
+def deadline_order(entries: Iterable[tuple[str, int, int, int]]) -> list[str]:
+    """
+    Orders due WhatsApp numbers by deadline instead of by table order.
+
+    The number whose vehicle expires soonest comes first; among equal
+    deadlines the one whose send date is furthest behind (caught up from an
+    earlier day) goes before one that is on time, and table order breaks the
+    remaining ties. A run that is cut short therefore leaves the reminders
+    with the most lead time unsent.
+
+    Args:
+        entries (Iterable[tuple[str, int, int, int]]): Number, days left until
+            expiry, days overdue and table position of each due number.
+
+    Returns:
+        list[str]: The numbers in send order.
+    """
+    ranked = sorted(
+        (days_left, -overdue, position, number) for number, days_left, overdue, position in entries
+    )
+    return [number for _, _, _, number in ranked]
+
+
+def plan_order(plan: SendPlan, groups: dict[str, list[int]]) -> list[str]:
+    """
+    Orders the due rows of each number by deadline, see `deadline_order`.
+
+    A number with several due rows is ranked by its most urgent one.
+
+    Args:
+        plan (SendPlan): The send plan.
+        groups (dict[str, list[int]]): The due row positions per number, see `SendPlan.groups`.
+
+    Returns:
+        list[str]: The numbers in send order.
+    """
+    days_left = plan.days_left.to_numpy()
+    overdue = plan.overdue.fillna(0).to_numpy()
+    return deadline_order(
+        (number, int(days_left[positions].min()), int(overdue[positions].max()), positions[0])
+        for number, positions in groups.items()
+    )
+
+
+class SendRate:
+    """
+    Moving estimate of the seconds one message takes, retries and waits included.
+
+    Samples are smoothed like the chat-open estimate in `session`, so a slow
+    message moves the projection without dominating it. Recording is safe
+    from several sender threads.
+    """
+
+    def __init__(self, initial: float = DEFAULT_SECONDS_PER_MESSAGE) -> None:
+        """
+        Args:
+            initial (float, optional): Seconds per message assumed before the first
+                sample. Defaults to 15.
+        """
+        self.initial: float = initial
+        self.mean: float | None = None
+        self.samples: int = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """
+        Adds the duration of one message.
+
+        Args:
+            seconds (float): The measured seconds.
+        """
+        with self._lock:
+            self.mean = seconds if self.mean is None else 0.8 * self.mean + 0.2 * seconds
+            self.samples += 1
+
+    @property
+    def measured(self) -> bool:
+        """
+        Returns:
+            bool: True once a message has been timed.
+        """
+        return self.mean is not None
+
+    def seconds_per_message(self, min_interval: float = 0.0) -> float:
+        """
+        Args:
+            min_interval (float, optional): The minimum seconds between two messages
+                of a session, which bounds the rate. Defaults to 0.
+
+        Returns:
+            float: The expected seconds per message of one session.
+        """
+        with self._lock:
+            mean: float = self.initial if self.mean is None else self.mean
+        return max(mean, min_interval)
+
+    def projected_completion(
+        self,
+        remaining: int,
+        sessions: int = 1,
+        min_interval: float = 0.0,
+        now: datetime | None = None,
+    ) -> datetime:
+        """
+        Returns when the remaining messages are expected to be sent.
+
+        Args:
+            remaining (int): The messages still queued.
+            sessions (int, optional): Sessions sending in parallel. Defaults to 1.
+            min_interval (float, optional): See `seconds_per_message`. Defaults to 0.
+            now (datetime, optional): The starting time. Defaults to now.
+
+        Returns:
+            datetime: The projected completion time.
+        """
+        seconds: float = remaining * self.seconds_per_message(min_interval) / max(1, sessions)
+        return (now or datetime.now()) + timedelta(seconds=seconds)
+
+    def timer(self) -> "_Timing":
+        """
+        Returns:
+            _Timing: A context manager that records the duration of its block
+                unless the block raised or called `discard`.
+        """
+        return _Timing(self)
+
+
+class _Timing:
+    __slots__ = ("rate", "started", "counted")
+
+    def __init__(self, rate: SendRate) -> None:
+        self.rate = rate
+        self.started: float = 0.0
+        self.counted: bool = True
+
+    def discard(self) -> None:
+        """
+        Leaves this block out of the estimate, e.g. a send that never opened a chat.
+        """
+        self.counted = False
+
+    def __enter__(self) -> "_Timing":
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        # A send refused outright (e.g. by the circuit breaker) says nothing about the rate
+        if exc_type is None and self.counted:
+            self.rate.record(time.monotonic() - self.started)
+
+
+_rate: SendRate | None = None
+
+
+def send_rate() -> SendRate:
+    """
+    Returns the send rate shared by the menu, the sender pool and the daemon.
+
+    Returns:
+        SendRate: The estimate.
+    """
+    global _rate
+    if _rate is None:
+        _rate = SendRate()
+    return _rate
@@ -0,0 +1,273 @@
+import time
+import weakref
+from typing import Any, Iterable
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+# Seconds a target may stay unmatched once its anchor is on the page, unless
+# the caller sizes it from measured latencies; parts of a chat can render a
+# few seconds after its header on a slow machine or network
+FAIL_FAST: float = 3.0
+
+# Consecutive misses after which every fallback of a target is taken to be
+# broken, rather than the page being slow
+MISS_THRESHOLD: int = 3
+
+# Seconds between two checks while waiting
+POLL_INTERVAL: float = 0.05
+
+# Named page elements, each with selectors tried in order until one matches:
+# CSS first, then relative XPath, then aria attributes that survive class renames
+TARGETS: dict[str, list[tuple[str, str]]] = {
+    "compose_box": [
+        (By.CSS_SELECTOR, 'footer div[contenteditable="true"]'),
+        (By.XPATH, '//div[@id="main"]//div[@contenteditable="true"][@role="textbox"]'),
+        (By.CSS_SELECTOR, '#main [contenteditable="true"][aria-label*="mensaje" i]'),
+        (By.CSS_SELECTOR, '#main [contenteditable="true"][aria-label*="message" i]'),
+    ],
+    "chat_header": [
+        (By.CSS_SELECTOR, "#main header"),
+        (By.XPATH, '//div[@id="main"]//header'),
+    ],
+    "search_box": [
+        (By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'),
+        (By.CSS_SELECTOR, '#side div[contenteditable="true"]'),
+        (By.CSS_SELECTOR, '[contenteditable="true"][aria-label*="buscar" i]'),
+        (By.CSS_SELECTOR, '[contenteditable="true"][aria-label*="search" i]'),
+    ],
+    "chat_list": [
+        (By.CSS_SELECTOR, "#pane-side"),
+        (By.CSS_SELECTOR, '[aria-label*="lista de chats" i], [aria-label*="chat list" i]'),
+    ],
+    "login_qr": [
+        (By.CSS_SELECTOR, "div[data-ref] canvas, canvas[aria-label]"),
+    ],
+    "invalid_number": [
+        (
+            By.XPATH,
+            '//div[@data-animate-modal-popup="true"]'
+            '//*[contains(text(), "invalid") or contains(text(), "inválido")]',
+        ),
+        (By.CSS_SELECTOR, '[role="dialog"] [data-animate-modal-body="true"]'),
+    ],
+}
+
+
+class SelectorNotFoundError(WebDriverException):
+    """
+    Raised when a target matches none of its selectors although the page has rendered.
+
+    A single miss may be a slow page. When `repeated` is set, every selector
+    of the targets missed `MISS_THRESHOLD` times in a row, which usually means
+    WhatsApp changed its markup and the selectors in TARGETS need updating.
+    """
+
+    def __init__(self, msg: str, repeated: bool = False) -> None:
+        super().__init__(msg)
+        self.repeated: bool = repeated
+
+
+class SelectorRegistry:
+    """
+    Finds named page elements through ordered fallback selectors.
+
+    The selector that last matched a target is tried first next time, and
+    element handles are kept per driver and reused while they are still
+    attached to the page. While a page is loading only the preferred
+    selector is polled; once the target's anchor element is present every
+    selector is tried, and a target still missing after `grace` seconds
+    raises SelectorNotFoundError instead of running into the full timeout.
+    Consecutive misses are counted per target, so the error can tell a
+    slow page from markup that no selector matches any more.
+    """
+
+    def __init__(
+        self,
+        targets: dict[str, list[tuple[str, str]]] | None = None,
+        grace: float = FAIL_FAST,
+        poll_interval: float = POLL_INTERVAL,
+    ) -> None:
+        """
+        Args:
+            targets (dict[str, list[tuple[str, str]]], optional): Selectors per target name.
+                Defaults to TARGETS.
+            grace (float, optional): Seconds a target may be missing once its anchor is
+                present. Defaults to 3.
+            poll_interval (float, optional): Seconds between checks while waiting. Defaults to 0.05.
+        """
+        self.targets: dict[str, list[tuple[str, str]]] = {
+            name: list(selectors) for name, selectors in (targets or TARGETS).items()
+        }
+        self.grace: float = grace
+        self.poll_interval: float = poll_interval
+        self.preferred: dict[str, int] = {}
+        self.hits: dict[tuple[str, int], int] = {}
+        self.misses: dict[str, int] = {}
+        self._handles: "weakref.WeakKeyDictionary[Any, dict[str, WebElement]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def selectors(self, name: str) -> list[tuple[str, str]]:
+        """
+        Returns:
+            list[tuple[str, str]]: The selectors of a target, the one that last matched first.
+
+        Raises:
+            KeyError: If the target is not registered.
+        """
+        selectors = self.targets[name]
+        first: int = self.preferred.get(name, 0)
+        return [selectors[first]] + selectors[:first] + selectors[first + 1:]
+
+    def _cached(self, driver: WebDriver, name: str) -> WebElement | None:
+        element = self._handles.get(driver, {}).get(name)
+        if element is None:
+            return None
+        try:
+            element.is_displayed()
+            return element
+        except Exception:
+            # Detached from the page (stale) or the browser went away
+            self._handles[driver].pop(name, None)
+            return None
+
+    def find(self, driver: WebDriver, name: str, fallback: bool = True) -> WebElement | None:
+        """
+        Returns the element of a target, or None if it is not on the page.
+
+        Args:
+            driver (WebDriver): The WebDriver instance.
+            name (str): The target name.
+            fallback (bool, optional): Try every selector rather than only the preferred
+                one. Defaults to True.
+
+        Returns:
+            WebElement | None: The element.
+        """
+        element = self._cached(driver, name)
+        if element is not None:
+            return element
+        selectors = self.selectors(name) if fallback else self.selectors(name)[:1]
+        for by, value in selectors:
+            elements = driver.find_elements(by, value)
+            if elements:
+                position: int = self.targets[name].index((by, value))
+                self.preferred[name] = position
+                self.hits[(name, position)] = self.hits.get((name, position), 0) + 1
+                self.misses[name] = 0
+                self._handles.setdefault(driver, {})[name] = elements[0]
+                return elements[0]
+        return None
+
+    def present(self, driver: WebDriver, name: str) -> bool:
+        """
+        Returns:
+            bool: True if the target is on the page; every selector is tried.
+        """
+        return self.find(driver, name) is not None
+
+    def wait_any(
+        self,
+        driver: WebDriver,
+        names: Iterable[str],
+        timeout: float,
+        anchor: str | None = None,
+        grace: float | None = None,
+    ) -> tuple[str, WebElement]:
+        """
+        Waits until one of several targets is on the page.
+
+        Args:
+            driver (WebDriver): The WebDriver instance.
+            names (Iterable[str]): The targets, in order of precedence.
+            timeout (float): Seconds to wait.
+            anchor (str, optional): A target that shows the page has rendered; once it
+                is present, the targets must appear within `grace` seconds.
+            grace (float, optional): Overrides the registry's grace period, e.g. sized
+                from the session's measured chat-open latency.
+
+        Raises:
+            SelectorNotFoundError: If the anchor is present but no target matched in time;
+                `repeated` is set once every target has missed MISS_THRESHOLD times in a row.
+            TimeoutException: If nothing matched within the timeout.
+
+        Returns:
+            tuple[str, WebElement]: The target that matched and its element.
+        """
+        names = list(names)
+        grace = self.grace if grace is None else grace
+        deadline: float = time.monotonic() + timeout
+        anchored_at: float | None = None
+        while True:
+            # Every selector is only worth trying once the page has rendered
+            settled: bool = anchor is None or anchored_at is not None
+            for name in names:
+                element = self.find(driver, name, fallback=settled)
+                if element is not None:
+                    return name, element
+
+            now: float = time.monotonic()
+            if anchor is not None and anchored_at is None and self.find(driver, anchor, fallback=False):
+                anchored_at = now
+                continue
+            if anchored_at is not None and now - anchored_at >= grace:
+                for name in names:
+                    self.misses[name] = self.misses.get(name, 0) + 1
+                repeated: bool = min(self.misses[name] for name in names) >= MISS_THRESHOLD
+                raise SelectorNotFoundError(
+                    f"None of the selectors for {', '.join(names)} matched within {grace:.1f}s "
+                    f"although '{anchor}' is on the page"
+                    + ("; WhatsApp Web may have changed its markup." if repeated else "."),
+                    repeated,
+                )
+            if now >= deadline:
+                raise TimeoutException(f"None of {', '.join(names)} appeared within {timeout:.1f}s.")
+            time.sleep(self.poll_interval)
+
+    def wait(
+        self,
+        driver: WebDriver,
+        name: str,
+        timeout: float,
+        anchor: str | None = None,
+        grace: float | None = None,
+    ) -> WebElement:
+        """
+        Waits until a target is on the page, see `wait_any`.
+
+        Returns:
+            WebElement: The element.
+        """
+        return self.wait_any(driver, [name], timeout, anchor, grace)[1]
+
+    def forget(self, driver: WebDriver) -> None:
+        """
+        Drops the element handles of a driver, e.g. after it loaded a new page.
+        """
+        self._handles.pop(driver, None)
+
+    def report(self) -> dict[str, tuple[str, str]]:
+        """
+        Returns:
+            dict[str, tuple[str, str]]: The selector that last matched, per target.
+        """
+        return {name: self.targets[name][position] for name, position in self.preferred.items()}
+
+
+_registry: SelectorRegistry | None = None
+
+
+def default_registry() -> SelectorRegistry:
+    """
+    Returns the shared registry over TARGETS, creating it on first use.
+
+    Returns:
+        SelectorRegistry: The registry.
+    """
+    global _registry
+    if _registry is None:
+        _registry = SelectorRegistry()
+    return _registry
@@ -0,0 +1,200 @@
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+from colorama import Fore
+
+from retry import CircuitOpenError
+
+# Upper bound on parallel browser sessions, regardless of what is requested
+MAX_SESSIONS: int = 4
+
+
+def profile_dir_for(slot: int, root: str | None = None) -> str:
+    """
+    Returns the Chrome user-data directory for a session slot.
+
+    Slot 0 keeps the original `chrome_user_data` directory so the existing
+    login is reused; other slots get their own numbered directory.
+
+    Args:
+        slot (int): The session slot.
+        root (str, optional): The directory holding the profiles. Defaults to the working directory.
+
+    Returns:
+        str: The user-data directory.
+    """
+    name: str = "chrome_user_data" if slot == 0 else f"chrome_user_data_{slot}"
+    return os.path.join(root or os.getcwd(), name)
+
+
+class RateLimiter:
+    """
+    Spaces out sends from a single session by a minimum interval.
+    """
+
+    def __init__(self, min_interval: float) -> None:
+        """
+        Args:
+            min_interval (float): The minimum seconds between two sends.
+        """
+        self.min_interval: float = min_interval
+        self._next: float = 0.0
+
+    def wait(self) -> None:
+        """
+        Blocks until the session may send again.
+        """
+        now: float = time.monotonic()
+        if now < self._next:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.min_interval
+
+
+class SenderPool:
+    """
+    Sends messages through several logged-in WhatsApp sessions in parallel.
+
+    Each session owns one driver, with its own Chrome profile, and one worker
+    thread. Workers pull recipients from a shared queue, so a slow session
+    simply takes fewer of them. Outcomes are written back by the `send`
+    callable, which must be safe to call from several threads. Workers stop
+    taking recipients while the circuit breaker, if given, refuses sends.
+    """
+
+    def __init__(
+        self,
+        driver_factory: Callable[[str], Any],
+        send: Callable[[Any, str], None],
+        login_check: Callable[[Any], bool],
+        sessions: int,
+        min_interval: float = 0.0,
+        drivers: Iterable[Any] = (),
+        breaker: Any = None,
+    ) -> None:
+        """
+        Args:
+            driver_factory (Callable[[str], Any]): Starts a driver for a user-data directory.
+            send (Callable[[Any, str], None]): Sends and records the message for a recipient.
+            login_check (Callable[[Any], bool]): Returns True if a driver is logged in; it is
+                called for every session before each run, so it should answer quickly.
+            sessions (int): The number of sessions to run, capped at MAX_SESSIONS.
+            min_interval (float, optional): Minimum seconds between sends of one session. Defaults to 0.
+            drivers (Iterable[Any], optional): Already running drivers to use for the first slots.
+            breaker (CircuitBreaker, optional): Checked with `allow()` before each recipient.
+        """
+        self.driver_factory = driver_factory
+        self.send = send
+        self.login_check = login_check
+        self.sessions: int = max(1, min(sessions, MAX_SESSIONS))
+        self.min_interval: float = min_interval
+        # The driver of each slot, or None until it has started
+        self._slots: list[Any] = list(drivers)[: self.sessions]
+        self._slots += [None] * (self.sessions - len(self._slots))
+        self.drivers: list[Any] = []
+        self.breaker = breaker
+        self._owned: list[Any] = []
+
+    def start_sessions(self) -> int:
+        """
+        Starts the missing sessions and checks the login of every session.
+
+        Called before each run, so a session that was not logged in last time
+        sends again once its QR code has been scanned. Sessions that fail the
+        check are left out of this run.
+
+        Returns:
+            int: The number of logged-in sessions.
+        """
+        ready: list[Any] = []
+        for slot in range(self.sessions):
+            driver = self._slots[slot]
+            if driver is None:
+                user_data_dir: str = profile_dir_for(slot)
+                os.makedirs(user_data_dir, exist_ok=True)
+                try:
+                    driver = self.driver_factory(user_data_dir)
+                except Exception as e:
+                    print(f"{Fore.RED}Error starting session {slot}: {str(e)}")
+                    continue
+                self._slots[slot] = driver
+                self._owned.append(driver)
+            if self.login_check(driver):
+                ready.append(driver)
+            else:
+                print(f"{Fore.YELLOW}Session {slot} is not logged in and will not send this time.")
+        self.drivers = ready
+        return len(self.drivers)
+
+    def run(self, recipients: Iterable[str]) -> dict[str, Any]:
+        """
+        Sends to every recipient, spreading the work over the sessions.
+
+        Args:
+            recipients (Iterable[str]): The WhatsApp numbers to send to.
+
+        Returns:
+            dict[str, Any]: The processed count per session, failures and elapsed seconds.
+        """
+        work: queue.Queue = queue.Queue()
+        for recipient in recipients:
+            work.put(recipient)
+
+        self.start_sessions()
+
+        processed: list[int] = [0] * len(self.drivers)
+        failed: list[int] = [0] * len(self.drivers)
+        start: float = time.perf_counter()
+
+        def worker(slot: int, driver: Any) -> None:
+            limiter = RateLimiter(self.min_interval)
+            while True:
+                if self.breaker is not None and not self.breaker.allow():
+                    return
+                try:
+                    recipient = work.get_nowait()
+                except queue.Empty:
+                    return
+                limiter.wait()
+                try:
+                    self.send(driver, recipient)
+                    processed[slot] += 1
+                except CircuitOpenError:
+                    # Nothing was attempted; the recipient stays pending for the next run
+                    work.put(recipient)
+                    return
+                except Exception as e:
+                    failed[slot] += 1
+                    print(f"{Fore.RED}Session {slot} failed on {recipient}: {str(e)}")
+
+        threads: list[threading.Thread] = [
+            threading.Thread(target=worker, args=(slot, driver), daemon=True)
+            for slot, driver in enumerate(self.drivers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            "processed": processed,
+            "failed": sum(failed),
+            "unsent": work.qsize(),
+            "elapsed": time.perf_counter() - start,
+        }
+
+    def close(self) -> None:
+        """
+        Quits the drivers started by the pool; drivers passed in are left to the caller.
+        """
+        for driver in self._owned:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.drivers = [driver for driver in self.drivers if driver not in self._owned]
+        self._slots = [None if driver in self._owned else driver for driver in self._slots]
+        self._owned = []
@@ -0,0 +1,332 @@
+import re
+import statistics
+import threading
+import time
+import weakref
+from typing import Callable, Iterable
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
+
+from phone import PhoneRules, default_rules
+from selector_registry import default_registry
+
+WHATSAPP_URL: str = "https://web.whatsapp.com/"
+
+# Seconds between checks while waiting for a chat; WebDriverWait's default
+# of 0.5s would add up to half a second to every message
+POLL_INTERVAL: float = 0.05
+
+
+class LoggedOutError(Exception):
+    """
+    Raised when WhatsApp Web shows the login QR code instead of a chat.
+    """
+
+
+class InvalidNumberError(Exception):
+    """
+    Raised when WhatsApp rejects the phone number of a deep link.
+    """
+
+
+class LatencyEstimator:
+    """
+    Moving estimate of how long a chat takes to open, used to size timeouts.
+
+    Works like TCP's retransmission timer: a smoothed mean and mean deviation
+    are updated with every sample, the timeout is the mean plus four
+    deviations, and a timeout doubles it until the next successful sample.
+    """
+
+    def __init__(
+        self,
+        initial: float = 30.0,
+        minimum: float = 5.0,
+        maximum: float = 30.0,
+        baseline: float = 3.0,
+    ) -> None:
+        """
+        Args:
+            initial (float, optional): Timeout before any sample. Defaults to 30.
+            minimum (float, optional): Lower bound of the timeout. Defaults to 5.
+            maximum (float, optional): Upper bound of the timeout. Defaults to 30.
+            baseline (float, optional): The fixed wait this replaces, used to report
+                the time saved. Defaults to 3.
+        """
+        self.initial: float = initial
+        self.minimum: float = minimum
+        self.maximum: float = maximum
+        self.baseline: float = baseline
+        self.mean: float | None = None
+        self.deviation: float = 0.0
+        self.backoff: float = 1.0
+        self.samples: list[float] = []
+
+    def record(self, seconds: float) -> None:
+        """
+        Adds a successful chat-open latency.
+
+        Args:
+            seconds (float): The measured latency.
+        """
+        if self.mean is None:
+            self.mean, self.deviation = seconds, seconds / 2
+        else:
+            self.deviation = 0.75 * self.deviation + 0.25 * abs(seconds - self.mean)
+            self.mean = 0.875 * self.mean + 0.125 * seconds
+        self.backoff = 1.0
+        self.samples.append(seconds)
+
+    def record_timeout(self) -> None:
+        """
+        Widens the timeout after a wait that ran out.
+        """
+        self.backoff = min(self.backoff * 2, self.maximum)
+
+    def timeout(self) -> float:
+        """
+        Returns:
+            float: The seconds to wait for the next chat to open.
+        """
+        if self.mean is None:
+            return self.initial
+        estimate: float = (self.mean + 4 * self.deviation) * self.backoff
+        return max(self.minimum, min(self.maximum, estimate))
+
+    def report(self) -> dict[str, float]:
+        """
+        Summarises the recorded latencies.
+
+        Returns:
+            dict[str, float]: Count, percentiles, and the seconds saved compared
+                with the fixed baseline wait.
+        """
+        if not self.samples:
+            return {"count": 0}
+        ordered: list[float] = sorted(self.samples)
+        quantiles: list[float] = (
+            statistics.quantiles(ordered, n=100, method="inclusive")
+            if len(ordered) > 1
+            else ordered * 99
+        )
+        return {
+            "count": len(ordered),
+            "mean": statistics.fmean(ordered),
+            "p50": quantiles[49],
+            "p90": quantiles[89],
+            "p99": quantiles[98],
+            "max": ordered[-1],
+            "saved": sum(self.baseline - sample for sample in ordered),
+        }
+
+
+class WhatsAppSession:
+    """
+    Per-driver state that survives between messages.
+
+    The login state is cached after the first successful check and only
+    re-checked after `invalidate` is called, i.e. after a failed send or when
+    the page shows the login QR code. The chat-open latency estimate sizes
+    the readiness waits of this session. `lock` is held by whoever runs a
+    multi-step interaction with the page, so the delivery watcher's checks
+    never land in the middle of one.
+    """
+
+    def __init__(self, driver: WebDriver) -> None:
+        """
+        Args:
+            driver (WebDriver): The driver this session belongs to.
+        """
+        self.driver: WebDriver = driver
+        self.logged_in: bool = False
+        self.chat_open: LatencyEstimator = LatencyEstimator()
+        # Chats this session started to open, successful or not
+        self.navigations: int = 0
+        self.lock = threading.RLock()
+
+    def invalidate(self) -> None:
+        """
+        Forgets the cached login state so the next send checks it again.
+        """
+        self.logged_in = False
+
+
+_sessions: "weakref.WeakKeyDictionary[WebDriver, WhatsAppSession]" = weakref.WeakKeyDictionary()
+
+
+def session_for(driver: WebDriver) -> WhatsAppSession:
+    """
+    Returns the session state of a driver, creating it on first use.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+
+    Returns:
+        WhatsAppSession: The session state.
+    """
+    session = _sessions.get(driver)
+    if session is None:
+        session = _sessions[driver] = WhatsAppSession(driver)
+    return session
+
+
+def deep_link_for(recipient: str, rules: PhoneRules | None = None) -> str:
+    """
+    Returns the WhatsApp Web URL that opens the chat with a phone number.
+
+    Args:
+        recipient (str): The recipient's WhatsApp number, in any formatting.
+        rules (PhoneRules, optional): How to read numbers written without a country
+            code. Defaults to `phone.default_rules()`.
+
+    Raises:
+        InvalidNumberError: If the number cannot be normalized to E.164.
+
+    Returns:
+        str: The deep link.
+    """
+    e164, reason = (rules or default_rules()).normalize(recipient)
+    if e164 is None:
+        raise InvalidNumberError(f"{recipient} is not a valid phone number ({reason}).")
+    return f"{WHATSAPP_URL}send?phone={e164}"
+
+
+def _digits(text: str) -> str:
+    return re.sub(r"\D", "", text)
+
+
+def match_keys(expected: Iterable[str]) -> tuple[list[str], list[str]]:
+    """
+    Returns what a chat title is compared with to identify a recipient.
+
+    Args:
+        expected (Iterable[str]): Phone numbers or names the title may show.
+
+    Returns:
+        tuple[list[str], list[str]]: The last eight digits of each phone number,
+            normalized to E.164 where possible ("0351 15-788-5067" ends in 17885067
+            like the +54 9 351 788-5067 WhatsApp shows), and every value lower-cased.
+    """
+    names: list[str] = [str(value).strip().lower() for value in expected if str(value).strip()]
+    numbers: list[str] = [
+        (default_rules().normalize(name)[0] or _digits(name))[-8:]
+        for name in names
+        if len(_digits(name)) >= 8
+    ]
+    return numbers, names
+
+
+def chat_ready(expected: Iterable[str]) -> Callable[[WebDriver], WebElement | bool]:
+    """
+    Wait condition for an open chat that belongs to the expected recipient.
+
+    The chat header must name one of the expected values, compared by digits
+    for phone numbers and case-insensitively otherwise, and the compose box
+    must be interactable. Both are looked up through the selector registry,
+    so element handles from the previous check are reused.
+
+    Args:
+        expected (Iterable[str]): Phone numbers or names the header may show.
+
+    Returns:
+        Callable[[WebDriver], WebElement | bool]: The condition, which yields the compose box.
+    """
+    numbers, names = match_keys(expected)
+    registry = default_registry()
+
+    def condition(driver: WebDriver) -> WebElement | bool:
+        header = registry.find(driver, "chat_header")
+        if header is None:
+            return False
+        title: str = header.text.lower()
+        if not (
+            any(number in _digits(title) for number in numbers)
+            or any(name in title for name in names)
+        ):
+            return False
+        compose = registry.find(driver, "compose_box")
+        if compose is None:
+            return False
+        return compose if compose.is_displayed() and compose.is_enabled() else False
+
+    return condition
+
+
+def wait_for_chat(
+    driver: WebDriver, expected: Iterable[str], started: float, timeout: float | None = None
+) -> WebElement:
+    """
+    Waits until the chat is ready and records how long it took to open.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+        expected (Iterable[str]): Phone numbers or names the header may show.
+        started (float): `time.monotonic()` when navigation to the chat began.
+        timeout (float, optional): Seconds to wait. Defaults to the session's estimate.
+
+    Raises:
+        TimeoutException: If the chat is not ready in time.
+
+    Returns:
+        WebElement: The compose box.
+    """
+    estimator: LatencyEstimator = session_for(driver).chat_open
+    if timeout is None:
+        timeout = estimator.timeout()
+    remaining: float = max(0.1, timeout - (time.monotonic() - started))
+    try:
+        compose = WebDriverWait(driver, remaining, poll_frequency=POLL_INTERVAL).until(
+            chat_ready(expected)
+        )
+    except TimeoutException:
+        estimator.record_timeout()
+        raise
+    estimator.record(time.monotonic() - started)
+    return compose
+
+
+def open_chat(driver: WebDriver, recipient: str, timeout: float = 30) -> None:
+    """
+    Opens the chat with a phone number through its deep link.
+
+    Once the chat header has rendered, the compose box or an error must show
+    within the session's measured chat-open timeout, at least the
+    registry's grace period; a page whose markup no longer matches
+    fails after that rather than at the full timeout.
+
+    Args:
+        driver (WebDriver): The WebDriver instance.
+        recipient (str): The recipient's WhatsApp number.
+        timeout (float, optional): Seconds to wait for the chat. Defaults to 30.
+
+    Raises:
+        LoggedOutError: If the login QR code is shown.
+        InvalidNumberError: If WhatsApp reports the number as invalid.
+        TimeoutException: If neither the chat nor an error appears in time.
+        SelectorNotFoundError: If the chat rendered but the compose box matches no selector.
+    """
+    registry = default_registry()
+    estimator: LatencyEstimator = session_for(driver).chat_open
+    # Parts of the chat render after its header at about the pace the chat opens
+    grace: float = registry.grace if estimator.mean is None else max(registry.grace, estimator.timeout())
+    driver.get(deep_link_for(recipient))
+    # The page was reloaded, so every element handle of the driver is stale
+    registry.forget(driver)
+    try:
+        shown, _ = registry.wait_any(
+            driver,
+            ["login_qr", "invalid_number", "compose_box"],
+            timeout,
+            anchor="chat_header",
+            grace=grace,
+        )
+    except TimeoutException as error:
+        raise TimeoutException(f"Chat with {recipient} did not open.") from error
+
+    if shown == "login_qr":
+        raise LoggedOutError("WhatsApp Web is showing the login QR code.")
+    if shown == "invalid_number":
+        raise InvalidNumberError(f"WhatsApp reports {recipient} as an invalid number.")
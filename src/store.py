@@ -0,0 +1,310 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+import pandas as pd
+
+from journal import IN_FLIGHT_STATUS, UNCONFIRMED_STATUS
+from loader import apply_declared_types, read_recipients, write_recipients
+from phone import default_rules
+from planner import DEFAULT_LEAD_DAYS
+
+STORE_EXTENSIONS: tuple[str, ...] = (".db", ".sqlite", ".sqlite3")
+
+_stores: dict[str, "RecipientStore"] = {}
+
+
+def is_store_path(file_path: str) -> bool:
+    """
+    Returns:
+        bool: True if the path names a SQLite recipient store.
+    """
+    return os.path.splitext(file_path)[1].lower() in STORE_EXTENSIONS
+
+
+def open_store(file_path: str) -> "RecipientStore":
+    """
+    Returns the shared store for a database file, opening it on first use.
+
+    Args:
+        file_path (str): The path to the SQLite database.
+
+    Returns:
+        RecipientStore: The store.
+    """
+    key: str = os.path.abspath(file_path)
+    if key not in _stores:
+        _stores[key] = RecipientStore(file_path)
+    return _stores[key]
+
+
+class RecipientStore:
+    """
+    SQLite backend for the recipient table.
+
+    Rows live in `recipients`, with indexes on status and whatsapp_number.
+    The dates on which each row is due are kept in `send_dates`, indexed by
+    date, so the rows due today are found without scanning the table. Status
+    changes are single-row transactions, so there is nothing to compact.
+
+    The store offers the same append/replay/compact interface as the send
+    journal, which lets the sender record statuses without knowing which
+    backend is in use.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): The path to the SQLite database; created if missing.
+        """
+        self.path: str = path
+        self.checkpoint_every: int = 0
+        self.pending: int = 0
+        # Row ids of the last loaded table, by position
+        self._rowids: list[int] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def exists(self) -> bool:
+        """
+        Returns:
+            bool: True if the store holds a recipient table.
+        """
+        row = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipients'"
+        ).fetchone()
+        return row is not None
+
+    def _create_indexes(self) -> None:
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_recipients_status ON recipients(status COLLATE NOCASE)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_recipients_number ON recipients(whatsapp_number)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS send_dates ("
+            "recipient_id INTEGER NOT NULL, send_date TEXT NOT NULL, lead_days INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_send_dates_date ON send_dates(send_date, recipient_id)"
+        )
+
+    def import_frame(self, df: pd.DataFrame, lead_days: Iterable[int] = DEFAULT_LEAD_DAYS) -> int:
+        """
+        Replaces the stored recipients with a table.
+
+        Args:
+            df (pd.DataFrame): The recipient table.
+            lead_days (Iterable[int], optional): Days before expiry on which rows are due.
+
+        Returns:
+            int: The number of rows imported.
+        """
+        frame = df.copy()
+        if "status" not in frame.columns:
+            frame["status"] = ""
+        for name in frame.columns:
+            if isinstance(frame[name].dtype, pd.CategoricalDtype):
+                frame[name] = frame[name].astype(str)
+            elif frame[name].dtype == object:
+                frame[name] = frame[name].map(
+                    lambda value: None
+                    if value is None or (not isinstance(value, str) and pd.isna(value))
+                    else value.isoformat(sep=" ") if isinstance(value, (date, datetime)) else str(value)
+                )
+
+        with self._lock, self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS send_dates")
+            frame.to_sql("recipients", self._conn, if_exists="replace", index=False)
+            self._create_indexes()
+            self._plan(lead_days)
+        return len(frame)
+
+    def import_file(self, file_path: str, lead_days: Iterable[int] = DEFAULT_LEAD_DAYS) -> int:
+        """
+        Imports the recipients of an Excel, CSV or Parquet file.
+
+        Args:
+            file_path (str): The file edited by the office staff.
+            lead_days (Iterable[int], optional): Days before expiry on which rows are due.
+
+        Returns:
+            int: The number of rows imported.
+        """
+        return self.import_frame(read_recipients(file_path), lead_days)
+
+    def export_file(self, file_path: str) -> None:
+        """
+        Writes the stored recipients, with their statuses, to a file for the office staff.
+
+        Args:
+            file_path (str): The destination .xlsx, .csv or .parquet file.
+        """
+        write_recipients(self.load(), file_path)
+
+    def _plan(self, lead_days: Iterable[int]) -> None:
+        self._conn.execute("DELETE FROM send_dates")
+        for days in sorted(set(lead_days)):
+            self._conn.execute(
+                "INSERT INTO send_dates (recipient_id, send_date, lead_days) "
+                "SELECT rowid, date(expire_date, ?), ? FROM recipients "
+                "WHERE date(expire_date) IS NOT NULL",
+                (f"-{int(days)} days", int(days)),
+            )
+
+    def plan(self, lead_days: Iterable[int]) -> None:
+        """
+        Recomputes the send dates for a set of lead days.
+
+        Args:
+            lead_days (Iterable[int]): Days before expiry on which rows are due.
+        """
+        with self._lock, self._conn:
+            self._plan(lead_days)
+
+    def load(self) -> pd.DataFrame:
+        """
+        Loads the stored recipients in their original order.
+
+        A row left in flight by a crash is reported as unconfirmed.
+
+        Returns:
+            pd.DataFrame: The recipient table with declared types.
+        """
+        with self._lock:
+            df = pd.read_sql_query(
+                "SELECT rowid AS _rowid, * FROM recipients ORDER BY rowid", self._conn
+            )
+            self._rowids = df.pop("_rowid").tolist()
+        df["status"] = df["status"].fillna("").replace(IN_FLIGHT_STATUS, UNCONFIRMED_STATUS)
+        return apply_declared_types(df)
+
+    def due_unsent(
+        self,
+        today: date,
+        processed: Iterable[str],
+        columns: str = "r.*",
+        catch_up_days: int = 0,
+    ) -> pd.DataFrame:
+        """
+        Returns the rows due on a day that have not been processed, using the indexes.
+
+        A row counts as processed only if its status was recorded on or after
+        the send date, so every lead day gets its own reminder.
+
+        Args:
+            today (date): The day to query.
+            processed (Iterable[str]): Statuses that mark a row as done, in any case.
+            columns (str, optional): The columns to select. Defaults to all.
+            catch_up_days (int, optional): Also return unexpired rows whose send date
+                was at most this many days ago. Defaults to 0.
+
+        Returns:
+            pd.DataFrame: The pending rows, in table order, with the latest due
+                `send_date` of each.
+        """
+        processed = list(processed)
+        placeholders: str = ", ".join("?" for _ in processed) or "NULL"
+        first: date = today - timedelta(days=max(0, int(catch_up_days)))
+        query: str = (
+            f"SELECT {columns}, MAX(s.send_date) AS send_date FROM send_dates s "
+            "JOIN recipients r ON r.rowid = s.recipient_id "
+            "WHERE s.send_date BETWEEN ? AND ? AND date(r.expire_date) >= ? "
+            # A status recorded before this send date belongs to an earlier reminder
+            f"AND (COALESCE(r.status, '') COLLATE NOCASE NOT IN ({placeholders}) "
+            "OR date(r.timestep) < s.send_date) "
+            "GROUP BY r.rowid ORDER BY r.rowid"
+        )
+        params: list[str] = [first.isoformat(), today.isoformat(), today.isoformat(), *processed]
+        with self._lock:
+            return pd.read_sql_query(query, self._conn, params=params)
+
+    def append(
+        self,
+        number: str,
+        status: str,
+        timestamp: datetime | None = None,
+        attempts: int | None = None,
+        rows: list[int] | None = None,
+    ) -> None:
+        """
+        Updates the status of a number's rows in one transaction.
+
+        Args:
+            number (str): The recipient's WhatsApp number.
+            status (str): The new status.
+            timestamp (datetime, optional): When the change happened. Defaults to now.
+            attempts (int, optional): The send attempts made for the rows so far, if they changed.
+            rows (list[int], optional): The positions, in the loaded table, of the rows
+                to update; they are updated by rowid. Defaults to every row whose number
+                normalizes to the same key, see `phone.PhoneRules.key`.
+
+        Raises:
+            LookupError: If no row was updated, so the status would be lost.
+        """
+        stamp: str = (timestamp or datetime.now()).date().isoformat()
+        assignments: str = "status = ?, timestep = ?"
+        values: list = [status, stamp]
+        with self._lock, self._conn:
+            if attempts is not None:
+                columns = [row[1] for row in self._conn.execute("PRAGMA table_info(recipients)")]
+                if "attempts" not in columns:
+                    self._conn.execute("ALTER TABLE recipients ADD COLUMN attempts INTEGER DEFAULT 0")
+                assignments += ", attempts = ?"
+                values.append(int(attempts))
+            if rows is None:
+                rowids: list[int] = self._rowids_of(number)
+            else:
+                rowids = [self._rowids[row] for row in rows]
+            cursor = self._conn.executemany(
+                f"UPDATE recipients SET {assignments} WHERE rowid = ?",
+                [(*values, rowid) for rowid in rowids],
+            )
+            if cursor.rowcount <= 0:
+                raise LookupError(
+                    f"No row of '{self.path}' was updated for {number}; the status '{status}' was not saved."
+                )
+
+    def _rowids_of(self, number: str) -> list[int]:
+        # Callers pass normalized keys, so the stored spellings are normalized too
+        table = pd.read_sql_query("SELECT rowid AS _rowid, whatsapp_number FROM recipients", self._conn)
+        rules = default_rules()
+        matches = rules.keys(table["whatsapp_number"]) == rules.key(number)
+        return table.loc[matches.to_numpy(), "_rowid"].tolist()
+
+    def replay(self, df: pd.DataFrame) -> int:
+        """
+        Statuses are written straight to the store, so there is nothing to replay.
+
+        Returns:
+            int: Always 0.
+        """
+        return 0
+
+    def should_checkpoint(self) -> bool:
+        """
+        Returns:
+            bool: Always False; every update is already durable.
+        """
+        return False
+
+    def compact(self, df: pd.DataFrame, file_path: str) -> bool:
+        """
+        Nothing to do; every update is already durable.
+
+        Returns:
+            bool: Always True.
+        """
+        return True
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._conn.close()
+        _stores.pop(os.path.abspath(self.path), None)
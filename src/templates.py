@@ -0,0 +1,301 @@
+import os
+import string
+import threading
+from typing import Iterable
+
+import pandas as pd
+
+from planner import SendPlan
+
+TEMPLATE_DIR: str = os.path.join(os.path.dirname(__file__), "..", "templates")
+DEFAULT_TEMPLATE: str = "reminder"
+
+# Template used for a given number of days before expiry
+DEFAULT_RULES: dict[int, str] = {7: "early", 0: "expires_today"}
+
+# A number with several due rows gets one message from the group template,
+# with one item line per row in place of its {vehicles} field
+GROUP_TEMPLATE: str = "multiple"
+ITEM_TEMPLATE: str = "vehicle"
+ITEMS_FIELD: str = "vehicles"
+
+# Column that, when present, names the template of a row explicitly
+TEMPLATE_COLUMN: str = "template"
+
+# Fields rendered in upper case
+UPPER_FIELDS: tuple[str, ...] = ("name", "vehicle_license", "model_vehicle")
+
+
+class _BMPTable(dict):
+    """
+    Translation table that drops characters outside the Basic Multilingual Plane.
+
+    Entries are filled in on first sight of a code point, so the table stays
+    small while every later lookup is a plain dict hit.
+    """
+
+    def __missing__(self, code_point: int) -> int | None:
+        value: int | None = code_point if code_point <= 0xFFFF else None
+        self[code_point] = value
+        return value
+
+
+BMP_TABLE: _BMPTable = _BMPTable()
+
+
+class CompiledTemplate:
+    """
+    A message template parsed once into literal text and field segments.
+    """
+
+    def __init__(self, name: str, text: str) -> None:
+        """
+        Args:
+            name (str): The template name.
+            text (str): The template in `str.format` syntax.
+        """
+        self.name: str = name
+        self.text: str = text
+        # The literal text is cleaned once here; only field values are cleaned per row
+        self.segments: list[tuple[str, str | None, str]] = [
+            (literal.translate(BMP_TABLE), field, spec or "")
+            for literal, field, spec, _ in string.Formatter().parse(text)
+        ]
+        self.fields: list[str] = list(
+            dict.fromkeys(field for _, field, _ in self.segments if field)
+        )
+
+    @staticmethod
+    def _format_column(values: pd.Series, spec: str) -> pd.Series:
+        if not spec:
+            return values.astype(str).str.translate(BMP_TABLE)
+        # Few distinct values (dates especially) repeat across many rows,
+        # so each distinct value is formatted once
+        distinct = values.drop_duplicates()
+        if pd.api.types.is_datetime64_any_dtype(values):
+            formatted = distinct.dt.strftime(spec)
+        else:
+            formatted = distinct.map(lambda value: format(value, spec))
+        return values.map(dict(zip(distinct, formatted))).astype(str).str.translate(BMP_TABLE)
+
+    def render(self, frame: pd.DataFrame) -> pd.Series:
+        """
+        Renders the template for every row of a frame with column operations.
+
+        Args:
+            frame (pd.DataFrame): One column per template field, already prepared.
+
+        Raises:
+            KeyError: If a template field is missing from the frame.
+
+        Returns:
+            pd.Series: The rendered messages, cleaned to BMP characters and aligned with the frame.
+        """
+        messages = pd.Series("", index=frame.index, dtype=object)
+        for literal, field, spec in self.segments:
+            if literal:
+                messages = messages + literal
+            if field:
+                messages = messages + self._format_column(frame[field], spec)
+        return messages
+
+
+class TemplateEngine:
+    """
+    Loads the named templates, picks one per row and renders them in batches.
+
+    A row uses the template named in its `template` column when there is one,
+    otherwise the template mapped to its days to expiry, otherwise the default.
+    Several rows sent to one number are rendered together into the group
+    template instead. Rendered messages are cached per send plan, so preview
+    and send share them.
+    """
+
+    def __init__(
+        self,
+        directory: str = TEMPLATE_DIR,
+        rules: dict[int, str] | None = None,
+        default: str = DEFAULT_TEMPLATE,
+    ) -> None:
+        """
+        Args:
+            directory (str, optional): The folder of `<name>.txt` templates. Defaults to TEMPLATE_DIR.
+            rules (dict[int, str], optional): Template per days to expiry. Defaults to DEFAULT_RULES.
+            default (str, optional): The fallback template. Defaults to 'reminder'.
+
+        Raises:
+            FileNotFoundError: If the default template is missing.
+        """
+        self.templates: dict[str, CompiledTemplate] = {}
+        for file_name in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(file_name)
+            if ext == ".txt":
+                with open(os.path.join(directory, file_name), encoding="utf-8") as f:
+                    self.templates[name] = CompiledTemplate(name, f.read().rstrip("\n"))
+        if default not in self.templates:
+            raise FileNotFoundError(f"Default template '{default}.txt' not found in {directory}.")
+
+        self.default: str = default
+        self.rules: dict[int, str] = {
+            days: name
+            for days, name in (DEFAULT_RULES if rules is None else rules).items()
+            if name in self.templates
+        }
+        self._lock = threading.Lock()
+        self._plan: SendPlan | None = None
+        self._plan_version: int = -1
+        self._messages: dict[int, str] = {}
+        self._groups: dict[tuple[int, ...], str] = {}
+
+    def choose(self, df: pd.DataFrame, plan: SendPlan, positions: list[int]) -> pd.Series:
+        """
+        Picks the template name of each row.
+
+        Args:
+            df (pd.DataFrame): The recipient table.
+            plan (SendPlan): The send plan with days to expiry.
+            positions (list[int]): The row positions to choose for.
+
+        Returns:
+            pd.Series: The template names, indexed by row position.
+        """
+        days_left = plan.days_left.iloc[positions].reset_index(drop=True)
+        names = days_left.map(self.rules).fillna(self.default)
+        if TEMPLATE_COLUMN in df.columns:
+            explicit = df[TEMPLATE_COLUMN].iloc[positions].reset_index(drop=True)
+            names = explicit.where(explicit.isin(self.templates.keys()), names)
+        names.index = positions
+        return names
+
+    def render(self, df: pd.DataFrame, plan: SendPlan, positions: Iterable[int]) -> pd.Series:
+        """
+        Renders the messages of several rows in one batch.
+
+        Args:
+            df (pd.DataFrame): The recipient table.
+            plan (SendPlan): The send plan whose parsed expire dates are used.
+            positions (Iterable[int]): The row positions to render.
+
+        Raises:
+            KeyError: If a template field is missing from the table.
+
+        Returns:
+            pd.Series: The messages, cleaned to BMP characters, indexed by row position.
+        """
+        positions = list(positions)
+        if not positions:
+            return pd.Series(dtype=object)
+
+        names = self.choose(df, plan, positions)
+        frame = self._frame(
+            df,
+            plan,
+            positions,
+            [field for name in names.unique() for field in self.templates[name].fields],
+        )
+
+        messages = pd.Series("", index=positions, dtype=object)
+        for name, rows in names.groupby(names).groups.items():
+            messages.loc[rows] = self.templates[name].render(frame.loc[rows])
+        return messages
+
+    @staticmethod
+    def _frame(df: pd.DataFrame, plan: SendPlan, positions: list[int], fields: Iterable[str]) -> pd.DataFrame:
+        """
+        Returns the template fields of some rows, indexed by position and ready to render.
+        """
+        needed: list[str] = list(
+            dict.fromkeys(field for field in fields if field not in ("expire_date", ITEMS_FIELD))
+        )
+        frame = df[needed].iloc[positions].reset_index(drop=True)
+        frame.index = positions
+        for field in UPPER_FIELDS:
+            if field in frame.columns:
+                frame[field] = frame[field].fillna("").astype(str).str.upper()
+        frame["expire_date"] = plan.expire_date.iloc[positions].to_numpy()
+        return frame
+
+    def _render_group(self, df: pd.DataFrame, plan: SendPlan, positions: list[int]) -> str:
+        if GROUP_TEMPLATE not in self.templates or ITEM_TEMPLATE not in self.templates:
+            # Without the group templates the single messages are sent together
+            return "\n\n".join(self.render(df, plan, positions))
+        item = self.templates[ITEM_TEMPLATE]
+        lines = item.render(self._frame(df, plan, positions, item.fields))
+        group = self.templates[GROUP_TEMPLATE]
+        frame = self._frame(df, plan, positions[:1], group.fields)
+        frame[ITEMS_FIELD] = "\n".join(lines)
+        return group.render(frame).iloc[0]
+
+    def message_for(self, df: pd.DataFrame, plan: SendPlan, positions: Iterable[int]) -> str:
+        """
+        Returns the one message for a set of rows that go to the same number.
+
+        A single row gets its own template, see `message`. Several rows are
+        listed in one message built from the group template, one item line per
+        row in table order.
+
+        Args:
+            df (pd.DataFrame): The recipient table.
+            plan (SendPlan): The send plan; a new or refreshed plan starts a new cache.
+            positions (Iterable[int]): The row positions.
+
+        Raises:
+            KeyError: If a template field is missing from the table.
+
+        Returns:
+            str: The rendered message.
+        """
+        key: tuple[int, ...] = tuple(sorted(positions))
+        if len(key) == 1:
+            return self.message(df, plan, key[0])
+        with self._lock:
+            self._sync(plan)
+            if key not in self._groups:
+                self._groups[key] = self._render_group(df, plan, list(key))
+            return self._groups[key]
+
+    def _sync(self, plan: SendPlan) -> bool:
+        # Drops the cached messages when the plan changed; True if it did
+        if plan is self._plan and plan.version == self._plan_version:
+            return False
+        self._plan = plan
+        self._plan_version = plan.version
+        self._messages = {}
+        self._groups = {}
+        return True
+
+    def message(self, df: pd.DataFrame, plan: SendPlan, position: int) -> str:
+        """
+        Returns the cached message of a row, rendering all due rows on first use.
+
+        Args:
+            df (pd.DataFrame): The recipient table.
+            plan (SendPlan): The send plan; a new or refreshed plan starts a new cache.
+            position (int): The row position.
+
+        Returns:
+            str: The rendered message.
+        """
+        with self._lock:
+            if self._sync(plan) or not self._messages:
+                due: list[int] = plan.due.to_numpy().nonzero()[0].tolist()
+                self._messages = self.render(df, plan, due).to_dict()
+            if position not in self._messages:
+                self._messages.update(self.render(df, plan, [position]).to_dict())
+            return self._messages[position]
+
+
+_engine: TemplateEngine | None = None
+
+
+def default_engine() -> TemplateEngine:
+    """
+    Returns the shared engine over the bundled templates, loading it on first use.
+
+    Returns:
+        TemplateEngine: The engine.
+    """
+    global _engine
+    if _engine is None:
+        _engine = TemplateEngine()
+    return _engine
@@ -0,0 +1,50 @@
+import time
+
+
+class PhaseTimer:
+    """
+    Wall-clock time of consecutive phases, e.g. the steps of startup.
+
+    Each `mark` closes the phase that started at the previous mark.
+    """
+
+    def __init__(self, started: float | None = None) -> None:
+        """
+        Args:
+            started (float, optional): The `time.perf_counter()` value the first phase
+                started at. Defaults to now.
+        """
+        self.started: float = time.perf_counter() if started is None else started
+        self._last: float = self.started
+        self.phases: dict[str, float] = {}
+
+    def mark(self, name: str) -> float:
+        """
+        Ends the current phase.
+
+        Args:
+            name (str): The name of the phase that just ended.
+
+        Returns:
+            float: Its duration in seconds.
+        """
+        now: float = time.perf_counter()
+        elapsed: float = now - self._last
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+        self._last = now
+        return elapsed
+
+    def total(self) -> float:
+        """
+        Returns:
+            float: The seconds from the start to the last mark.
+        """
+        return self._last - self.started
+
+    def report(self, title: str = "Startup") -> str:
+        """
+        Returns:
+            str: One line with the total and the time of each phase.
+        """
+        phases: str = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        return f"{title} took {self.total():.2f}s ({phases})"
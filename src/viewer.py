@@ -0,0 +1,251 @@
+import shlex
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+from colorama import Fore
+
+from planner import SendPlan
+
+PAGE_SIZE: int = 20
+
+# Columns shown until others are chosen; `days_left` comes from the send plan
+DEFAULT_COLUMNS: list[str] = [
+    "surname",
+    "name",
+    "whatsapp_number",
+    "expire_date",
+    "days_left",
+    "status",
+]
+
+VIEWER_HELP: str = (
+    "n/Enter: next page (Enter on the last page goes back), p: previous page, g N: go to page N, "
+    "f status=pending,error due=7 prefix=54911: filter, r: clear filters, "
+    "c name,whatsapp_number,status: columns, c: all columns, q: back to the menu"
+)
+
+
+class TableViewer:
+    """
+    Pages through the loaded recipient table one screen at a time.
+
+    Filters are evaluated as column operations into an array of matching
+    row positions. Only the rows and columns of the current page are ever
+    copied and formatted, so the cost of showing a page does not grow with
+    the size of the table.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        plan: SendPlan | None = None,
+        processed: Iterable[str] = (),
+        page_size: int = PAGE_SIZE,
+    ) -> None:
+        """
+        Args:
+            df (pd.DataFrame): The recipient table.
+            plan (SendPlan, optional): The send plan, for the days_left column and
+                the due filter. Defaults to a plan for today.
+            processed (Iterable[str], optional): Lower-cased statuses that mark a row
+                as done; the other rows, and rows due again after an earlier send date,
+                match the 'pending' status filter.
+            page_size (int, optional): Rows per page. Defaults to 20.
+        """
+        self.df: pd.DataFrame = df
+        self.plan: SendPlan = plan if plan is not None else SendPlan(df)
+        self.processed: list[str] = list(processed)
+        self.page_size: int = max(1, page_size)
+        self.columns: list[str] = [
+            name for name in DEFAULT_COLUMNS if name in df.columns or name == "days_left"
+        ]
+        self.filters: dict[str, str] = {}
+        self.page: int = 0
+        self.positions: np.ndarray = np.arange(len(df))
+
+    @property
+    def pages(self) -> int:
+        """
+        Returns:
+            int: The number of pages of matching rows, at least 1.
+        """
+        return max(1, -(-len(self.positions) // self.page_size))
+
+    def _status_mask(self, spec: str) -> np.ndarray:
+        wanted: list[str] = [value.strip().lower() for value in spec.split(",")]
+        status = self.df["status"]
+        if not isinstance(status.dtype, pd.CategoricalDtype):
+            status = status.astype(str).astype("category")
+
+        # Only the few categories are compared, not every cell
+        categories = status.cat.categories.astype(str).str.lower()
+        codes = status.cat.codes.to_numpy()
+
+        def matches(values: list[str]) -> np.ndarray:
+            return np.isin(codes, np.flatnonzero(categories.isin(values)))
+
+        mask = matches([value for value in wanted if value != "pending"])
+        if "pending" in wanted:
+            # Rows processed for an earlier send date are due again
+            mask |= ~matches(self.processed) | self.plan.pending_mask(self.processed).to_numpy()
+        return mask
+
+    def _due_mask(self, spec: str) -> np.ndarray:
+        if spec.strip().lower() == "today":
+            return self.plan.due.to_numpy()
+        days = self.plan.days_left.to_numpy()
+        with np.errstate(invalid="ignore"):
+            return (days >= 0) & (days <= int(spec))
+
+    def _prefix_mask(self, spec: str) -> np.ndarray:
+        prefix: str = spec.strip().lstrip("+")
+        # Numbers written locally only match by country code once normalized
+        e164 = self.plan.numbers["e164"].fillna("").astype(str)
+        raw = self.df["whatsapp_number"].astype(str)
+        return (e164.str.startswith(prefix) | raw.str.startswith(prefix)).to_numpy()
+
+    def apply(self, **filters: str) -> int:
+        """
+        Sets the filters and goes back to the first page.
+
+        Args:
+            **filters (str): Any of `status` (comma-separated statuses; 'pending' for
+                rows not processed yet), `due` ('today' for the rows due now, or N for
+                rows expiring within N days) and `prefix` (start of the WhatsApp number
+                in E.164 form, or as written).
+                An empty value removes the filter.
+
+        Raises:
+            ValueError: If a filter is unknown or its value is malformed.
+
+        Returns:
+            int: The number of matching rows.
+        """
+        handlers: dict[str, Callable[[str], np.ndarray]] = {
+            "status": self._status_mask,
+            "due": self._due_mask,
+            "prefix": self._prefix_mask,
+        }
+        unknown = set(filters) - set(handlers)
+        if unknown:
+            raise ValueError(f"Unknown filter {', '.join(sorted(unknown))}; use status, due or prefix.")
+        merged: dict[str, str] = {**self.filters, **filters}
+        merged = {name: value for name, value in merged.items() if value}
+
+        mask = np.ones(len(self.df), dtype=bool)
+        for name, value in merged.items():
+            try:
+                mask &= handlers[name](value)
+            except ValueError as e:
+                raise ValueError(f"Invalid value '{value}' for the {name} filter.") from e
+        self.filters = merged
+        self.positions = np.flatnonzero(mask)
+        self.page = 0
+        return len(self.positions)
+
+    def clear(self) -> None:
+        """
+        Removes every filter.
+        """
+        self.filters = {}
+        self.positions = np.arange(len(self.df))
+        self.page = 0
+
+    def select(self, columns: Iterable[str] | None) -> None:
+        """
+        Chooses the columns to show.
+
+        Args:
+            columns (Iterable[str] | None): Column names, or None for every column.
+
+        Raises:
+            ValueError: If a column does not exist.
+        """
+        if columns is None:
+            self.columns = [*self.df.columns, "days_left"]
+            return
+        columns = [name.strip() for name in columns if name.strip()]
+        missing = [name for name in columns if name not in self.df.columns and name != "days_left"]
+        if missing:
+            raise ValueError(f"Unknown column {', '.join(missing)}.")
+        self.columns = columns
+
+    def go(self, page: int) -> None:
+        """
+        Moves to a page, clamped to the first and last one.
+
+        Args:
+            page (int): The zero-based page number.
+        """
+        self.page = min(max(0, page), self.pages - 1)
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: The rows and columns of the current page, indexed by
+                their 1-based row number in the table.
+        """
+        start: int = self.page * self.page_size
+        rows = self.positions[start:start + self.page_size]
+        table_columns = [name for name in self.columns if name in self.df.columns]
+        page = self.df.iloc[rows, self.df.columns.get_indexer(table_columns)]
+        if "days_left" in self.columns:
+            page = page.assign(days_left=self.plan.days_left.iloc[rows].to_numpy())[self.columns]
+        page.index = pd.Index(rows + 1, name="#")
+        return page
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: The current page with a line naming the page and the filters.
+        """
+        filters: str = " ".join(f"{name}={value}" for name, value in self.filters.items())
+        title: str = (
+            f"Page {self.page + 1}/{self.pages}, {len(self.positions)} of {len(self.df)} rows"
+            + (f" ({filters})" if filters else "")
+        )
+        if not len(self.positions):
+            return f"{title}\nNo rows match."
+        return f"{title}\n{self.frame().to_string()}"
+
+
+def browse(viewer: TableViewer, read: Callable[[str], str] = input) -> None:
+    """
+    Shows the viewer's pages and reads navigation commands until the user quits.
+
+    Args:
+        viewer (TableViewer): The viewer to drive.
+        read (Callable[[str], str], optional): Reads a command. Defaults to input.
+    """
+    print(f"{Fore.CYAN}{VIEWER_HELP}")
+    while True:
+        print(viewer.render())
+        try:
+            command: str = read(f"{Fore.CYAN}View> ").strip()
+        except EOFError:
+            return
+        action, _, rest = command.partition(" ")
+        action = action.lower()
+        try:
+            if action in ("", "n"):
+                if viewer.page + 1 >= viewer.pages and action == "":
+                    return
+                viewer.go(viewer.page + 1)
+            elif action == "p":
+                viewer.go(viewer.page - 1)
+            elif action == "g":
+                viewer.go(int(rest) - 1)
+            elif action == "f":
+                filters = dict(part.partition("=")[::2] for part in shlex.split(rest))
+                print(f"{Fore.GREEN}{viewer.apply(**filters)} rows match.")
+            elif action == "r":
+                viewer.clear()
+            elif action == "c":
+                viewer.select(rest.split(",") if rest.strip() else None)
+            elif action == "q":
+                return
+            else:
+                print(f"{Fore.YELLOW}{VIEWER_HELP}")
+        except ValueError as e:
+            print(f"{Fore.RED}{str(e)}")
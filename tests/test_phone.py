@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from phone import BAD_AREA_CODE, NO_AREA_CODE, TOO_LONG, PhoneRules  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "number",
+    ["5493517885067", "+54 9 351 788-5067", "0351 15-788-5067", "3517885067", "3517885067.0"],
+)
+def test_spellings_of_one_mobile_share_its_e164(number):
+    assert PhoneRules().normalize(number) == ("5493517885067", "")
+
+
+@pytest.mark.parametrize(
+    "number, reason",
+    [
+        # One digit short, so the mobile 9 would be read as the area code
+        ("549351788506", BAD_AREA_CODE),
+        ("93517885067", TOO_LONG),
+        ("351788506", NO_AREA_CODE),
+    ],
+)
+def test_malformed_numbers_are_rejected(number, reason):
+    assert PhoneRules().normalize(number) == (None, reason)